@@ -18,6 +18,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.humanize',
     'accounts',
     'jobs',
     'applications',
@@ -26,6 +27,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Early, so session and auth queries are profiled too
+    'applications.middleware.QueryProfilerMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -80,6 +83,8 @@ else:
             'NAME': BASE_DIR / 'db.sqlite3',
         }
     }
+    # Covering indexes' INCLUDE columns only apply on PostgreSQL; SQLite builds the plain index
+    SILENCED_SYSTEM_CHECKS = ['models.W040']
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -123,8 +128,98 @@ LOGIN_REDIRECT_URL = 'jobs:job_list'
 LOGOUT_REDIRECT_URL = 'jobs:public_job_list'
 
 # File upload settings
-FILE_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10MB
-DATA_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10MB
+# Resumes are streamed to disk by applications.uploadhandlers.ResumeUploadHandler
+RESUME_MAX_UPLOAD_SIZE = 10485760  # 10MB
+FILE_UPLOAD_MAX_MEMORY_SIZE = 2621440  # 2.5MB, larger uploads go to a temp file
+DATA_UPLOAD_MAX_MEMORY_SIZE = 2621440  # 2.5MB of non-file form data
+
+# Match scoring
+MATCH_SCORE_MAX_FEATURES = config('MATCH_SCORE_MAX_FEATURES', default=20000, cast=int)
+# Scorers a job can rank its applicants with (Job.scoring_backend), see applications.scoring
+MATCH_SCORERS = {
+    'tfidf': 'applications.scoring.TfidfScorer',
+    'semantic': 'applications.scoring.SemanticScorer',
+    'keywords': 'applications.scoring.KeywordScorer',
+    'bm25': 'applications.scoring.Bm25Scorer',
+}
+MATCH_SCORER_DEFAULT = config('MATCH_SCORER_DEFAULT', default='tfidf')
+# BM25 term frequency saturation and length normalization
+BM25_K1 = config('BM25_K1', default=1.2, cast=float)
+BM25_B = config('BM25_B', default=0.75, cast=float)
+# Refit a job's TF-IDF model once its scored corpus grows by this factor
+MATCH_MODEL_REFIT_FACTOR = config('MATCH_MODEL_REFIT_FACTOR', default=2.0, cast=float)
+
+# Cross-job candidate recommendations (inverted index snapshot on disk)
+RECOMMENDATION_INDEX_PATH = config('RECOMMENDATION_INDEX_PATH', default=str(BASE_DIR / 'var' / 'recommendation_index.npz'))
+RECOMMENDATION_INDEX_SAVE_SECONDS = config('RECOMMENDATION_INDEX_SAVE_SECONDS', default=60, cast=int)
+RECOMMENDATIONS_LIMIT = config('RECOMMENDATIONS_LIMIT', default=20, cast=int)
+
+# Semantic scoring: LSA embeddings and their approximate nearest neighbour index
+EMBEDDING_DIMENSIONS = config('EMBEDDING_DIMENSIONS', default=128, cast=int)
+EMBEDDING_FIT_SAMPLE = config('EMBEDDING_FIT_SAMPLE', default=50000, cast=int)  # resumes
+EMBEDDING_MODEL_PATH = config('EMBEDDING_MODEL_PATH', default=str(BASE_DIR / 'var' / 'embedding_model.npz'))
+EMBEDDING_INDEX_PATH = config('EMBEDDING_INDEX_PATH', default=str(BASE_DIR / 'var' / 'embedding_index.npz'))
+# IVF lists scanned per query; more is slower but closer to exact
+EMBEDDING_IVF_PROBES = config('EMBEDDING_IVF_PROBES', default=8, cast=int)
+
+# Resume text extraction process pools, one per extracting thread (0 workers extracts in-process)
+RESUME_EXTRACTION_WORKERS = config('RESUME_EXTRACTION_WORKERS', default=2, cast=int)
+RESUME_EXTRACTION_TIMEOUT = config('RESUME_EXTRACTION_TIMEOUT', default=60, cast=int)  # seconds per file
+RESUME_EXTRACTION_MAX_PAGES = config('RESUME_EXTRACTION_MAX_PAGES', default=50, cast=int)
+# Extra address space each extraction worker may allocate
+RESUME_EXTRACTION_MEMORY_LIMIT_MB = config('RESUME_EXTRACTION_MEMORY_LIMIT_MB', default=1024, cast=int)
+# PDFs with more pages than this are split across workers
+RESUME_PDF_PAGES_PER_TASK = config('RESUME_PDF_PAGES_PER_TASK', default=8, cast=int)
+
+# Background task queue (database backed, processed by `manage.py run_worker`)
+# Run tasks inline right after commit instead, e.g. for local development
+TASK_QUEUE_EAGER = config('TASK_QUEUE_EAGER', default=False, cast=bool)
+# Seconds before a RUNNING task whose worker died is handed out again (as a new attempt)
+TASK_QUEUE_LOCK_TIMEOUT = config('TASK_QUEUE_LOCK_TIMEOUT', default=600, cast=int)
+# Seconds between lock renewals of a running task; keep well under the lock timeout
+TASK_QUEUE_HEARTBEAT_INTERVAL = config('TASK_QUEUE_HEARTBEAT_INTERVAL', default=60, cast=int)
+TASK_QUEUE_RETRY_DELAY = config('TASK_QUEUE_RETRY_DELAY', default=30, cast=int)
+# A job's full rerank runs at most once per window, however many applications arrive
+RERANK_DEBOUNCE_SECONDS = config('RERANK_DEBOUNCE_SECONDS', default=30, cast=int)
+
+# Cache: locmem (per process, so only for a single-process server), file (shared by the processes of a host), database
+# (shared by every host; run `manage.py createcachetable` first) or a backend's dotted path
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'database': 'django.core.cache.backends.db.DatabaseCache',
+}
+CACHE_BACKEND = config('CACHE_BACKEND', default='locmem' if DEBUG else 'file')
+CACHE_LOCATIONS = {
+    'locmem': 'ats',
+    'file': str(BASE_DIR / 'var' / 'cache'),
+    'database': 'ats_cache',
+}
+CACHE_TIMEOUT = config('CACHE_TIMEOUT', default=300, cast=int)
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS.get(CACHE_BACKEND, CACHE_BACKEND),
+        'LOCATION': config('CACHE_LOCATION', default=CACHE_LOCATIONS.get(CACHE_BACKEND, '')),
+        'TIMEOUT': CACHE_TIMEOUT,
+        'KEY_PREFIX': config('CACHE_KEY_PREFIX', default='ats'),
+    }
+}
+
+# Prometheus metrics at /metrics (and `run_worker --metrics-port`); recording is skipped when off
+METRICS_ENABLED = config('METRICS_ENABLED', default=False, cast=bool)
+# Per-process metric files summed by every scrape; empty keeps metrics per process (single-process servers only)
+METRICS_DIR = config('METRICS_DIR', default=str(BASE_DIR / 'var' / 'metrics'))
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', default=5, cast=float)
+# Scrapes need staff login, `Authorization: Bearer <METRICS_TOKEN>` or an allowed client address
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+METRICS_ALLOWED_IPS = [ip for ip in config('METRICS_ALLOWED_IPS', default='').split(',') if ip]
+
+# SQL query profiling of a sample of requests (0 disables, 1 profiles every request)
+QUERY_PROFILER_SAMPLE_RATE = config('QUERY_PROFILER_SAMPLE_RATE', default=0.0, cast=float)
+# A query shape repeated this often in one request is logged as a possible N+1
+QUERY_PROFILER_N_PLUS_ONE_THRESHOLD = config('QUERY_PROFILER_N_PLUS_ONE_THRESHOLD', default=5, cast=int)
+# Add an X-Query-Profile response header to profiled requests
+QUERY_PROFILER_HEADER = config('QUERY_PROFILER_HEADER', default=DEBUG, cast=bool)
 
 # Logging
 LOG_DIR = BASE_DIR / 'logs'
@@ -1,10 +1,37 @@
 from django.contrib import admin
-from .models import Application
+from .models import Application, QueuedTask, ResumeBlob
+from .search import search_applications
+
+# Full-text matches merged into the admin changelist search
+ADMIN_SEARCH_LIMIT = 1000
 
 
 @admin.register(Application)
 class ApplicationAdmin(admin.ModelAdmin):
     list_display = ['name', 'email', 'job', 'match_score', 'status', 'created_at']
     list_filter = ['status', 'created_at', 'job']
-    search_fields = ['name', 'email', 'resume_text']
+    # resume_text is searched through the full-text index, not ILIKE
+    search_fields = ['name', 'email']
     readonly_fields = ['resume_text', 'match_score', 'created_at']
+
+    def get_search_results(self, request, queryset, search_term):
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if search_term:
+            matches = search_applications(search_term, limit=ADMIN_SEARCH_LIMIT)
+            results |= queryset.filter(pk__in=[application.pk for application in matches])
+        return results, may_have_duplicates
+
+
+@admin.register(QueuedTask)
+class QueuedTaskAdmin(admin.ModelAdmin):
+    list_display = ['name', 'args', 'status', 'attempts', 'run_after', 'finished_at']
+    list_filter = ['status', 'name']
+    readonly_fields = ['created_at', 'finished_at', 'locked_at', 'last_error']
+
+
+@admin.register(ResumeBlob)
+class ResumeBlobAdmin(admin.ModelAdmin):
+    list_display = ['sha256', 'file', 'size', 'ref_count', 'extracted', 'created_at']
+    list_filter = ['extracted']
+    search_fields = ['sha256']
+    readonly_fields = ['sha256', 'size', 'ref_count', 'created_at']
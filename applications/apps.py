@@ -3,4 +3,8 @@ from django.apps import AppConfig
 
 class ApplicationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'applications'
\ No newline at end of file
+    name = 'applications'
+
+    def ready(self):
+        # Register background tasks with the queue and model signals
+        from . import signals, tasks  # noqa: F401
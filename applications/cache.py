@@ -0,0 +1,135 @@
+"""
+Versioned caching on top of django.core.cache
+
+Cached values are keyed by the current versions of the scopes they depend
+on: 'jobs' (any job), 'job:<pk>' (one job) and 'applications' (the content
+of any application, not its scores). Model signals start new versions once
+their changes commit, so entries of older versions are never read again and
+simply expire. Versions are kept without a timeout, and every bump stores a
+new unique value (a nanosecond timestamp) rather than incrementing: only
+LocMemCache implements incr() atomically, elsewhere two concurrent
+increments could land on the same version.
+
+Lookups through get_or_set() and @cached are counted in
+ats_cache_requests_total{name,result}.
+"""
+import functools
+import hashlib
+import time
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db import transaction
+from .metrics import CACHE_REQUESTS
+
+_MISSING = object()
+
+
+def job_scope(job_id):
+    """Scope of one job and its applications"""
+    return f'job:{job_id}'
+
+
+def _version_key(scope):
+    return f'version:{scope}'
+
+
+def _new_version():
+    # Never a value used before, unless two bumps share a nanosecond
+    return time.time_ns()
+
+
+def versions(*scopes):
+    """
+    Current version of each scope
+
+    A scope the cache has no version for (never changed, or evicted) starts
+    a new one.
+
+    Returns:
+        List of versions, aligned with scopes
+    """
+    keys = [_version_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        initial = _new_version()
+        for key in missing:
+            cache.add(key, initial, None)
+        found.update(cache.get_many(missing))
+        return [found.get(key, initial) for key in keys]
+    return [found[key] for key in keys]
+
+
+def version(scope):
+    return versions(scope)[0]
+
+
+def _bump(scopes):
+    # set(), not incr(): a racing bump can't undo this one, only replace it
+    # with another new version
+    cache.set_many({_version_key(scope): _new_version() for scope in scopes}, None)
+
+
+def invalidate(*scopes):
+    """
+    Start new versions of scopes once the current transaction commits
+
+    Bumping earlier would let a concurrent request cache the old rows under
+    the new version.
+    """
+    transaction.on_commit(lambda: _bump(scopes))
+
+
+def make_key(name, parts, scopes=()):
+    """Cache key of a named value, its identifying parts and its scopes' versions"""
+    digest = hashlib.md5(repr(parts).encode('utf-8')).hexdigest()
+    return ':'.join([name, digest, *map(str, versions(*scopes))])
+
+
+def get_or_set(name, parts, compute, scopes=(), timeout=DEFAULT_TIMEOUT):
+    """
+    Cached value, computed and stored on a miss
+
+    Args:
+        name: Name of the cached value, also its label in the hit/miss counters
+        parts: Hashable values identifying it, e.g. (job.pk, limit)
+        compute: Function returning the value
+        scopes: Scopes the value depends on
+        timeout: Seconds to keep it (default: the cache's TIMEOUT)
+
+    Returns:
+        The cached or computed value
+    """
+    key = make_key(name, parts, scopes)
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        CACHE_REQUESTS.inc(name=name, result='hit')
+        return value
+    CACHE_REQUESTS.inc(name=name, result='miss')
+    value = compute()
+    cache.set(key, value, timeout)
+    return value
+
+
+def cached(name, key, scopes=(), timeout=DEFAULT_TIMEOUT):
+    """
+    Decorator caching a function's results with get_or_set()
+
+    Args:
+        name: Name of the cached value
+        key: Function of the call's arguments returning its identifying parts
+        scopes: Scopes, or a function of the call's arguments returning them
+        timeout: Seconds to keep results (default: the cache's TIMEOUT)
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return get_or_set(
+                name,
+                key(*args, **kwargs),
+                lambda: func(*args, **kwargs),
+                scopes(*args, **kwargs) if callable(scopes) else scopes,
+                timeout,
+            )
+        return wrapper
+    return decorator
@@ -0,0 +1,451 @@
+import logging
+import os
+import tempfile
+import threading
+import time
+from array import array
+import numpy as np
+from django.conf import settings
+from django.db.models import Q
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.decomposition import TruncatedSVD
+from sklearn.preprocessing import normalize
+from .services import count_matrix, encode_text, unpack_term_counts
+
+logger = logging.getLogger(__name__)
+
+_model = None
+_model_mtime = None
+_model_lock = threading.Lock()
+
+_ivf_index = None
+_ivf_lock = threading.Lock()
+
+
+def _write_npz(path, **arrays):
+    """Write arrays to path atomically"""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=directory, suffix='.tmp', delete=False) as handle:
+        np.savez(handle, **arrays)
+    os.replace(handle.name, path)
+
+
+class EmbeddingModel:
+    """
+    LSA projection of resumes and job descriptions into a dense space
+
+    Stored term counts are weighted with a corpus-wide TF-IDF, then
+    projected by a TruncatedSVD fitted over all resumes. Terms that co-occur
+    across resumes end up close together, so "postgres" and "sql" can match
+    even when a resume never uses the job's exact words.
+    """
+
+    def __init__(self, vocabulary, idf, components, version):
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.components = components
+        self.version = version
+
+    @property
+    def dimensions(self):
+        return self.components.shape[0]
+
+    def embed(self, term_count_blobs):
+        """
+        Unit-length float32 embeddings of packed term counts
+
+        Args:
+            term_count_blobs: List of packed term counts
+
+        Returns:
+            numpy array of shape (len(term_count_blobs), dimensions)
+        """
+        if not term_count_blobs:
+            return np.zeros((0, self.dimensions), dtype=np.float32)
+        tfidf = normalize(count_matrix(term_count_blobs, self.vocabulary).multiply(self.idf).tocsr())
+        return normalize(tfidf @ self.components.T).astype(np.float32)
+
+    def save(self, path):
+        _write_npz(
+            path,
+            vocabulary=self.vocabulary,
+            idf=self.idf,
+            components=self.components,
+            version=np.array([self.version], dtype=np.int64),
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(
+                data['vocabulary'], data['idf'], data['components'], int(data['version'][0])
+            )
+
+
+def fit_embedding_model():
+    """
+    Fit the LSA model over the stored term counts of all resumes
+
+    Runs on the fit_embeddings queue task or management command only:
+    fitting scans up to EMBEDDING_FIT_SAMPLE resumes. A new model defines a
+    new embedding space; stored embeddings carry the version of the model
+    that produced them and are recomputed on demand once it is replaced, and
+    the ANN index is rebuilt on next use.
+
+    Returns:
+        EmbeddingModel, or None if the corpus is too small to fit one
+    """
+    from .models import Application
+
+    global _model, _model_mtime
+    blobs = [
+        bytes(blob) for blob in
+        Application.objects
+        .exclude(term_counts=b'')
+        .order_by('-pk')
+        .values_list('term_counts', flat=True)[:settings.EMBEDDING_FIT_SAMPLE]
+    ]
+    if len(blobs) < 2:
+        logger.warning("Not enough resumes to fit the embedding model")
+        return None
+
+    # Vocabulary: the most widespread terms, as in fit_job_model
+    all_ids = np.concatenate([unpack_term_counts(blob)[0] for blob in blobs])
+    term_ids, document_frequencies = np.unique(all_ids, return_counts=True)
+    max_features = settings.MATCH_SCORE_MAX_FEATURES
+    if max_features and len(term_ids) > max_features:
+        keep = np.sort(np.argsort(-document_frequencies, kind='stable')[:max_features])
+        term_ids, document_frequencies = term_ids[keep], document_frequencies[keep]
+    idf = (np.log((1 + len(blobs)) / (1 + document_frequencies)) + 1).astype(np.float32)
+    vocabulary = term_ids.astype(np.uint32)
+
+    dimensions = min(settings.EMBEDDING_DIMENSIONS, len(vocabulary) - 1, len(blobs) - 1)
+    if dimensions < 1:
+        logger.warning("Not enough distinct terms to fit the embedding model")
+        return None
+    tfidf = normalize(count_matrix(blobs, vocabulary).multiply(idf).tocsr())
+    svd = TruncatedSVD(n_components=dimensions, random_state=0).fit(tfidf)
+
+    model = EmbeddingModel(
+        vocabulary, idf, svd.components_.astype(np.float32), version=time.time_ns()
+    )
+    path = settings.EMBEDDING_MODEL_PATH
+    with _model_lock:
+        model.save(path)
+        _model, _model_mtime = model, os.path.getmtime(path)
+    logger.info(f"Fitted {dimensions}-dimensional embedding model on {len(blobs)} resumes")
+    return model
+
+
+def get_embedding_model():
+    """
+    Return the current embedding model
+
+    The model lives on disk (EMBEDDING_MODEL_PATH) and is reloaded when
+    another process refits it. It is never fitted here, see
+    fit_embedding_model.
+
+    Returns:
+        EmbeddingModel, or None if none has been fitted yet
+    """
+    global _model, _model_mtime
+    path = settings.EMBEDDING_MODEL_PATH
+    with _model_lock:
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            mtime = None
+        if mtime is not None and mtime != _model_mtime:
+            _model, _model_mtime = EmbeddingModel.load(path), mtime
+        return _model if mtime is not None else None
+
+
+def decode_embedding(blob):
+    return np.frombuffer(bytes(blob or b''), dtype=np.float32)
+
+
+def embed_missing(applications, model):
+    """
+    Compute and store embeddings of applications that have none yet
+
+    Embeddings from another model version count as missing.
+
+    Args:
+        applications: Application instances with term_counts, embedding and
+            embedding_version loaded
+        model: EmbeddingModel
+    """
+    from .models import Application
+
+    missing = [
+        application for application in applications
+        if application.term_counts and application.embedding_version != model.version
+    ]
+    if not missing:
+        return
+    vectors = model.embed([bytes(application.term_counts) for application in missing])
+    for application, vector in zip(missing, vectors):
+        application.embedding = vector.tobytes()
+        application.embedding_version = model.version
+    Application.objects.bulk_update(
+        missing, ['embedding', 'embedding_version'], batch_size=1000
+    )
+    logger.info(f"Embedded {len(missing)} resumes")
+
+
+def embed_description(job, model):
+    return model.embed([encode_text(job.description)])[0]
+
+
+def semantic_scores(job, applications):
+    """
+    Semantic match scores (0-100) of applications against their job
+
+    Args:
+        job: Job model instance
+        applications: Application instances with term_counts, embedding and
+            embedding_version loaded
+
+    Returns:
+        numpy array of scores aligned with applications, or None if no
+        embedding model has been fitted yet (one is queued)
+    """
+    model = get_embedding_model()
+    if model is None:
+        from .queue import enqueue
+
+        enqueue('fit_embeddings', dedupe_key='fit_embeddings')
+        return None
+    if not applications:
+        return np.zeros(0)
+    embed_missing(applications, model)
+    size = model.dimensions
+    matrix = np.vstack([
+        vector if len(vector) == size else np.zeros(size, dtype=np.float32)
+        for vector in (decode_embedding(application.embedding) for application in applications)
+    ])
+    similarities = np.clip(matrix @ embed_description(job, model), 0, 1)
+    return np.round(similarities.astype(np.float64) * 100, 2)
+
+
+class IvfIndex:
+    """
+    Inverted-file approximate nearest neighbour index over embeddings
+
+    Embeddings are clustered with k-means; each one is filed under its
+    nearest centroid. A query only scans the lists of its EMBEDDING_IVF_PROBES
+    nearest centroids. New embeddings are appended to their list without
+    reclustering; the index is rebuilt once the corpus doubles.
+    """
+
+    def __init__(self, centroids, version):
+        self.centroids = centroids
+        self.version = version  # EmbeddingModel version the vectors belong to
+        self.dimensions = centroids.shape[1]
+        self.ids = [array('q') for _ in range(len(centroids))]
+        self.vectors = [bytearray() for _ in range(len(centroids))]
+        self.locations = {}  # application id -> list number
+        self.built_document_count = 0
+        self.high_water = 0
+        self.pending = set()
+
+    def __len__(self):
+        return len(self.locations)
+
+    @classmethod
+    def build(cls, ids, vectors, version):
+        """Cluster the vectors into about sqrt(n) lists and file them"""
+        list_count = max(1, min(1024, int(np.sqrt(len(ids)))))
+        if len(ids) > list_count:
+            kmeans = MiniBatchKMeans(n_clusters=list_count, n_init=3, random_state=0)
+            centroids = normalize(kmeans.fit(vectors[:50000]).cluster_centers_)
+        else:
+            centroids = normalize(vectors) if len(ids) else np.zeros((1, vectors.shape[1]))
+        index = cls(centroids.astype(np.float32), version)
+        for pk, vector in zip(ids, vectors):
+            index.add(int(pk), vector)
+        index.built_document_count = len(ids)
+        return index
+
+    def add(self, application_id, vector):
+        if application_id in self.locations:
+            self.remove(application_id)
+        list_number = int(np.argmax(self.centroids @ vector))
+        self.ids[list_number].append(application_id)
+        self.vectors[list_number] += np.asarray(vector, dtype=np.float32).tobytes()
+        self.locations[application_id] = list_number
+
+    def remove(self, application_id):
+        list_number = self.locations.pop(application_id, None)
+        if list_number is None:
+            return
+        ids = self.ids[list_number]
+        position = ids.index(application_id)
+        del ids[position]
+        width = self.dimensions * 4
+        del self.vectors[list_number][position * width:(position + 1) * width]
+
+    def needs_rebuild(self):
+        return len(self) >= max(1, self.built_document_count) * settings.MATCH_MODEL_REFIT_FACTOR
+
+    def search(self, vector, k, exclude=()):
+        """
+        Approximate top-k cosine matches
+
+        Returns:
+            List of (similarity, application id), best first
+        """
+        probes = np.argsort(-(self.centroids @ vector))[:settings.EMBEDDING_IVF_PROBES]
+        candidate_ids = []
+        similarities = []
+        for list_number in probes:
+            ids = self.ids[list_number]
+            if not ids:
+                continue
+            vectors = np.frombuffer(self.vectors[list_number], dtype=np.float32).reshape(len(ids), -1)
+            candidate_ids.append(np.frombuffer(ids, dtype=np.int64))
+            similarities.append(vectors @ vector)
+        if not candidate_ids:
+            return []
+        candidate_ids = np.concatenate(candidate_ids)
+        similarities = np.concatenate(similarities)
+        if exclude:
+            keep = ~np.isin(candidate_ids, list(exclude))
+            candidate_ids, similarities = candidate_ids[keep], similarities[keep]
+        best = np.argsort(-similarities, kind='stable')[:k]
+        return [(float(similarities[i]), int(candidate_ids[i])) for i in best]
+
+    def save(self, path):
+        _write_npz(
+            path,
+            meta=np.array([self.version, self.built_document_count, self.high_water], dtype=np.int64),
+            centroids=self.centroids,
+            list_sizes=np.array([len(ids) for ids in self.ids], dtype=np.int64),
+            ids=np.frombuffer(b''.join(ids.tobytes() for ids in self.ids), dtype=np.int64),
+            vectors=np.frombuffer(b''.join(self.vectors), dtype=np.float32),
+            pending=np.array(sorted(self.pending), dtype=np.int64),
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            version, built_document_count, high_water = data['meta'].tolist()
+            index = cls(data['centroids'], version)
+            index.built_document_count = built_document_count
+            index.high_water = high_water
+            ids, vectors = data['ids'], data['vectors'].reshape(-1, index.dimensions)
+            start = 0
+            for list_number, size in enumerate(data['list_sizes'].tolist()):
+                list_ids = ids[start:start + size]
+                index.ids[list_number] = array('q', list_ids.tobytes())
+                index.vectors[list_number] = bytearray(vectors[start:start + size].tobytes())
+                index.locations.update(dict.fromkeys(list_ids.tolist(), list_number))
+                start += size
+            index.pending = set(data['pending'].tolist())
+        return index
+
+
+def _embedded_rows(queryset, model):
+    """Load (pk, term_counts, embedding) rows and embed the ones missing"""
+    applications = list(
+        queryset.only('pk', 'term_counts', 'embedding', 'embedding_version').order_by('pk')
+    )
+    embed_missing(applications, model)
+    return applications
+
+
+def build_ivf_index(model):
+    from .models import Application
+
+    applications = [
+        application for application in _embedded_rows(Application.objects.all(), model)
+        if application.term_counts
+    ]
+    ids = np.array([application.pk for application in applications], dtype=np.int64)
+    vectors = (
+        np.vstack([decode_embedding(application.embedding) for application in applications])
+        if applications else np.zeros((0, model.dimensions), dtype=np.float32)
+    )
+    index = IvfIndex.build(ids, vectors, model.version)
+    index.high_water = int(Application.objects.order_by('-pk').values_list('pk', flat=True).first() or 0)
+    index.pending = set(
+        Application.objects.filter(term_counts=b'').values_list('pk', flat=True)
+    )
+    logger.info(f"Built embedding index over {len(index)} resumes in {len(index.ids)} lists")
+    return index
+
+
+def refresh_ivf_index(index, model):
+    """Insert applications created or extracted since the last refresh; True if changed"""
+    from .models import Application
+
+    applications = _embedded_rows(
+        Application.objects.filter(Q(pk__gt=index.high_water) | Q(pk__in=index.pending)), model
+    )
+    changed = False
+    seen = set()
+    for application in applications:
+        seen.add(application.pk)
+        index.high_water = max(index.high_water, application.pk)
+        if application.term_counts:
+            index.add(application.pk, decode_embedding(application.embedding))
+            index.pending.discard(application.pk)
+            changed = True
+        elif application.pk not in index.pending:
+            index.pending.add(application.pk)
+            changed = True
+    gone = index.pending - seen
+    if gone:
+        index.pending -= gone
+        changed = True
+    return changed
+
+
+def get_ivf_index(model, rebuild=False):
+    """
+    Return the process-wide ANN index for a model, caught up with the database
+
+    The index is snapshotted to EMBEDDING_INDEX_PATH whenever it changes and
+    rebuilt when the embedding model was refitted.
+    """
+    global _ivf_index
+    path = settings.EMBEDDING_INDEX_PATH
+    with _ivf_lock:
+        changed = False
+        if rebuild or (_ivf_index is not None and _ivf_index.version != model.version):
+            _ivf_index = None
+        if _ivf_index is None and not rebuild and os.path.exists(path):
+            try:
+                _ivf_index = IvfIndex.load(path)
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Could not load embedding index from {path}: {e}")
+            if _ivf_index is not None and _ivf_index.version != model.version:
+                _ivf_index = None
+        if _ivf_index is None:
+            _ivf_index = build_ivf_index(model)
+            changed = True
+        if refresh_ivf_index(_ivf_index, model):
+            changed = True
+            if _ivf_index.needs_rebuild():
+                _ivf_index = build_ivf_index(model)
+        if changed:
+            _ivf_index.save(path)
+        return _ivf_index
+
+
+def semantic_candidates(job, limit):
+    """
+    Nearest resumes from other jobs to a job description in embedding space
+
+    Returns:
+        List of (similarity, application id), best first, or None if no
+        embedding model has been fitted yet
+    """
+    model = get_embedding_model()
+    if model is None:
+        return None
+    index = get_ivf_index(model)
+    exclude = set(job.application_set.values_list('pk', flat=True))
+    with _ivf_lock:
+        return index.search(embed_description(job, model), limit, exclude=exclude)
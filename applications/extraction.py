@@ -0,0 +1,215 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+import pdfplumber
+from django.conf import settings
+from .services import extract_text_from_docx, extract_text_from_file, extract_text_from_pdf
+
+logger = logging.getLogger(__name__)
+
+# One pool per calling thread: recycling a pool after a hung or crashed file
+# only disturbs the extractions of the thread that submitted it
+_local = threading.local()
+
+
+class ExtractionError(Exception):
+    """A resume could not be extracted: it timed out, crashed its worker or failed to parse"""
+
+
+def _limit_memory(limit_mb):
+    """Cap the extra address space a pool worker may allocate (Linux only)"""
+    try:
+        import resource
+    except ImportError:
+        return
+    if not limit_mb:
+        return
+    try:
+        with open('/proc/self/statm') as statm:
+            current = int(statm.read().split()[0]) * resource.getpagesize()
+    except OSError:
+        current = 0
+    limit = current + limit_mb * 1024 * 1024
+    try:
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ValueError, OSError) as e:
+        logger.warning(f"Could not set extraction memory limit: {e}")
+
+
+def _get_pool():
+    """This thread's extraction pool, started on first use"""
+    pool = getattr(_local, 'pool', None)
+    if pool is None:
+        pool = _local.pool = ProcessPoolExecutor(
+            max_workers=settings.RESUME_EXTRACTION_WORKERS,
+            initializer=_limit_memory,
+            initargs=(settings.RESUME_EXTRACTION_MEMORY_LIMIT_MB,),
+        )
+    return pool
+
+
+def _reset_pool():
+    """Kill this thread's pool processes, e.g. after a worker got stuck on a file"""
+    pool, _local.pool = getattr(_local, 'pool', None), None
+    if pool is None:
+        return
+    for process in list(getattr(pool, '_processes', {}).values()):
+        process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _extract_in_process(file_path):
+    try:
+        return extract_text_from_file(file_path)
+    except Exception as e:
+        logger.error(f"Error extracting text from {file_path}: {e}")
+        return None
+
+
+def _extract_unit(kind, file_path, start, stop):
+    """Entry point run inside a pool worker"""
+    if kind == 'pdf':
+        return extract_text_from_pdf(file_path, start, stop)
+    if kind == 'docx':
+        return extract_text_from_docx(file_path)
+    return extract_text_from_file(file_path)
+
+
+def _count_pages(file_path):
+    """Pages of a PDF; run inside a pool worker, since opening a hostile PDF can hang or balloon"""
+    with pdfplumber.open(file_path) as pdf:
+        return len(pdf.pages)
+
+
+def _kind(file_path):
+    extension = os.path.splitext(file_path)[1].lower()
+    return {'.pdf': 'pdf', '.docx': 'docx'}.get(extension, 'file')
+
+
+def _plan(file_path, page_count=None):
+    """Split a file into units of work; PDFs with a known page count become page ranges"""
+    kind = _kind(file_path)
+    if kind != 'pdf' or page_count is None:
+        return [(kind, file_path, 0, None)]
+
+    chunk = settings.RESUME_PDF_PAGES_PER_TASK
+    max_pages = settings.RESUME_EXTRACTION_MAX_PAGES
+    if max_pages:
+        page_count = min(page_count, max_pages)
+    if not chunk or page_count <= chunk:
+        return [('pdf', file_path, 0, page_count)]
+    return [
+        ('pdf', file_path, start, min(start + chunk, page_count))
+        for start in range(0, page_count, chunk)
+    ]
+
+
+class _Stalled(Exception):
+    """A file timed out or broke the pool; the pool must be recycled"""
+
+    def __init__(self, index, error):
+        super().__init__(index, error)
+        self.index = index
+        self.error = error
+
+
+def _result(future, index, deadline):
+    try:
+        return future.result(timeout=max(0, deadline - time.monotonic()))
+    except (FutureTimeoutError, BrokenProcessPool) as e:
+        raise _Stalled(index, e) from e
+
+
+def _extract_batch(pool, file_paths, indexes, results, done):
+    """
+    Extract files on one pool, recording finished ones in results and done
+
+    PDFs are first counted in the pool, then split into page ranges. Each
+    file gets RESUME_EXTRACTION_TIMEOUT for its count and again for its
+    text, measured from when this thread starts waiting on it.
+
+    Raises:
+        _Stalled: For the first file that timed out or broke the pool
+    """
+    timeout = settings.RESUME_EXTRACTION_TIMEOUT
+    counting = {}
+    if settings.RESUME_PDF_PAGES_PER_TASK:
+        counting = {
+            index: pool.submit(_count_pages, file_paths[index])
+            for index in indexes if _kind(file_paths[index]) == 'pdf'
+        }
+
+    submitted = {}
+    for index in indexes:
+        page_count = None
+        if index in counting:
+            try:
+                page_count = _result(counting[index], index, time.monotonic() + timeout)
+            except _Stalled:
+                raise
+            except Exception as e:
+                logger.error(f"Error extracting text from {file_paths[index]}: {e}")
+                done.add(index)
+                continue
+        submitted[index] = [
+            pool.submit(_extract_unit, *unit) for unit in _plan(file_paths[index], page_count)
+        ]
+
+    for index, futures in submitted.items():
+        deadline = time.monotonic() + timeout
+        try:
+            parts = [_result(future, index, deadline) for future in futures]
+            results[index] = '\n'.join(part for part in parts if part).strip()
+        except _Stalled:
+            raise
+        except Exception as e:
+            logger.error(f"Error extracting text from {file_paths[index]}: {e}")
+        done.add(index)
+
+
+def extract_many(file_paths):
+    """
+    Extract text from many resumes on the calling thread's process pool
+
+    Work fans out across files and, for large PDFs, across page ranges.
+    A file that exceeds RESUME_EXTRACTION_TIMEOUT or kills its worker
+    (e.g. by hitting the memory limit) yields None and the pool is recycled
+    so it cannot stall the files queued behind it. Files that fail to parse
+    also yield None, unlike files without text, which yield ''.
+
+    Args:
+        file_paths: List of resume file paths
+
+    Returns:
+        List of extracted texts, or None for failures, aligned with file_paths
+    """
+    if settings.RESUME_EXTRACTION_WORKERS <= 0:
+        return [_extract_in_process(file_path) for file_path in file_paths]
+
+    results = [None] * len(file_paths)
+    done = set()
+    pending = list(range(len(file_paths)))
+    # A crash breaks every in-flight future, so the file being waited on
+    # is not necessarily the culprit; give it one more try on a fresh pool
+    retried = set()
+
+    while pending:
+        try:
+            _extract_batch(_get_pool(), file_paths, pending, results, done)
+            break
+        except _Stalled as stalled:
+            _reset_pool()
+            index = stalled.index
+            # Resubmit the unfinished files on a fresh pool
+            pending = [other for other in pending if other not in done and other != index]
+            if isinstance(stalled.error, BrokenProcessPool) and index not in retried:
+                retried.add(index)
+                pending.insert(0, index)
+            else:
+                reason = 'timed out' if isinstance(stalled.error, FutureTimeoutError) else 'crashed its worker'
+                logger.error(f"Extraction of {file_paths[index]} {reason}, skipping it")
+
+    return results
@@ -1,5 +1,8 @@
+import os
 from django import forms
+from django.conf import settings
 from .models import Application
+from .uploadhandlers import MAGIC_LENGTH, sniff_file_type
 
 
 class ApplicationForm(forms.ModelForm):
@@ -21,16 +24,33 @@ class ApplicationForm(forms.ModelForm):
             }),
         }
 
+    def __init__(self, *args, upload_error=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if upload_error:
+            # The upload handler dropped the file; explain why instead of "required"
+            self.fields['resume'].error_messages['required'] = upload_error
+
     def clean_resume(self):
         resume = self.cleaned_data.get('resume')
         if resume:
             # Check file extension
-            if not resume.name.lower().endswith(('.pdf', '.docx')):
+            extension = os.path.splitext(resume.name)[1].lower()
+            if extension not in ('.pdf', '.docx'):
                 raise forms.ValidationError('Only PDF and DOCX files are allowed.')
             
-            # Check file size (10MB limit)
-            if resume.size > 10 * 1024 * 1024:
-                raise forms.ValidationError('File size must be under 10MB.')
+            # Check file size
+            if resume.size > settings.RESUME_MAX_UPLOAD_SIZE:
+                limit_mb = settings.RESUME_MAX_UPLOAD_SIZE // (1024 * 1024)
+                raise forms.ValidationError(f'File size must be under {limit_mb}MB.')
+            
+            # Check the content matches the extension
+            detected_type = getattr(resume, 'detected_type', None)
+            if detected_type is None:
+                head = resume.read(MAGIC_LENGTH)
+                resume.seek(0)
+                detected_type = sniff_file_type(head)
+            if extension != f'.{detected_type}':
+                raise forms.ValidationError('Only PDF and DOCX files are allowed.')
         
         return resume
 
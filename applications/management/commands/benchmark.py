@@ -0,0 +1,299 @@
+import itertools
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+from docx import Document
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from applications.models import Application
+from applications.scoring import Bm25Scorer
+from applications.services import (
+    calculate_match_score, extract_text_from_docx, extract_text_from_pdf, get_term_ids,
+    pack_term_counts, rerank_applications,
+)
+from jobs.models import Job
+
+# Skills that make up job descriptions, followed by a long tail of filler terms
+SKILLS = (
+    'python django postgresql rest api docker kubernetes aws react typescript java '
+    'spring kotlin golang rust terraform ansible linux networking security sql '
+    'machine learning data engineering airflow spark pandas numpy statistics '
+    'leadership mentoring agile scrum communication product design testing'
+).split()
+FILLER_TERMS = 2000
+LINES_PER_PAGE = 45
+WORDS_PER_LINE = 12
+
+
+def make_pdf(pages):
+    """
+    Minimal text-only PDF
+
+    Args:
+        pages: List of pages, each a list of lines without parentheses or backslashes
+
+    Returns:
+        PDF file contents as bytes
+    """
+    font = 3 + 2 * len(pages)
+    kids = ' '.join(f'{3 + 2 * index} 0 R' for index in range(len(pages)))
+    objects = [
+        '<< /Type /Catalog /Pages 2 0 R >>',
+        f'<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>',
+    ]
+    for index, lines in enumerate(pages):
+        stream = 'BT /F1 10 Tf 12 TL 50 750 Td ' + ' T* '.join(f'({line}) Tj' for line in lines) + ' ET'
+        objects.append(
+            f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+            f'/Resources << /Font << /F1 {font} 0 R >> >> /Contents {4 + 2 * index} 0 R >>'
+        )
+        objects.append(f'<< /Length {len(stream)} >>\nstream\n{stream}\nendstream')
+    objects.append('<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>')
+
+    output = b'%PDF-1.4\n'
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += f'{number} 0 obj\n{body}\nendobj\n'.encode()
+    xref = len(output)
+    output += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode()
+    output += b''.join(f'{offset:010d} 00000 n \n'.encode() for offset in offsets)
+    output += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode()
+    return output
+
+
+def summarize(timings, items, peak_memory):
+    """
+    Latency percentiles and throughput of one stage
+
+    Args:
+        timings: Seconds per run
+        items: Items processed per run (files, pairs or applications)
+        peak_memory: Peak traced allocation of one run, in bytes
+    """
+    milliseconds = np.array(timings) * 1000
+    return {
+        'runs': len(timings),
+        'items_per_run': items,
+        'p50_ms': round(float(np.percentile(milliseconds, 50)), 3),
+        'p95_ms': round(float(np.percentile(milliseconds, 95)), 3),
+        'p99_ms': round(float(np.percentile(milliseconds, 99)), 3),
+        'max_ms': round(float(milliseconds.max()), 3),
+        'items_per_second': round(items * len(timings) / max(sum(timings), 1e-9), 1),
+        'peak_memory_mb': round(peak_memory / 2**20, 2),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Benchmark resume extraction, match scoring and reranking on synthetic data'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            default='100,1000,10000,100000',
+            help='Comma-separated applicants per job to rerank (default: 100,1000,10000,100000)',
+        )
+        parser.add_argument(
+            '--pages',
+            default='1,3,10',
+            help='Comma-separated page counts of the PDF and DOCX fixtures (default: 1,3,10)',
+        )
+        parser.add_argument('--runs', type=int, default=3, help='Reranks per size (default: 3)')
+        parser.add_argument(
+            '--samples',
+            type=int,
+            default=20,
+            help='Extractions per fixture and match scores per run (default: 20)',
+        )
+        parser.add_argument(
+            '--scorer',
+            default=settings.MATCH_SCORER_DEFAULT,
+            choices=sorted(settings.MATCH_SCORERS),
+            help='Scoring backend of the benchmark jobs',
+        )
+        parser.add_argument(
+            '--output',
+            help='JSON results file (default: var/benchmarks/benchmark-<timestamp>.json)',
+        )
+        parser.add_argument('--compare', help='Earlier JSON results to compare against')
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.2,
+            help='Report stages whose p50 grew by more than this fraction (default: 0.2)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',')]
+            pages = [int(count) for count in options['pages'].split(',')]
+        except ValueError:
+            raise CommandError('--sizes and --pages take comma-separated integers')
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as results:
+                baseline = json.load(results)
+
+        # Fixed seed: every run benchmarks the same documents
+        self.rng = np.random.default_rng(42)
+        vocabulary = SKILLS + [f'term{index:04d}' for index in range(FILLER_TERMS)]
+        # Zipf-like: a few terms are common, most are rare
+        weights = 1 / np.arange(1, len(vocabulary) + 1)
+        self.vocabulary = np.array(vocabulary)
+        self.weights = weights / weights.sum()
+
+        stages = {}
+        self.benchmark_extraction(stages, pages, options['samples'])
+        self.benchmark_match_score(stages, options['samples'])
+        with transaction.atomic():
+            self.benchmark_rerank(stages, sizes, options['runs'], options['scorer'])
+            # Never keep synthetic data
+            transaction.set_rollback(True)
+
+        results = {
+            'created_at': timezone.now().isoformat(),
+            'environment': {
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpus': os.cpu_count(),
+                'database': connection.vendor,
+                'numpy': np.__version__,
+            },
+            'options': {
+                key: options[key] for key in ('sizes', 'pages', 'runs', 'samples', 'scorer')
+            },
+            'stages': stages,
+        }
+        output = options['output'] or os.path.join(
+            settings.BASE_DIR, 'var', 'benchmarks',
+            f'benchmark-{timezone.now():%Y%m%d-%H%M%S}.json',
+        )
+        os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+        with open(output, 'w') as results_file:
+            json.dump(results, results_file, indent=2)
+
+        self.report(stages, baseline, options['tolerance'])
+        self.stdout.write(self.style.SUCCESS(f'Results written to {output}'))
+
+    def words(self, count):
+        return self.rng.choice(self.vocabulary, size=count, p=self.weights)
+
+    def lines(self, count):
+        words = self.words(count * WORDS_PER_LINE).reshape(count, WORDS_PER_LINE)
+        return [' '.join(line) for line in words]
+
+    def measure(self, stages, name, function, runs, items):
+        """Time `runs` calls of function, then trace one more for peak memory"""
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - start)
+
+        # Tracing slows allocation down, so it never overlaps the timed runs
+        tracemalloc.start()
+        try:
+            function()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        stages[name] = summarize(timings, items, peak)
+        self.stdout.write(
+            f'{name}: p50 {stages[name]["p50_ms"]:.1f} ms, p95 {stages[name]["p95_ms"]:.1f} ms, '
+            f'{stages[name]["items_per_second"]:.1f} items/s, peak {stages[name]["peak_memory_mb"]:.1f} MB'
+        )
+
+    def benchmark_extraction(self, stages, pages, samples):
+        with tempfile.TemporaryDirectory() as directory:
+            for count in pages:
+                content = [self.lines(LINES_PER_PAGE) for _ in range(count)]
+
+                pdf_path = os.path.join(directory, f'resume-{count}.pdf')
+                with open(pdf_path, 'wb') as pdf:
+                    pdf.write(make_pdf(content))
+                self.measure(
+                    stages, f'extract_pdf/pages={count}',
+                    lambda: extract_text_from_pdf(pdf_path), samples, 1,
+                )
+
+                docx_path = os.path.join(directory, f'resume-{count}.docx')
+                document = Document()
+                for lines in content:
+                    for line in lines:
+                        document.add_paragraph(line)
+                    document.add_page_break()
+                document.save(docx_path)
+                self.measure(
+                    stages, f'extract_docx/pages={count}',
+                    lambda: extract_text_from_docx(docx_path), samples, 1,
+                )
+
+    def benchmark_match_score(self, stages, samples):
+        description = ' '.join(self.words(80))
+        resumes = itertools.cycle([' '.join(self.lines(LINES_PER_PAGE)) for _ in range(samples)])
+        self.measure(
+            stages, 'calculate_match_score',
+            lambda: calculate_match_score(description, next(resumes)), samples, 1,
+        )
+
+    def benchmark_rerank(self, stages, sizes, runs, scorer):
+        term_ids = get_term_ids(self.vocabulary.tolist())
+        vocabulary_ids = np.array([term_ids[term] for term in self.vocabulary])
+
+        for size in sizes:
+            self.stdout.write(f'Seeding {size} synthetic applications...')
+            job = Job.objects.create(
+                title=f'Benchmark {size}',
+                description=' '.join(self.words(80)),
+                scoring_backend=scorer,
+            )
+            applications = []
+            for index in range(size):
+                # Resumes of 150 to 1,200 words, like 1 to 3 pages
+                words = self.rng.choice(len(self.vocabulary), size=self.rng.integers(150, 1200), p=self.weights)
+                counts = np.bincount(words, minlength=len(self.vocabulary))
+                present = np.flatnonzero(counts)
+                applications.append(Application(
+                    job=job,
+                    name=f'Candidate {index}',
+                    email=f'candidate{index}@example.com',
+                    resume='resumes/benchmark.pdf',
+                    # Reranks read only the term counts
+                    resume_text='synthetic',
+                    term_counts=pack_term_counts(dict(zip(vocabulary_ids[present].tolist(), counts[present].tolist()))),
+                ))
+            Application.objects.bulk_create(applications, batch_size=1000)
+            self.measure(stages, f'rerank/applicants={size}', lambda: rerank_applications(job), runs, size)
+
+            # BM25 score_many alone: statistics refit plus scoring, no DB reads or writes of scores
+            loaded = list(Application.objects.filter(job=job).only('pk', 'term_counts').order_by())
+            self.measure(
+                stages, f'bm25/applicants={size}',
+                lambda: Bm25Scorer().score_many(job, loaded), runs, size,
+            )
+
+    def report(self, stages, baseline, tolerance):
+        if baseline is None:
+            return
+        self.stdout.write(f'Compared with {baseline.get("created_at", "baseline")}:')
+        regressions = 0
+        for name, stage in stages.items():
+            before = baseline.get('stages', {}).get(name)
+            if not before or not before['p50_ms']:
+                continue
+            ratio = stage['p50_ms'] / before['p50_ms']
+            line = f'  {name}: p50 {before["p50_ms"]:.1f} -> {stage["p50_ms"]:.1f} ms ({ratio:.2f}x)'
+            if ratio > 1 + tolerance:
+                regressions += 1
+                self.stdout.write(self.style.WARNING(line))
+            else:
+                self.stdout.write(line)
+        if regressions:
+            self.stdout.write(self.style.WARNING(f'{regressions} stages slower by more than {tolerance:.0%}'))
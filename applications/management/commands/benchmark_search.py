@@ -0,0 +1,88 @@
+import random
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from applications.models import Application
+from applications.search import search_applications
+from jobs.models import Job
+
+# Documented latency targets for candidate search (see README)
+TARGET_P50_MS = 20
+TARGET_P95_MS = 50
+
+VOCABULARY = (
+    'python django postgresql rest api docker kubernetes aws react typescript java '
+    'spring kotlin golang rust terraform ansible linux networking security sql '
+    'machine learning data engineering airflow spark pandas numpy statistics '
+    'leadership mentoring agile scrum communication product design testing'
+).split()
+
+DEFAULT_QUERIES = [
+    'python',
+    'django postgresql',
+    '"machine learning"',
+    'kubernetes terraform aws',
+    '"data engineering" spark',
+]
+
+
+class Command(BaseCommand):
+    help = 'Measure candidate search latency against the documented targets'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Generate this many synthetic resumes first (rolled back afterwards)',
+        )
+        parser.add_argument('--runs', type=int, default=20, help='Runs per query (default: 20)')
+        parser.add_argument('--query', action='append', help='Query to benchmark (repeatable)')
+
+    def handle(self, *args, **options):
+        queries = options['query'] or DEFAULT_QUERIES
+        with transaction.atomic():
+            if options['seed']:
+                self.seed(options['seed'])
+            timings = self.measure(queries, options['runs'])
+            # Never keep synthetic data
+            transaction.set_rollback(True)
+
+        timings.sort()
+        p50 = statistics.median(timings)
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        self.stdout.write(
+            f'{len(timings)} searches: p50 {p50:.1f} ms, p95 {p95:.1f} ms, max {timings[-1]:.1f} ms'
+        )
+        if p50 <= TARGET_P50_MS and p95 <= TARGET_P95_MS:
+            self.stdout.write(self.style.SUCCESS(
+                f'Within targets (p50 <= {TARGET_P50_MS} ms, p95 <= {TARGET_P95_MS} ms)'
+            ))
+        else:
+            self.stdout.write(self.style.WARNING(
+                f'Outside targets (p50 <= {TARGET_P50_MS} ms, p95 <= {TARGET_P95_MS} ms)'
+            ))
+
+    def seed(self, count):
+        rng = random.Random(42)
+        job = Job.objects.create(title='Search benchmark', description='benchmark')
+        self.stdout.write(f'Seeding {count} synthetic resumes...')
+        for index in range(count):
+            words = rng.choices(VOCABULARY, k=300)
+            Application.objects.create(
+                job=job,
+                name=f'Candidate {index}',
+                email=f'candidate{index}@example.com',
+                resume='resumes/benchmark.pdf',
+                resume_text=' '.join(words),
+            )
+
+    def measure(self, queries, runs):
+        timings = []
+        for query in queries:
+            for _ in range(runs):
+                start = time.perf_counter()
+                search_applications(query)
+                timings.append((time.perf_counter() - start) * 1000)
+        return timings
@@ -0,0 +1,77 @@
+import re
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from applications.models import Application, QueuedTask
+from applications.pagination import RANKING_ORDER, rows_after
+from jobs.models import Job
+
+# Plan lines that mean a full table scan
+SEQUENTIAL_SCAN_PATTERNS = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    # SQLite: "SCAN table" without "USING [COVERING] INDEX"
+    'sqlite': re.compile(r'\bSCAN (\w+)\b(?! USING)'),
+}
+
+
+def hot_path_queries(job_id):
+    """The query shapes the ranking and filtering views depend on"""
+    now = timezone.now()
+    ranked = Application.objects.filter(job_id=job_id).listing()
+    return {
+        'job ranking, first page': ranked.order_by(*RANKING_ORDER)[:51],
+        'job ranking, deep page': (
+            ranked.filter(rows_after((50.0, now, 2 ** 31))).order_by(*RANKING_ORDER)[:51]
+        ),
+        'job ranking by status': ranked.filter(status='NEW').order_by(*RANKING_ORDER)[:51],
+        'job top-N by rank': ranked.top(10),
+        'recent applications': Application.objects.listing().order_by('-created_at')[:100],
+        'queue claim': (
+            QueuedTask.objects
+            .filter(status='PENDING', run_after__lte=now)
+            .values_list('pk', flat=True)[:1]
+        ),
+    }
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the hot-path queries and fail if any uses a sequential scan'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verbose-plans',
+            action='store_true',
+            help='Print the full plan of every query',
+        )
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        pattern = SEQUENTIAL_SCAN_PATTERNS.get(vendor)
+        if pattern is None:
+            raise CommandError(f'Unsupported database backend: {vendor}')
+
+        job_id = Job.objects.values_list('pk', flat=True).first() or 1
+        regressions = []
+
+        with transaction.atomic():
+            if vendor == 'postgresql':
+                # Small tables make seq scans cheapest; ask whether an index is usable
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+
+            for name, queryset in hot_path_queries(job_id).items():
+                plan = queryset.explain()
+                scans = pattern.findall(plan)
+                if scans:
+                    regressions.append(name)
+                    self.stdout.write(self.style.ERROR(
+                        f'✗ {name}: sequential scan on {", ".join(sorted(set(scans)))}'
+                    ))
+                else:
+                    self.stdout.write(self.style.SUCCESS(f'✓ {name}'))
+                if options['verbose_plans'] or scans:
+                    self.stdout.write(plan)
+
+        if regressions:
+            raise CommandError(f'{len(regressions)} hot-path queries regressed to sequential scans')
+        self.stdout.write(self.style.SUCCESS('All hot-path queries use indexes'))
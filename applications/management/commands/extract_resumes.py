@@ -0,0 +1,103 @@
+from django.core.management.base import BaseCommand
+from collections import Counter
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from applications.cache import invalidate
+from applications.extraction import extract_many
+from applications.models import Application, ResumeBlob
+from applications.search import index_application
+from applications.services import index_resume, rerank_applications
+from jobs.models import Job
+
+
+class Command(BaseCommand):
+    help = 'Backfill resume text for applications using the extraction process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--job-id',
+            type=int,
+            help='Only process applications for a specific job ID',
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Re-extract every resume, not only those without text',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Resumes extracted and saved per batch (default: 100)',
+        )
+
+    def handle(self, *args, **options):
+        applications = Application.objects.only('pk', 'job_id', 'resume', 'resume_blob_id').order_by('pk')
+        if options['job_id']:
+            applications = applications.filter(job_id=options['job_id'])
+        if not options['all']:
+            applications = applications.filter(resume_text='')
+
+        pks = list(applications.values_list('pk', flat=True))
+        total = len(pks)
+        batch_size = max(1, options['batch_size'])
+        self.stdout.write(f'Extracting {total} resumes...')
+
+        job_ids = set()
+        failed = 0
+        for start in range(0, total, batch_size):
+            batch = list(applications.filter(pk__in=pks[start:start + batch_size]))
+            texts = extract_many([application.resume.path for application in batch])
+            # Failed files keep their current text (and blob state) for the next run
+            extracted = []
+            for application, text in zip(batch, texts):
+                if text is None:
+                    failed += 1
+                else:
+                    extracted.append((application, text))
+            batch = [application for application, _ in extracted]
+            had_text = set(
+                Application.objects.filter(pk__in=[application.pk for application in batch])
+                .exclude(resume_text='')
+                .values_list('pk', flat=True)
+            )
+            blobs = {}
+            for application, text in extracted:
+                application.resume_text = text
+                index_resume(application, save=False)
+                job_ids.add(application.job_id)
+                if application.resume_blob_id:
+                    blobs[application.resume_blob_id] = ResumeBlob(
+                        pk=application.resume_blob_id,
+                        text=text,
+                        term_counts=application.term_counts,
+                        extracted=True,
+                    )
+            with transaction.atomic():
+                Application.objects.bulk_update(batch, ['resume_text', 'term_counts'])
+                ResumeBlob.objects.bulk_update(
+                    list(blobs.values()), ['text', 'term_counts', 'extracted']
+                )
+                # bulk_update sends no post_save, so do what its signals would
+                scored = Counter()
+                for application in batch:
+                    index_application(application)
+                    scored[application.job_id] += bool(application.resume_text) - (application.pk in had_text)
+                for job_id, delta in scored.items():
+                    if delta:
+                        Job.objects.filter(pk=job_id).update(
+                            scored_count=Greatest(F('scored_count') + delta, 0)
+                        )
+                if batch:
+                    invalidate('applications')
+            self.stdout.write(f'Extracted {min(start + batch_size, total)}/{total}')
+
+        for job_id in sorted(job_ids):
+            rerank_applications(Job.objects.get(pk=job_id))
+
+        if failed:
+            self.stdout.write(self.style.WARNING(f'{failed} resumes could not be extracted'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully extracted {total - failed} resumes and reranked {len(job_ids)} jobs'
+        ))
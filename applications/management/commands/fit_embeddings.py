@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from jobs.models import Job
+from applications.embeddings import fit_embedding_model, get_ivf_index
+from applications.scoring import SemanticScorer, get_scorer
+from applications.services import rerank_applications
+
+
+class Command(BaseCommand):
+    help = 'Refit the LSA embedding model, rebuild its ANN index and rerank semantic jobs'
+
+    def handle(self, *args, **options):
+        model = fit_embedding_model()
+        if model is None:
+            raise CommandError('Not enough extracted resumes to fit an embedding model')
+        self.stdout.write(f'Fitted {model.dimensions}-dimensional embedding model')
+
+        index = get_ivf_index(model, rebuild=True)
+        self.stdout.write(f'Indexed {len(index)} resumes in {len(index.ids)} lists')
+
+        jobs = [
+            job for job in Job.objects.all()
+            if isinstance(get_scorer(job.scoring_backend), SemanticScorer)
+        ]
+        for job in jobs:
+            rerank_applications(job)
+        self.stdout.write(self.style.SUCCESS(f'Reranked {len(jobs)} semantic jobs'))
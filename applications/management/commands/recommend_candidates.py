@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+from jobs.models import Job
+from applications.recommendations import get_index, recommend_candidates
+
+
+class Command(BaseCommand):
+    help = 'List the best-fitting applicants from other jobs for a job'
+
+    def add_arguments(self, parser):
+        parser.add_argument('job_id', type=int, nargs='?', help='Job to recommend candidates for')
+        parser.add_argument('--limit', type=int, help='Number of candidates (default: RECOMMENDATIONS_LIMIT)')
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Rebuild the recommendation index from the database first',
+        )
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            index = get_index(rebuild=True)
+            self.stdout.write(f'Rebuilt recommendation index over {len(index)} applications')
+
+        job_id = options['job_id']
+        if job_id is None:
+            if not options['rebuild']:
+                raise CommandError('Give a job id or --rebuild')
+            return
+
+        try:
+            job = Job.objects.get(pk=job_id)
+        except Job.DoesNotExist:
+            raise CommandError(f'Job {job_id} not found')
+
+        candidates = recommend_candidates(job, limit=options['limit'])
+        self.stdout.write(f'Top {len(candidates)} candidates for job: {job.title}')
+        for position, application in enumerate(candidates, 1):
+            self.stdout.write(
+                f'{position:>3}. {application.recommendation_score:6.2f}%  '
+                f'{application.name} <{application.email}> (applied to: {application.job.title})'
+            )
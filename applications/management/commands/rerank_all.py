@@ -1,9 +1,38 @@
-from django.core.management.base import BaseCommand
-from django.db import transaction
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
 from jobs.models import Job
 from applications.services import rerank_applications
 
 
+def _init_worker():
+    """Pool worker setup; needed when workers are spawned rather than forked"""
+    django.setup()
+
+
+def rerank_job(job_id):
+    """Rerank one job in its own transaction; returns (job_id, applications, seconds)"""
+    start = time.perf_counter()
+    job = Job.objects.get(pk=job_id)
+    count = rerank_applications(job)
+    return job_id, count, time.perf_counter() - start
+
+
+def parse_shard(value):
+    """Parse 'i/n' into (i, n) with 0 <= i < n"""
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise CommandError(f'Invalid shard {value!r}, expected i/n (e.g. 0/4)')
+    if count < 1 or not 0 <= index < count:
+        raise CommandError(f'Invalid shard {value!r}, need 0 <= i < n')
+    return index, count
+
+
 class Command(BaseCommand):
     help = 'Rerank all applications for all jobs'
 
@@ -13,11 +42,30 @@ class Command(BaseCommand):
             type=int,
             help='Rerank only applications for specific job ID',
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Rerank jobs in this many processes (default: 1, in-process)',
+        )
+        parser.add_argument(
+            '--shard',
+            default='0/1',
+            help='Only rerank jobs with id %% n == i, given as i/n, to split a run across hosts',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='File recording finished jobs so a rerun resumes (default: var/rerank_all-<i>of<n>.checkpoint)',
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Ignore an existing checkpoint and rerank every job again',
+        )
 
-    @transaction.atomic
     def handle(self, *args, **options):
         job_id = options.get('job_id')
-        
+
         if job_id:
             try:
                 job = Job.objects.get(pk=job_id)
@@ -26,13 +74,85 @@ class Command(BaseCommand):
                 self.stdout.write(self.style.SUCCESS(f'Successfully reranked job {job_id}'))
             except Job.DoesNotExist:
                 self.stdout.write(self.style.ERROR(f'Job {job_id} not found'))
-        else:
-            jobs = Job.objects.all()
-            total = jobs.count()
-            self.stdout.write(f'Reranking applications for {total} jobs...')
-            
-            for idx, job in enumerate(jobs, 1):
-                self.stdout.write(f'Processing job {idx}/{total}: {job.title}')
-                rerank_applications(job)
-            
-            self.stdout.write(self.style.SUCCESS(f'Successfully reranked all {total} jobs'))
\ No newline at end of file
+            return
+
+        shard, shards = parse_shard(options['shard'])
+        checkpoint = options['checkpoint'] or os.path.join(
+            settings.BASE_DIR, 'var', f'rerank_all-{shard}of{shards}.checkpoint'
+        )
+        if options['restart'] and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        done = self.read_checkpoint(checkpoint)
+
+        job_ids = [
+            pk for pk in Job.objects.order_by('pk').values_list('pk', flat=True)
+            if pk % shards == shard and pk not in done
+        ]
+        total = len(job_ids)
+        if done:
+            self.stdout.write(f'Resuming from {checkpoint}: {len(done)} jobs already reranked')
+        self.stdout.write(f'Reranking applications for {total} jobs (shard {shard}/{shards})...')
+
+        workers = options['workers']
+        if workers > 1 and connection.vendor == 'sqlite':
+            # SQLite allows one writer at a time; parallel reranks only fail with "database is locked"
+            self.stdout.write(self.style.WARNING('SQLite does not support concurrent writers, using 1 worker'))
+            workers = 1
+
+        os.makedirs(os.path.dirname(checkpoint) or '.', exist_ok=True)
+        start = time.perf_counter()
+        applications = 0
+        failed = []
+        with open(checkpoint, 'a') as log:
+            for position, (pk, result) in enumerate(self.run(job_ids, workers), 1):
+                if isinstance(result, Exception):
+                    failed.append(pk)
+                    self.stdout.write(self.style.ERROR(f'Job {pk} failed: {result}'))
+                    continue
+                _, count, seconds = result
+                applications += count
+                log.write(f'{pk}\n')
+                log.flush()
+                self.stdout.write(
+                    f'Processed job {position}/{total}: #{pk} ({count} applications, {seconds:.2f}s)'
+                )
+
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        reranked = total - len(failed)
+        self.stdout.write(
+            f'{reranked} jobs and {applications} applications in {elapsed:.1f}s '
+            f'({reranked / elapsed:.1f} jobs/s, {applications / elapsed:.0f} applications/s)'
+        )
+        if failed:
+            raise CommandError(
+                f'{len(failed)} jobs failed: {", ".join(map(str, failed))}; rerun to retry them'
+            )
+        os.remove(checkpoint)
+        self.stdout.write(self.style.SUCCESS(f'Successfully reranked all {total} jobs'))
+
+    def read_checkpoint(self, path):
+        try:
+            with open(path) as checkpoint:
+                return {int(line) for line in checkpoint if line.strip()}
+        except FileNotFoundError:
+            return set()
+
+    def run(self, job_ids, workers):
+        """Yield (job_id, result or exception) as jobs finish"""
+        if workers <= 1:
+            for pk in job_ids:
+                try:
+                    yield pk, rerank_job(pk)
+                except Exception as e:
+                    yield pk, e
+            return
+
+        # Closed before forking so every worker opens its own connection
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            futures = {pool.submit(rerank_job, pk): pk for pk in job_ids}
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result()
+                except Exception as e:
+                    yield futures[future], e
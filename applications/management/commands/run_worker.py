@@ -0,0 +1,84 @@
+import threading
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from applications import metrics
+from applications.queue import claim_next, run_task
+
+
+class Command(BaseCommand):
+    help = 'Process background tasks from the database queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=2,
+            help='Number of worker threads (default: 2)',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help='Seconds to wait when the queue is empty (default: 1)',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit once the queue is empty instead of polling forever',
+        )
+        parser.add_argument(
+            '--metrics-port',
+            type=int,
+            help='Serve Prometheus metrics on this port (needs METRICS_ENABLED; '
+                 'METRICS_TOKEN or METRICS_ALLOWED_IPS to scrape)',
+        )
+
+    def handle(self, *args, **options):
+        concurrency = max(1, options['concurrency'])
+        poll_interval = options['poll_interval']
+        once = options['once']
+        stop = threading.Event()
+        processed = [0] * concurrency
+
+        def work(slot):
+            # Each thread gets its own database connection
+            try:
+                while not stop.is_set():
+                    close_old_connections()
+                    queued = claim_next()
+                    if queued is None:
+                        if once:
+                            break
+                        stop.wait(poll_interval)
+                        continue
+                    run_task(queued)
+                    processed[slot] += 1
+            finally:
+                close_old_connections()
+
+        if options['metrics_port']:
+            if metrics.enabled():
+                metrics.serve(options['metrics_port'])
+                self.stdout.write(f'Serving metrics on port {options["metrics_port"]}')
+            else:
+                self.stdout.write(self.style.WARNING('METRICS_ENABLED is off, not serving metrics'))
+
+        self.stdout.write(f'Starting {concurrency} worker thread(s)...')
+        threads = [
+            threading.Thread(target=work, args=(slot,), daemon=True)
+            for slot in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            while any(thread.is_alive() for thread in threads):
+                time.sleep(0.2)
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping workers after their current task...')
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+        self.stdout.write(self.style.SUCCESS(f'Processed {sum(processed)} tasks'))
@@ -0,0 +1,379 @@
+"""
+Metrics in the Prometheus text format, aggregated across processes
+
+Counters and histograms are recorded in the memory of each process. With
+METRICS_DIR set (the default), every process also writes its values to its
+own file there every METRICS_FLUSH_INTERVAL seconds, and rendering sums the
+files of all processes: any gunicorn worker's /metrics, or a queue worker's
+`run_worker --metrics-port`, serves the totals of every process on the host.
+Without it each process only serves its own values, which is only correct
+with a single process. Recording is a no-op unless METRICS_ENABLED is set,
+so instrumented hot paths pay one settings lookup when it is off.
+"""
+import atexit
+import bisect
+import contextlib
+import hmac
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from django.conf import settings
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; upper buckets cover slow PDF extractions and large reranks
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+REGISTRY = []
+
+_DISABLED = contextlib.nullcontext()
+
+# This process's file in METRICS_DIR; the start time keeps it apart from
+# files of earlier processes that had the same pid
+_process_file = f'{os.getpid()}-{time.time_ns()}.json'
+_flusher = None
+_flusher_lock = threading.Lock()
+
+
+def enabled():
+    return settings.METRICS_ENABLED
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Metric:
+    """A named metric with a fixed set of label names"""
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        return tuple(labels[name] for name in self.labelnames)
+
+    def _record(self):
+        if _flusher is None and settings.METRICS_DIR:
+            _start_flusher()
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def snapshot(self):
+        """Copy of this process's values, keyed by label values"""
+        raise NotImplementedError
+
+    def merge(self, into, key, value):
+        """Add one process's value for key to into"""
+        raise NotImplementedError
+
+    def samples(self, values):
+        """(suffix, label values, extra label, value) tuples"""
+        raise NotImplementedError
+
+    def render(self, values):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for suffix, labels, extra, value in self.samples(values):
+            lines.append(f'{self.name}{suffix}{_format_labels(self.labelnames, labels, extra)} {value}')
+        return lines
+
+
+class Counter(Metric):
+    """Monotonically increasing total"""
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        if not settings.METRICS_ENABLED:
+            return
+        self._record()
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._values)
+
+    def merge(self, into, key, value):
+        into[key] = into.get(key, 0) + value
+
+    def samples(self, values):
+        return [('', key, '', value) for key, value in sorted(values.items())]
+
+
+class _Timer:
+    __slots__ = ('histogram', 'key', 'start')
+
+    def __init__(self, histogram, key):
+        self.histogram = histogram
+        self.key = key
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram._observe(self.key, time.perf_counter() - self.start)
+
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets"""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _observe(self, key, value):
+        self._record()
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket counts (last one is +Inf), sum, count
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][bisect.bisect_left(self.buckets, value)] += 1
+            state[1] += value
+            state[2] += 1
+
+    def observe(self, value, **labels):
+        if settings.METRICS_ENABLED:
+            self._observe(self._key(labels), value)
+
+    def time(self, **labels):
+        """Context manager observing the seconds spent in its block"""
+        if not settings.METRICS_ENABLED:
+            return _DISABLED
+        return _Timer(self, self._key(labels))
+
+    def count(self, **labels):
+        state = self._values.get(self._key(labels))
+        return state[2] if state else 0
+
+    def snapshot(self):
+        with self._lock:
+            return {key: [list(counts), total, count] for key, (counts, total, count) in self._values.items()}
+
+    def merge(self, into, key, value):
+        counts, total, count = value
+        state = into.get(key)
+        if state is None or len(state[0]) != len(counts):
+            # Also replaces values written with other buckets by an older release
+            into[key] = [list(counts), total, count]
+            return
+        state[0] = [mine + theirs for mine, theirs in zip(state[0], counts)]
+        state[1] += total
+        state[2] += count
+
+    def samples(self, values):
+        samples = []
+        for key, (counts, total, count) in sorted(values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(float(bound))
+                samples.append(('_bucket', key, f'le="{le}"', cumulative))
+            samples.append(('_sum', key, '', total))
+            samples.append(('_count', key, '', count))
+        return samples
+
+
+STAGE_SECONDS = Histogram(
+    'ats_stage_duration_seconds',
+    'Seconds spent in each stage of a hot path',
+    ('operation', 'stage'),
+)
+APPLICATIONS_SUBMITTED = Counter(
+    'ats_applications_submitted_total',
+    'Applications saved by the apply form',
+)
+RESUMES_EXTRACTED = Counter(
+    'ats_resumes_extracted_total',
+    'Resumes whose text was extracted, parsed or from the blob cache',
+    ('source',),
+)
+RESUME_BYTES_PARSED = Counter(
+    'ats_resume_bytes_parsed_total',
+    'Bytes of resume files parsed by pdfplumber or python-docx',
+)
+APPLICATIONS_SCORED = Counter(
+    'ats_applications_scored_total',
+    'Applications scored, one at a time (incremental) or by full reranks (rerank)',
+    ('mode', 'scorer'),
+)
+REQUEST_QUERIES = Histogram(
+    'ats_request_queries',
+    'SQL queries per request, for requests sampled by the query profiler',
+    ('view',),
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500),
+)
+N_PLUS_ONE_DETECTED = Counter(
+    'ats_n_plus_one_total',
+    'Query shapes repeated often enough in one request to suggest an N+1',
+    ('view',),
+)
+CACHE_REQUESTS = Counter(
+    'ats_cache_requests_total',
+    'Lookups of cached values through applications.cache, by result (hit or miss)',
+    ('name', 'result'),
+)
+
+
+def flush():
+    """Write this process's values to its file in METRICS_DIR, if set"""
+    directory = settings.METRICS_DIR
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    data = {
+        metric.name: [[list(key), value] for key, value in metric.snapshot().items()]
+        for metric in REGISTRY
+    }
+    path = os.path.join(directory, _process_file)
+    with open(f'{path}.tmp', 'w') as file:
+        json.dump(data, file)
+    # Readers never see a half-written file
+    os.replace(f'{path}.tmp', path)
+
+
+def _flush_periodically():
+    while True:
+        time.sleep(settings.METRICS_FLUSH_INTERVAL)
+        try:
+            flush()
+        except OSError:
+            pass
+
+
+def _start_flusher():
+    global _flusher
+    with _flusher_lock:
+        if _flusher is None:
+            _flusher = threading.Thread(target=_flush_periodically, daemon=True)
+            _flusher.start()
+            atexit.register(flush)
+
+
+def _after_fork():
+    """A forked child starts empty with its own file; its parent reports what it inherited"""
+    global _process_file, _flusher, _flusher_lock
+    _process_file = f'{os.getpid()}-{time.time_ns()}.json'
+    _flusher = None
+    _flusher_lock = threading.Lock()
+    for metric in REGISTRY:
+        metric._lock = threading.Lock()
+        metric._values.clear()
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+def collect():
+    """
+    Values of every metric, summed over the processes in METRICS_DIR
+
+    Returns:
+        Dict of metric name to {label values: value}; only this process's
+        values when METRICS_DIR is not set
+    """
+    if not settings.METRICS_DIR:
+        return {metric.name: metric.snapshot() for metric in REGISTRY}
+
+    flush()
+    metrics = {metric.name: metric for metric in REGISTRY}
+    merged = {name: {} for name in metrics}
+    directory = settings.METRICS_DIR
+    for file_name in os.listdir(directory):
+        if not file_name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, file_name)) as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            continue
+        for name, entries in data.items():
+            metric = metrics.get(name)
+            if metric is None:
+                continue
+            for key, value in entries:
+                metric.merge(merged[name], tuple(key), value)
+    return merged
+
+
+def render():
+    """All registered metrics in the Prometheus text exposition format"""
+    values = collect()
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render(values[metric.name]))
+    return '\n'.join(lines) + '\n'
+
+
+def authorized(remote_addr, authorization=''):
+    """
+    Whether a scrape may read the metrics
+
+    Args:
+        remote_addr: Client address, allowed if listed in METRICS_ALLOWED_IPS
+        authorization: Authorization header, allowed if `Bearer <METRICS_TOKEN>`
+
+    Returns:
+        True if either matches
+    """
+    if remote_addr in settings.METRICS_ALLOWED_IPS:
+        return True
+    token = settings.METRICS_TOKEN
+    return bool(token) and hmac.compare_digest(
+        authorization.encode('utf-8'), f'Bearer {token}'.encode('utf-8')
+    )
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if not authorized(self.client_address[0], self.headers.get('Authorization', '')):
+            self.send_error(403)
+            return
+        body = render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would flood the worker's output
+        pass
+
+
+def serve(port, address=''):
+    """
+    Serve /metrics over HTTP from a daemon thread, for processes without Django's web server
+
+    Args:
+        port: TCP port to listen on
+        address: Interface to bind (default: all)
+
+    Returns:
+        The running ThreadingHTTPServer
+    """
+    server = ThreadingHTTPServer((address, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
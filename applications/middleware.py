@@ -0,0 +1,105 @@
+import contextlib
+import logging
+import random
+import re
+import time
+from collections import Counter
+from django.conf import settings
+from django.db import connections
+from .metrics import N_PLUS_ONE_DETECTED, REQUEST_QUERIES
+
+logger = logging.getLogger(__name__)
+
+# Literals that vary between executions of the same query
+_IN_LIST = re.compile(r'\bIN \((?:%s|\?)(?:, (?:%s|\?))*\)', re.IGNORECASE)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+
+
+def query_shape(sql):
+    """
+    SQL with its literal values and IN-list lengths erased
+
+    ORM queries already carry parameters separately; this also folds
+    `IN (%s, %s, ...)` of any length and literals inlined by raw SQL.
+    """
+    sql = _IN_LIST.sub('IN (...)', sql)
+    sql = _STRING.sub('?', sql)
+    return _NUMBER.sub('?', sql)
+
+
+class QueryProfile:
+    """Queries executed during one request, recorded by a connection execute wrapper"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.count += 1
+            self.shapes[query_shape(sql)] += 1
+
+    def duplicates(self):
+        """(shape, executions) of shapes run more than once, most repeated first"""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count > 1]
+
+    def n_plus_one(self, threshold):
+        """Shapes repeated at least threshold times, the signature of a per-row query"""
+        return [(shape, count) for shape, count in self.duplicates() if count >= threshold]
+
+
+class QueryProfilerMiddleware:
+    """
+    Count a sample of requests' queries and flag N+1 patterns
+
+    A QUERY_PROFILER_SAMPLE_RATE share of requests (0 disables profiling, 1
+    profiles every request) run with an execute wrapper on every database
+    connection. The query count, DB time and repeated query shapes are logged;
+    a shape repeated QUERY_PROFILER_N_PLUS_ONE_THRESHOLD or more times is
+    logged as a suspected N+1 and counted in the metrics. With
+    QUERY_PROFILER_HEADER the summary is also returned in an X-Query-Profile
+    header. Unsampled requests only pay for one random number.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = settings.QUERY_PROFILER_SAMPLE_RATE
+        if not rate or random.random() >= rate:
+            return self.get_response(request)
+
+        profile = QueryProfile()
+        with contextlib.ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(profile))
+            response = self.get_response(request)
+
+        self.report(request, response, profile)
+        return response
+
+    def report(self, request, response, profile):
+        view = getattr(request.resolver_match, 'view_name', '') or request.path
+        duplicates = profile.duplicates()
+        REQUEST_QUERIES.observe(profile.count, view=view)
+        logger.info(
+            f"{request.method} {request.path} {response.status_code}: {profile.count} queries "
+            f"in {profile.seconds * 1000:.1f} ms, {len(duplicates)} repeated shapes"
+        )
+
+        suspects = profile.n_plus_one(settings.QUERY_PROFILER_N_PLUS_ONE_THRESHOLD)
+        for shape, count in suspects:
+            N_PLUS_ONE_DETECTED.inc(view=view)
+            logger.warning(f"Possible N+1 in {view}: {count}x {shape[:300]}")
+
+        if settings.QUERY_PROFILER_HEADER:
+            response['X-Query-Profile'] = (
+                f'queries={profile.count}; db_ms={profile.seconds * 1000:.1f}; '
+                f'repeated={len(duplicates)}; n_plus_one={len(suspects)}'
+            )
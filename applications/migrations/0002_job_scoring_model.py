@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-18 01:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jobs", "0001_initial"),
+        ("applications", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="JobScoringModel",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("description_hash", models.CharField(max_length=64)),
+                ("vocabulary", models.JSONField(default=dict)),
+                ("idf", models.BinaryField()),
+                ("job_vector", models.BinaryField()),
+                ("document_count", models.PositiveIntegerField(default=0)),
+                ("fitted_at", models.DateTimeField(auto_now=True)),
+                (
+                    "job",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="scoring_model",
+                        to="jobs.job",
+                    ),
+                ),
+            ],
+        ),
+    ]
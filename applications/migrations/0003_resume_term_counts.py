@@ -0,0 +1,46 @@
+# Generated by Django 4.2.7 on 2026-10-18 01:56
+
+from django.db import migrations, models
+
+
+def drop_text_vocabulary_models(apps, schema_editor):
+    # Models fitted on term strings are refitted lazily from term ids
+    apps.get_model("applications", "JobScoringModel").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("applications", "0002_job_scoring_model"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Term",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("text", models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="application",
+            name="term_counts",
+            field=models.BinaryField(blank=True, default=b""),
+        ),
+        migrations.AlterField(
+            model_name="jobscoringmodel",
+            name="vocabulary",
+            field=models.JSONField(default=list),
+        ),
+        migrations.RunPython(
+            drop_text_vocabulary_models, migrations.RunPython.noop
+        ),
+    ]
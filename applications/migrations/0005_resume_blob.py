@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-18 01:59
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("applications", "0004_queued_task"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ResumeBlob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("sha256", models.CharField(max_length=64, unique=True)),
+                ("file", models.FileField(upload_to="resumes/")),
+                ("size", models.PositiveIntegerField(default=0)),
+                ("text", models.TextField(blank=True)),
+                ("term_counts", models.BinaryField(blank=True, default=b"")),
+                ("extracted", models.BooleanField(default=False)),
+                ("ref_count", models.PositiveIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="application",
+            name="resume_blob",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="applications",
+                to="applications.resumeblob",
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("applications", "0005_resume_blob"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="application",
+            index=models.Index(
+                fields=["job", "-match_score", "-created_at", "-id"],
+                name="application_job_rank_idx",
+            ),
+        ),
+    ]
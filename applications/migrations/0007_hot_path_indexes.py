@@ -0,0 +1,52 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("applications", "0006_application_ranking_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="application",
+            index=models.Index(
+                fields=["job", "status", "-match_score", "-created_at", "-id"],
+                name="application_job_status_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="application",
+            index=models.Index(fields=["-created_at"], name="application_recent_idx"),
+        ),
+        migrations.RemoveIndex(
+            model_name="application",
+            name="application_job_rank_idx",
+        ),
+        migrations.AddIndex(
+            model_name="application",
+            index=models.Index(
+                fields=["job", "-match_score", "-created_at", "-id"],
+                include=("name", "email", "status"),
+                name="application_job_rank_cover_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="application",
+            index=models.Index(
+                fields=["job", "-match_score", "-created_at"],
+                condition=models.Q(("status", "NEW")),
+                name="application_job_new_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="queuedtask",
+            index=models.Index(
+                fields=["run_after", "id"],
+                condition=models.Q(("status", "PENDING")),
+                name="queuedtask_pending_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:05
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS application_search_vector_idx "
+            "ON applications_application USING GIN (search_vector)"
+        )
+        schema_editor.execute(
+            "UPDATE applications_application SET search_vector = "
+            "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(resume_text, '')), 'B')"
+        )
+    elif vendor == "sqlite":
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS applications_application_fts "
+            "USING fts5(name, resume_text, tokenize = 'porter unicode61')"
+        )
+        schema_editor.execute(
+            "INSERT INTO applications_application_fts (rowid, name, resume_text) "
+            "SELECT id, name, resume_text FROM applications_application"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS application_search_vector_idx")
+    elif vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS applications_application_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("applications", "0007_hot_path_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="application",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("applications", "0008_resume_search"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="application",
+            name="embedding",
+            field=models.BinaryField(blank=True, default=b""),
+        ),
+    ]
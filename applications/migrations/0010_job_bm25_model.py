@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jobs", "0004_alter_job_scoring_backend"),
+        ("applications", "0009_application_embedding"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="JobBm25Model",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("description_hash", models.CharField(max_length=64)),
+                ("query_terms", models.BinaryField()),
+                ("document_frequencies", models.BinaryField()),
+                ("document_count", models.PositiveIntegerField(default=0)),
+                ("average_length", models.FloatField(default=0.0)),
+                ("fitted_at", models.DateTimeField(auto_now=True)),
+                (
+                    "job",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="bm25_model",
+                        to="jobs.job",
+                    ),
+                ),
+            ],
+        ),
+    ]
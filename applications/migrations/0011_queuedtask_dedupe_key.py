@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("applications", "0010_job_bm25_model"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="queuedtask",
+            name="dedupe_key",
+            field=models.CharField(blank=True, default="", max_length=100),
+        ),
+        migrations.AddConstraint(
+            model_name="queuedtask",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(
+                    ("status", "PENDING"), models.Q(("dedupe_key", ""), _negated=True)
+                ),
+                fields=("dedupe_key",),
+                name="queuedtask_pending_dedupe",
+            ),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("applications", "0011_queuedtask_dedupe_key"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="application",
+            name="percentile",
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="application",
+            name="rank",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="application",
+            index=models.Index(
+                fields=["job", "rank"], name="application_job_position_idx"
+            ),
+        ),
+    ]
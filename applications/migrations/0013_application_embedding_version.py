@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("applications", "0012_application_rank"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="application",
+            name="embedding_version",
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+    ]
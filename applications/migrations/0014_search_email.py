@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:10
+
+from django.db import migrations
+
+
+def rebuild_search_index(schema_editor, columns, weights):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(
+            "UPDATE applications_application SET search_vector = "
+            + " || ".join(
+                f"setweight(to_tsvector('english', coalesce({column}, '')), '{weight}')"
+                for column, weight in zip(columns, weights)
+            )
+        )
+    elif vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS applications_application_fts")
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE applications_application_fts "
+            f"USING fts5({', '.join(columns)}, tokenize = 'porter unicode61')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO applications_application_fts (rowid, {', '.join(columns)}) "
+            f"SELECT id, {', '.join(columns)} FROM applications_application"
+        )
+
+
+def index_email(apps, schema_editor):
+    rebuild_search_index(schema_editor, ["name", "email", "resume_text"], "AAB")
+
+
+def unindex_email(apps, schema_editor):
+    rebuild_search_index(schema_editor, ["name", "resume_text"], "AB")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("applications", "0013_application_embedding_version"),
+    ]
+
+    operations = [
+        migrations.RunPython(index_email, unindex_email),
+    ]
@@ -1,7 +1,46 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.utils import timezone
 from jobs.models import Job
 
 
+class ResumeBlob(models.Model):
+    """
+    A resume file stored once per unique content hash
+
+    Every application that uploads the same bytes shares the stored file and
+    its extracted text and term counts. ref_count tracks the applications
+    pointing at it so the file is only deleted when the last one goes.
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    file = models.FileField(upload_to='resumes/')
+    size = models.PositiveIntegerField(default=0)
+    text = models.TextField(blank=True)
+    term_counts = models.BinaryField(blank=True, default=b'', editable=False)
+    extracted = models.BooleanField(default=False)
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.ref_count} refs)"
+
+
+class ApplicationQuerySet(models.QuerySet):
+    # Columns needed to render an applicant row; excludes the large text
+    # and binary columns that only application_detail needs
+    LISTING_FIELDS = [
+        'pk', 'job', 'name', 'email', 'match_score', 'rank', 'percentile', 'status', 'created_at',
+    ]
+
+    def listing(self):
+        """Lean projection for list and table views"""
+        return self.only(*self.LISTING_FIELDS)
+
+    def top(self, count):
+        """Applications ranked in the top `count` positions, via the materialized rank"""
+        return self.filter(rank__lte=count).order_by('rank', '-created_at', '-pk')
+
+
 class Application(models.Model):
     STATUS_CHOICES = [
         ('NEW', 'New'),
@@ -15,14 +54,215 @@ class Application(models.Model):
     name = models.CharField(max_length=200)
     email = models.EmailField()
     resume = models.FileField(upload_to='resumes/')
+    resume_blob = models.ForeignKey(
+        ResumeBlob,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='applications',
+    )
     resume_text = models.TextField(blank=True)
+    # Packed (term_id, count) pairs of resume_text, see services.index_resume
+    term_counts = models.BinaryField(blank=True, default=b'', editable=False)
+    # float32 LSA embedding of the resume, see applications.embeddings
+    embedding = models.BinaryField(blank=True, default=b'', editable=False)
+    # EmbeddingModel.version that produced embedding (0 = none)
+    embedding_version = models.BigIntegerField(default=0, editable=False)
+    # PostgreSQL full-text vector of name and resume_text, see search.py;
+    # SQLite uses the applications_application_fts FTS5 table instead
+    search_vector = SearchVectorField(null=True, editable=False)
     match_score = models.FloatField(default=0.0)
+    # Dense rank by match score within the job (1 = best) and percentile rank
+    # (0-100), written by every rerank; null until the job is next ranked
+    rank = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    percentile = models.FloatField(null=True, blank=True, editable=False)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='NEW')
     notes = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = ApplicationQuerySet.as_manager()
+
+    # Fields shown by cached search and recommendation results; saves that
+    # change them start a new 'applications' cache version
+    CONTENT_FIELDS = ('name', 'email', 'resume_text', 'job_id')
+
     class Meta:
         ordering = ['-match_score', '-created_at']
+        indexes = [
+            # Per-job ranking, used by keyset pagination on job_detail; on
+            # PostgreSQL the included columns allow index-only scans (other
+            # databases ignore include)
+            models.Index(
+                fields=['job', '-match_score', '-created_at', '-id'],
+                include=['name', 'email', 'status'],
+                name='application_job_rank_cover_idx',
+            ),
+            # Triage queue: new applicants per job, best first
+            models.Index(
+                fields=['job', '-match_score', '-created_at'],
+                condition=models.Q(status='NEW'),
+                name='application_job_new_idx',
+            ),
+            # Per-job ranking within a status filter
+            models.Index(
+                fields=['job', 'status', '-match_score', '-created_at', '-id'],
+                name='application_job_status_idx',
+            ),
+            # Top-N by materialized rank
+            models.Index(fields=['job', 'rank'], name='application_job_position_idx'),
+            # Recent applications across jobs (admin changelist, date filters)
+            models.Index(fields=['-created_at'], name='application_recent_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} - {self.job.title}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status and whether the row had resume text, so
+        # signals can move the job counters
+        if 'status' in field_names:
+            instance._loaded_status = instance.status
+        if 'resume_text' in field_names:
+            instance._loaded_scored = bool(instance.resume_text)
+        instance.remember_content()
+        return instance
+
+    def remember_content(self):
+        """Snapshot the loaded CONTENT_FIELDS values for content_changed()"""
+        self._loaded_content = {
+            name: self.__dict__[name] for name in self.CONTENT_FIELDS if name in self.__dict__
+        }
+
+    def content_changed(self, update_fields=None, fields=CONTENT_FIELDS):
+        """
+        Whether saving this instance wrote new values to CONTENT_FIELDS
+
+        Args:
+            update_fields: The save's update_fields, None for a full save
+            fields: Only consider these of CONTENT_FIELDS
+
+        Returns:
+            True for instances never loaded or saved, otherwise whether a saved
+            content field differs from its snapshot
+        """
+        loaded = getattr(self, '_loaded_content', None)
+        if loaded is None:
+            return True
+        for name in fields:
+            if update_fields is not None and not {name, name.removesuffix('_id')} & set(update_fields):
+                continue
+            if name in loaded:
+                if self.__dict__.get(name) != loaded[name]:
+                    return True
+            elif name in self.__dict__:
+                # Deferred when loaded, assigned since
+                return True
+        return False
+
+    @staticmethod
+    def status_count_field(status):
+        """Name of the Job counter field for a status"""
+        return f'{status.lower()}_count'
+
+
+class Term(models.Model):
+    """Global dictionary of analyzed resume and job description terms"""
+    text = models.CharField(max_length=100, unique=True)
+
+    def __str__(self):
+        return self.text
+
+
+class JobScoringModel(models.Model):
+    """
+    TF-IDF model fitted once per job over its description and applicant corpus
+
+    Stores the vocabulary, IDF weights and the job description vector so that
+    scoring a resume only needs a transform. The description hash ties the
+    model to the description it was fitted on.
+    """
+    job = models.OneToOneField(Job, on_delete=models.CASCADE, related_name='scoring_model')
+    description_hash = models.CharField(max_length=64)
+    # Sorted Term ids; position in the list is the column in the TF-IDF matrix
+    vocabulary = models.JSONField(default=list)
+    idf = models.BinaryField()
+    job_vector = models.BinaryField()
+    document_count = models.PositiveIntegerField(default=0)
+    fitted_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Scoring model for {self.job.title} ({self.document_count} docs)"
+
+
+class JobBm25Model(models.Model):
+    """
+    BM25 corpus statistics precomputed once per job
+
+    Query terms are the job description's distinct terms; their document
+    frequencies and the average resume length over the job's applicants are
+    all BM25 needs to score a resume from its stored term counts.
+    """
+    job = models.OneToOneField(Job, on_delete=models.CASCADE, related_name='bm25_model')
+    description_hash = models.CharField(max_length=64)
+    # Sorted uint32 Term ids and their uint32 document frequencies
+    query_terms = models.BinaryField()
+    document_frequencies = models.BinaryField()
+    document_count = models.PositiveIntegerField(default=0)
+    average_length = models.FloatField(default=0.0)
+    fitted_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"BM25 statistics for {self.job.title} ({self.document_count} docs)"
+
+
+
+class QueuedTask(models.Model):
+    """
+    Durable unit of background work stored in the database
+
+    Claimed and executed by the run_worker management command, so no
+    external broker is required.
+    """
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('DONE', 'Done'),
+        ('FAILED', 'Failed'),
+    ]
+
+    name = models.CharField(max_length=100)
+    args = models.JSONField(default=list)
+    # At most one PENDING task per non-empty key, see queue.enqueue
+    dedupe_key = models.CharField(max_length=100, blank=True, default='')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['run_after', 'pk']
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='queuedtask_claim_idx'),
+            # Runnable tasks only; done and failed rows are never scanned
+            models.Index(
+                fields=['run_after', 'id'],
+                condition=models.Q(status='PENDING'),
+                name='queuedtask_pending_idx',
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dedupe_key'],
+                condition=models.Q(status='PENDING') & ~models.Q(dedupe_key=''),
+                name='queuedtask_pending_dedupe',
+            ),
+        ]
 
     def __str__(self):
-        return f"{self.name} - {self.job.title}"
\ No newline at end of file
+        return f"{self.name}{tuple(self.args)} - {self.status}"
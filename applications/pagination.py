@@ -0,0 +1,101 @@
+import base64
+from datetime import datetime
+from django.db.models import Q
+
+# Ranking order of applicants; id breaks ties so every row has a unique key
+RANKING_ORDER = ['-match_score', '-created_at', '-pk']
+
+
+def encode_cursor(application):
+    """Opaque cursor for the ranking key of an application"""
+    raw = f'{application.match_score!r}|{application.created_at.isoformat()}|{application.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; returns None for missing or malformed cursors"""
+    if not cursor:
+        return None
+    try:
+        score, created_at, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return float(score), datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def rows_after(key):
+    """Rows ranked strictly below the key"""
+    score, created_at, pk = key
+    # The redundant bound lets the database seek into the ranking index
+    return Q(match_score__lte=score) & (
+        Q(match_score__lt=score)
+        | Q(match_score=score, created_at__lt=created_at)
+        | Q(match_score=score, created_at=created_at, pk__lt=pk)
+    )
+
+
+def rows_before(key):
+    """Rows ranked strictly above the key"""
+    score, created_at, pk = key
+    return Q(match_score__gte=score) & (
+        Q(match_score__gt=score)
+        | Q(match_score=score, created_at__gt=created_at)
+        | Q(match_score=score, created_at=created_at, pk__gt=pk)
+    )
+
+
+class KeysetPage:
+    """One page of ranked applications plus cursors to its neighbours"""
+
+    def __init__(self, items, has_next, has_previous):
+        self.items = items
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.next_cursor = encode_cursor(items[-1]) if items and has_next else None
+        self.previous_cursor = encode_cursor(items[0]) if items and has_previous else None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def keyset_paginate(queryset, after=None, before=None, page_size=50):
+    """
+    Seek pagination over the (match_score, created_at, id) ranking
+
+    Each page is a range scan on the ranking index starting at the cursor,
+    so deep pages cost the same as the first one (unlike OFFSET).
+
+    Args:
+        queryset: Application queryset, already filtered
+        after: Cursor of the last row of the previous page
+        before: Cursor of the first row of the next page
+        page_size: Rows per page
+
+    Returns:
+        KeysetPage
+    """
+    after_key = decode_cursor(after)
+    before_key = decode_cursor(before)
+
+    if before_key is not None:
+        # Walk backwards from the cursor, then restore ranking order
+        rows = list(
+            queryset
+            .filter(rows_before(before_key))
+            .order_by('match_score', 'created_at', 'pk')[:page_size + 1]
+        )
+        has_previous = len(rows) > page_size
+        items = rows[:page_size][::-1]
+        return KeysetPage(items, has_next=True, has_previous=has_previous)
+
+    if after_key is not None:
+        queryset = queryset.filter(rows_after(after_key))
+    rows = list(queryset.order_by(*RANKING_ORDER)[:page_size + 1])
+    return KeysetPage(
+        rows[:page_size],
+        has_next=len(rows) > page_size,
+        has_previous=after_key is not None,
+    )
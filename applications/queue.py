@@ -0,0 +1,248 @@
+import logging
+import threading
+import traceback
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from .metrics import STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Registered task functions, keyed by name
+TASKS = {}
+
+
+def task(func):
+    """Register a function so it can be enqueued by name"""
+    TASKS[func.__name__] = func
+    return func
+
+
+def enqueue(name, *args, run_after=None, max_attempts=3, dedupe_key=''):
+    """
+    Add a task to the database-backed queue
+
+    The row is written in the caller's transaction, so a task is only visible
+    to workers once the data it refers to has been committed.
+
+    Args:
+        name: Name of a function registered with @task
+        *args: JSON-serializable positional arguments
+        run_after: Earliest time the task may run (default: now)
+        max_attempts: Attempts before the task is marked FAILED
+        dedupe_key: If a PENDING task with this key exists, return it
+            instead of adding another (a unique index enforces this)
+
+    Returns:
+        QueuedTask instance
+    """
+    from .models import QueuedTask
+
+    if name not in TASKS:
+        raise ValueError(f"Unknown task: {name}")
+
+    if dedupe_key:
+        pending = QueuedTask.objects.filter(dedupe_key=dedupe_key, status='PENDING')
+        existing = pending.first()
+        if existing is not None:
+            return existing
+        try:
+            with transaction.atomic():
+                queued = QueuedTask.objects.create(
+                    name=name,
+                    args=list(args),
+                    run_after=run_after or timezone.now(),
+                    max_attempts=max_attempts,
+                    dedupe_key=dedupe_key,
+                )
+        except IntegrityError:
+            # A concurrent request enqueued it first
+            return pending.get()
+    else:
+        queued = QueuedTask.objects.create(
+            name=name,
+            args=list(args),
+            run_after=run_after or timezone.now(),
+            max_attempts=max_attempts,
+        )
+    logger.info(f"Enqueued task {queued.pk}: {name}{tuple(args)}")
+
+    if settings.TASK_QUEUE_EAGER:
+        transaction.on_commit(lambda: run_pending())
+    return queued
+
+
+def claim_next():
+    """
+    Atomically claim the next runnable task
+
+    A conditional UPDATE on the status column acts as the lock, which works
+    the same on SQLite and PostgreSQL. Tasks left RUNNING by a dead worker
+    are reclaimed after TASK_QUEUE_LOCK_TIMEOUT seconds without a heartbeat.
+    Every claim, including a reclaim, counts as an attempt; a stale task
+    that has used up max_attempts is marked FAILED instead.
+
+    Returns:
+        QueuedTask instance, or None if the queue is empty
+    """
+    from .models import QueuedTask
+
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.TASK_QUEUE_LOCK_TIMEOUT)
+
+    while True:
+        candidate = (
+            QueuedTask.objects
+            .filter(status='PENDING', run_after__lte=now)
+            .values_list('pk', flat=True)
+            .first()
+        )
+        claimable = QueuedTask.objects.filter(pk=candidate, status='PENDING')
+        if candidate is None:
+            candidate = (
+                QueuedTask.objects
+                .filter(status='RUNNING', locked_at__lt=stale)
+                .values_list('pk', flat=True)
+                .first()
+            )
+            if candidate is None:
+                return None
+            claimable = QueuedTask.objects.filter(pk=candidate, status='RUNNING', locked_at__lt=stale)
+            exhausted = claimable.filter(attempts__gte=F('max_attempts')).update(
+                status='FAILED',
+                locked_at=None,
+                finished_at=now,
+                last_error='Worker stopped sending heartbeats on the last attempt',
+            )
+            if exhausted:
+                logger.error(f"Task {candidate} failed permanently, its worker was lost")
+                continue
+
+        claimed = claimable.update(status='RUNNING', locked_at=now, attempts=F('attempts') + 1)
+        if claimed:
+            return QueuedTask.objects.get(pk=candidate)
+        # Another worker won the race, try the next one
+
+
+class Heartbeat:
+    """
+    Renews a running task's lock every TASK_QUEUE_HEARTBEAT_INTERVAL seconds
+
+    Tasks running longer than TASK_QUEUE_LOCK_TIMEOUT are then not reclaimed
+    by another worker while this one is still alive.
+    """
+
+    def __init__(self, queued):
+        self.queued = queued
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def beat(self):
+        """
+        Move locked_at forward, unless another worker has reclaimed the task
+
+        Returns:
+            True if this worker still holds the lock
+        """
+        from .models import QueuedTask
+
+        now = timezone.now()
+        renewed = QueuedTask.objects.filter(
+            pk=self.queued.pk, status='RUNNING', locked_at=self.queued.locked_at,
+        ).update(locked_at=now)
+        if not renewed:
+            logger.warning(f"Task {self.queued.pk} ({self.queued.name}) lost its lock")
+            return False
+        self.queued.locked_at = now
+        return True
+
+    def _run(self):
+        try:
+            while not self.stopped.wait(settings.TASK_QUEUE_HEARTBEAT_INTERVAL):
+                if not self.beat():
+                    break
+        finally:
+            # This thread's own database connection
+            connection.close()
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.thread.join()
+
+
+def run_task(queued):
+    """
+    Execute a claimed task and record the outcome
+
+    Failed tasks are retried with a linear backoff until max_attempts.
+    A heartbeat keeps the task locked while it runs.
+
+    Args:
+        queued: QueuedTask instance in RUNNING state, as returned by claim_next
+
+    Returns:
+        True if the task succeeded
+    """
+    try:
+        with Heartbeat(queued), STAGE_SECONDS.time(operation='task', stage=queued.name):
+            TASKS[queued.name](*queued.args)
+    except Exception:
+        queued.last_error = traceback.format_exc()
+        if queued.attempts >= queued.max_attempts:
+            queued.status = 'FAILED'
+            queued.finished_at = timezone.now()
+            logger.error(f"Task {queued.pk} ({queued.name}) failed permanently")
+        else:
+            queued.status = 'PENDING'
+            queued.run_after = timezone.now() + timedelta(
+                seconds=settings.TASK_QUEUE_RETRY_DELAY * queued.attempts
+            )
+            logger.warning(f"Task {queued.pk} ({queued.name}) failed, will retry")
+        queued.locked_at = None
+        try:
+            with transaction.atomic():
+                queued.save(update_fields=[
+                    'attempts', 'status', 'run_after', 'locked_at', 'last_error', 'finished_at',
+                ])
+        except IntegrityError:
+            # A newer PENDING task with the same dedupe key will do the work
+            queued.status = 'DONE'
+            queued.finished_at = timezone.now()
+            queued.save(update_fields=[
+                'attempts', 'status', 'locked_at', 'last_error', 'finished_at',
+            ])
+            logger.warning(f"Task {queued.pk} ({queued.name}) failed, superseded by a pending task")
+        return False
+
+    queued.status = 'DONE'
+    queued.locked_at = None
+    queued.finished_at = timezone.now()
+    queued.save(update_fields=['attempts', 'status', 'locked_at', 'finished_at'])
+    return True
+
+
+def run_pending(limit=None):
+    """
+    Run runnable tasks in this process until the queue is empty
+
+    Args:
+        limit: Maximum number of tasks to run
+
+    Returns:
+        Number of tasks executed
+    """
+    processed = 0
+    while limit is None or processed < limit:
+        queued = claim_next()
+        if queued is None:
+            break
+        run_task(queued)
+        processed += 1
+    return processed
@@ -0,0 +1,437 @@
+import heapq
+import logging
+import os
+import tempfile
+import threading
+import time
+from array import array
+from bisect import bisect_left
+import numpy as np
+from django.conf import settings
+from django.db.models import Q
+from .services import count_terms, get_term_ids, unpack_term_counts
+
+logger = logging.getLogger(__name__)
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def _ids(values=()):
+    return array('q', np.asarray(values, dtype=np.int64).tobytes())
+
+
+def _weights(values=()):
+    return array('f', np.asarray(values, dtype=np.float32).tobytes())
+
+
+class InvertedIndex:
+    """
+    Term -> posting list index over every application's stored term counts
+
+    Postings hold (application id, weight) sorted by application id, where
+    weights are L2-normalized TF-IDF values, so a dot product with a
+    normalized query is the cosine similarity. IDF is frozen when the index
+    is built; new applications are appended with those weights and the index
+    is rebuilt once the corpus grows by MATCH_MODEL_REFIT_FACTOR. Deleted
+    applications are tombstoned and skipped by queries until the next
+    rebuild drops them from the postings.
+    """
+
+    def __init__(self):
+        self.postings = {}  # term_id -> (application ids, weights)
+        self.max_weights = {}  # term_id -> largest weight in its postings
+        self.idf = {}
+        self.built_document_count = 0
+        self.documents = {}  # application id -> term ids, for removal
+        self.high_water = 0  # largest application id seen
+        self.pending = set()  # seen but not extracted yet
+        self.tombstones = set()  # deleted application ids still in postings
+        self.dirty = False  # changed since the snapshot was written
+        self.saved_at = time.monotonic()
+
+    def __len__(self):
+        return len(self.documents) - len(self.tombstones)
+
+    def term_idf(self, term_id):
+        # Terms unseen at build time count as appearing in one document
+        idf = self.idf.get(term_id)
+        if idf is None:
+            idf = float(np.log((1 + self.built_document_count) / 2) + 1)
+        return idf
+
+    def build(self, documents):
+        """
+        Rebuild the index from scratch
+
+        Args:
+            documents: List of (application id, packed term counts)
+        """
+        documents = [(pk, blob) for pk, blob in documents if blob]
+        self.__init__()
+        self.built_document_count = len(documents)
+        if not documents:
+            return
+
+        unpacked = [unpack_term_counts(blob) for _, blob in documents]
+        all_terms = np.concatenate([term_ids for term_ids, _ in unpacked]).astype(np.int64)
+        all_counts = np.concatenate([counts for _, counts in unpacked]).astype(np.float64)
+        all_docs = np.repeat(
+            np.array([pk for pk, _ in documents], dtype=np.int64),
+            [len(term_ids) for term_ids, _ in unpacked],
+        )
+
+        # Smoothed IDF, as TfidfVectorizer(smooth_idf=True)
+        term_ids, inverse, document_frequencies = np.unique(
+            all_terms, return_inverse=True, return_counts=True
+        )
+        idf = np.log((1 + len(documents)) / (1 + document_frequencies)) + 1
+        self.idf = dict(zip(term_ids.tolist(), idf.tolist()))
+
+        weights = all_counts * idf[inverse]
+        boundaries = np.cumsum([0] + [len(ids) for ids, _ in unpacked])
+        norms = np.sqrt(np.add.reduceat(weights ** 2, boundaries[:-1]))
+        weights /= np.repeat(np.where(norms > 0, norms, 1), np.diff(boundaries))
+
+        for (pk, _), start, stop in zip(documents, boundaries[:-1], boundaries[1:]):
+            self.documents[pk] = array('I', all_terms[start:stop].astype(np.uint32).tobytes())
+
+        order = np.lexsort((all_docs, all_terms))
+        all_terms, all_docs, weights = all_terms[order], all_docs[order], weights[order]
+        splits = np.flatnonzero(np.diff(all_terms)) + 1
+        for terms, docs, term_weights in zip(
+            np.split(all_terms, splits), np.split(all_docs, splits), np.split(weights, splits)
+        ):
+            term_id = int(terms[0])
+            self.postings[term_id] = (_ids(docs), _weights(term_weights))
+            self.max_weights[term_id] = float(term_weights.max())
+
+        self.high_water = max(self.documents)
+
+    def add(self, application_id, term_counts):
+        """Index one application with the current IDF weights"""
+        if application_id in self.documents:
+            self.remove(application_id)
+        self.tombstones.discard(application_id)
+        term_ids, counts = unpack_term_counts(term_counts)
+        if not len(term_ids):
+            return
+        weights = counts * np.array([self.term_idf(int(term_id)) for term_id in term_ids])
+        weights /= np.sqrt((weights ** 2).sum())
+
+        for term_id, weight in zip(term_ids.tolist(), weights.tolist()):
+            ids, term_weights = self.postings.setdefault(term_id, (_ids(), _weights()))
+            position = bisect_left(ids, application_id)
+            ids.insert(position, application_id)
+            term_weights.insert(position, weight)
+            self.max_weights[term_id] = max(self.max_weights.get(term_id, 0.0), weight)
+        self.documents[application_id] = array('I', term_ids.tobytes())
+
+    def remove(self, application_id):
+        """Drop an application; max weights stay valid as upper bounds"""
+        for term_id in self.documents.pop(application_id, ()):
+            ids, weights = self.postings[term_id]
+            position = bisect_left(ids, application_id)
+            if position < len(ids) and ids[position] == application_id:
+                del ids[position]
+                del weights[position]
+            if not ids:
+                del self.postings[term_id]
+                del self.max_weights[term_id]
+
+    def delete(self, application_id):
+        """Tombstone a deleted application; True if it was indexed"""
+        if application_id not in self.documents or application_id in self.tombstones:
+            return False
+        self.tombstones.add(application_id)
+        return True
+
+    def needs_rebuild(self):
+        return len(self.documents) >= max(1, self.built_document_count) * settings.MATCH_MODEL_REFIT_FACTOR
+
+    def query_weights(self, term_counts):
+        """Normalized TF-IDF weights of a {term_id: count} query, restricted to indexed terms"""
+        weights = {
+            term_id: count * self.term_idf(term_id)
+            for term_id, count in term_counts.items()
+            if term_id in self.postings
+        }
+        norm = np.sqrt(sum(weight ** 2 for weight in weights.values()))
+        return {term_id: weight / norm for term_id, weight in weights.items()} if norm else {}
+
+    def top_k(self, query, k, exclude=()):
+        """
+        Top-k cosine matches with WAND pruning
+
+        Posting cursors are kept sorted by their current application id.
+        Only an application whose summed term upper bounds can beat the
+        current k-th best score is fully scored; the others are skipped by
+        seeking the lagging cursors straight to it.
+
+        Args:
+            query: {term_id: weight} from query_weights
+            k: Number of results
+            exclude: Application ids to leave out
+
+        Returns:
+            List of (score, application id), best first
+        """
+        if self.tombstones:
+            exclude = set(exclude) | self.tombstones
+        # Cursor: [application ids, weights, position, upper bound, query weight]
+        cursors = []
+        for term_id, query_weight in query.items():
+            if term_id not in self.postings:
+                continue
+            ids, weights = self.postings[term_id]
+            cursors.append([ids, weights, 0, query_weight * self.max_weights[term_id], query_weight])
+
+        heap = []
+        threshold = 0.0
+        while cursors:
+            cursors.sort(key=lambda cursor: cursor[0][cursor[2]])
+
+            # Pivot: first cursor at which the accumulated upper bound beats the threshold
+            bound = 0.0
+            pivot = None
+            for position, cursor in enumerate(cursors):
+                bound += cursor[3]
+                if bound > threshold:
+                    pivot = position
+                    break
+            if pivot is None:
+                break
+
+            pivot_id = cursors[pivot][0][cursors[pivot][2]]
+            if cursors[0][0][cursors[0][2]] == pivot_id:
+                score = 0.0
+                for cursor in cursors:
+                    if cursor[0][cursor[2]] != pivot_id:
+                        break
+                    score += cursor[4] * cursor[1][cursor[2]]
+                    cursor[2] += 1
+                if pivot_id not in exclude:
+                    if len(heap) < k:
+                        heapq.heappush(heap, (score, pivot_id))
+                    elif score > heap[0][0]:
+                        heapq.heapreplace(heap, (score, pivot_id))
+                    if len(heap) == k:
+                        threshold = heap[0][0]
+            else:
+                for cursor in cursors[:pivot]:
+                    cursor[2] = bisect_left(cursor[0], pivot_id, cursor[2])
+
+            cursors = [cursor for cursor in cursors if cursor[2] < len(cursor[0])]
+
+        return sorted(heap, reverse=True)
+
+    def save(self, path):
+        """Write the index atomically as a .npz archive"""
+        term_ids = sorted(self.postings)
+        document_ids = sorted(self.documents)
+        idf_terms = sorted(self.idf)
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=directory, suffix='.tmp', delete=False) as handle:
+            np.savez(
+                handle,
+                meta=np.array([self.built_document_count, self.high_water], dtype=np.int64),
+                idf_terms=np.array(idf_terms, dtype=np.int64),
+                idf=np.array([self.idf[term_id] for term_id in idf_terms], dtype=np.float64),
+                posting_terms=np.array(term_ids, dtype=np.int64),
+                posting_offsets=np.cumsum([0] + [len(self.postings[t][0]) for t in term_ids]),
+                posting_ids=np.frombuffer(
+                    b''.join(self.postings[t][0].tobytes() for t in term_ids), dtype=np.int64
+                ),
+                posting_weights=np.frombuffer(
+                    b''.join(self.postings[t][1].tobytes() for t in term_ids), dtype=np.float32
+                ),
+                document_ids=np.array(document_ids, dtype=np.int64),
+                document_offsets=np.cumsum([0] + [len(self.documents[d]) for d in document_ids]),
+                document_terms=np.frombuffer(
+                    b''.join(self.documents[d].tobytes() for d in document_ids), dtype=np.uint32
+                ),
+                pending=np.array(sorted(self.pending), dtype=np.int64),
+                tombstones=np.array(sorted(self.tombstones), dtype=np.int64),
+            )
+        os.replace(handle.name, path)
+        self.dirty = False
+        self.saved_at = time.monotonic()
+
+    @classmethod
+    def load(cls, path):
+        """Read an index written by save()"""
+        index = cls()
+        with np.load(path) as data:
+            index.built_document_count, index.high_water = data['meta'].tolist()
+            index.idf = dict(zip(data['idf_terms'].tolist(), data['idf'].tolist()))
+            offsets = data['posting_offsets']
+            posting_ids, posting_weights = data['posting_ids'], data['posting_weights']
+            for position, term_id in enumerate(data['posting_terms'].tolist()):
+                start, stop = offsets[position], offsets[position + 1]
+                weights = posting_weights[start:stop]
+                index.postings[term_id] = (_ids(posting_ids[start:stop]), _weights(weights))
+                index.max_weights[term_id] = float(weights.max())
+            offsets = data['document_offsets']
+            document_terms = data['document_terms']
+            for position, document_id in enumerate(data['document_ids'].tolist()):
+                start, stop = offsets[position], offsets[position + 1]
+                index.documents[document_id] = array('I', document_terms[start:stop].tobytes())
+            index.pending = set(data['pending'].tolist())
+            if 'tombstones' in data:
+                index.tombstones = set(data['tombstones'].tolist())
+        return index
+
+
+def build_index():
+    """Build a fresh index over every application with stored term counts"""
+    from .models import Application
+
+    index = InvertedIndex()
+    rows = Application.objects.order_by('pk').values_list('pk', 'term_counts')
+    documents = [(pk, bytes(blob)) for pk, blob in rows.iterator(chunk_size=2000)]
+    index.build(documents)
+    index.high_water = max((pk for pk, _ in documents), default=0)
+    index.pending = {pk for pk, blob in documents if not blob}
+    logger.info(f"Built recommendation index over {len(index)} applications")
+    return index
+
+
+def refresh_index(index):
+    """
+    Catch the index up with the database
+
+    Picks up applications created since it was last refreshed plus those
+    that were still awaiting extraction, and drops pending ids that no
+    longer exist.
+
+    Returns:
+        True if the index changed
+    """
+    from .models import Application
+
+    rows = list(
+        Application.objects
+        .filter(Q(pk__gt=index.high_water) | Q(pk__in=index.pending))
+        .values_list('pk', 'term_counts')
+    )
+    changed = False
+    seen = set()
+    for pk, blob in rows:
+        seen.add(pk)
+        index.high_water = max(index.high_water, pk)
+        if blob:
+            index.add(pk, bytes(blob))
+            index.pending.discard(pk)
+            changed = True
+        elif pk not in index.pending:
+            index.pending.add(pk)
+            changed = True
+    gone = index.pending - seen
+    if gone:
+        index.pending -= gone
+        changed = True
+    return changed
+
+
+def get_index(rebuild=False):
+    """
+    Return the process-wide index, loading or building it on first use
+
+    Every call catches up with new applications. The snapshot on disk
+    (RECOMMENDATION_INDEX_PATH) is written when the index is built and
+    otherwise at most every RECOMMENDATION_INDEX_SAVE_SECONDS while it has
+    unsaved changes; a process loading an older snapshot catches up the same
+    way, so only tombstones are lost with an unsaved change.
+    """
+    global _index
+    path = settings.RECOMMENDATION_INDEX_PATH
+    with _index_lock:
+        built = False
+        if rebuild:
+            _index = None
+        if _index is None and not rebuild and os.path.exists(path):
+            try:
+                _index = InvertedIndex.load(path)
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Could not load recommendation index from {path}: {e}")
+        if _index is None:
+            _index = build_index()
+            built = True
+        if refresh_index(_index):
+            _index.dirty = True
+            if _index.needs_rebuild():
+                _index = build_index()
+                built = True
+        if built or (
+            _index.dirty
+            and time.monotonic() - _index.saved_at >= settings.RECOMMENDATION_INDEX_SAVE_SECONDS
+        ):
+            _index.save(path)
+        return _index
+
+
+def recommend_candidates(job, limit=None):
+    """
+    Top applicants from all other jobs who fit a job's description
+
+    Jobs using semantic scoring are matched in embedding space through the
+    ANN index instead of the inverted index, once an embedding model exists.
+
+    Args:
+        job: Job model instance
+        limit: Number of candidates, RECOMMENDATIONS_LIMIT by default
+
+    Returns:
+        List of Application instances (listing columns plus job title)
+        carrying a recommendation_score percentage, best first
+    """
+    from .models import Application, ApplicationQuerySet
+    from .scoring import SemanticScorer, get_scorer
+
+    limit = limit or settings.RECOMMENDATIONS_LIMIT
+    applications = Application.objects.select_related('job').only(
+        *ApplicationQuerySet.LISTING_FIELDS, 'job__title'
+    )
+
+    if isinstance(get_scorer(job.scoring_backend), SemanticScorer):
+        from .embeddings import semantic_candidates
+        # Approximate; deleted applications are simply skipped
+        matches = semantic_candidates(job, limit)
+        if matches is not None:
+            found = applications.in_bulk([pk for _, pk in matches])
+            return _with_scores(matches, found)
+
+    index = get_index()
+
+    counts = count_terms(job.description)
+    term_ids = get_term_ids(counts, create=False)
+    query = index.query_weights({term_ids[term]: count for term, count in counts.items() if term in term_ids})
+    if not query:
+        return []
+
+    exclude = set(job.application_set.values_list('pk', flat=True))
+    while True:
+        with _index_lock:
+            matches = index.top_k(query, limit, exclude=exclude)
+        found = applications.in_bulk([pk for _, pk in matches])
+        missing = [pk for _, pk in matches if pk not in found]
+        if not missing:
+            break
+        # Deleted since they were indexed; persisted with the next snapshot
+        with _index_lock:
+            for pk in missing:
+                if index.delete(pk):
+                    index.dirty = True
+
+    return _with_scores(matches, found)
+
+
+def _with_scores(matches, found):
+    results = []
+    for score, pk in matches:
+        if pk in found:
+            application = found[pk]
+            application.recommendation_score = round(max(score, 0.0) * 100, 2)
+            results.append(application)
+    return results
@@ -0,0 +1,258 @@
+import functools
+import logging
+import numpy as np
+from django.conf import settings
+from django.utils.module_loading import import_string
+from .services import (
+    count_matrix, description_hash, encode_text, fit_job_model, get_job_model, unpack_term_counts,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class Scorer:
+    """
+    Base class of match scorers
+
+    Scorers are batch-first: score_many() scores every application of a job
+    at once so implementations can vectorize. They are registered by name in
+    settings.MATCH_SCORERS and picked per job through Job.scoring_backend.
+    """
+    label = None
+    # Application columns score_many() reads, besides pk
+    fields = ['term_counts']
+
+    def score_many(self, job, applications):
+        """
+        Match scores of a job's applications
+
+        Args:
+            job: Job model instance
+            applications: Application instances with `fields` loaded
+
+        Returns:
+            numpy array of scores (0-100), aligned with applications
+        """
+        raise NotImplementedError
+
+    def score(self, job, application):
+        """
+        Score one new application against its job
+
+        Returns:
+            Match score (0-100), or None if it can only be scored by a full rerank
+        """
+        return float(self.score_many(job, [application])[0])
+
+    def needs_rerank(self, job):
+        """True if the job's stored model has drifted and a full rerank is due"""
+        return False
+
+
+class TfidfScorer(Scorer):
+    """Cosine similarity of TF-IDF vectors, from the job's persisted model"""
+    label = 'Keyword match (TF-IDF)'
+
+    def score_many(self, job, applications):
+        # A full rescore is the time to refit the IDF weights
+        term_count_blobs = [application.term_counts for application in applications]
+        model = fit_job_model(job, term_count_blobs)
+        return model.score_many(term_count_blobs)
+
+    def score(self, job, application):
+        return get_job_model(job).score(application.term_counts)
+
+    def needs_rerank(self, job):
+        # Job.scored_count is a counter kept by signals, so no COUNT(*) per apply
+        return get_job_model(job).needs_refit(job.scored_count)
+
+
+class SemanticScorer(Scorer):
+    """Cosine similarity of LSA embeddings; TF-IDF until an embedding model is fitted"""
+    label = 'Semantic match (LSA embeddings)'
+    fields = ['term_counts', 'embedding', 'embedding_version']
+
+    def score_many(self, job, applications):
+        from .embeddings import semantic_scores
+
+        scores = semantic_scores(job, applications)
+        if scores is None:
+            return TfidfScorer().score_many(job, applications)
+        return scores
+
+    def score(self, job, application):
+        from .embeddings import semantic_scores
+
+        scores = semantic_scores(job, [application])
+        if scores is None:
+            # Against the job's stored TF-IDF model, never refitted on one resume
+            return TfidfScorer().score(job, application)
+        return float(scores[0])
+
+
+class KeywordScorer(Scorer):
+    """Share of the job description's distinct terms found in the resume"""
+    label = 'Skill keyword coverage'
+
+    def score_many(self, job, applications):
+        keywords = np.sort(unpack_term_counts(encode_text(job.description))[0])
+        if not len(keywords) or not applications:
+            return np.zeros(len(applications))
+        matrix = count_matrix([application.term_counts for application in applications], keywords)
+        found = np.asarray((matrix > 0).sum(axis=1)).ravel()
+        return np.round(found / len(keywords) * 100, 2)
+
+
+class _StackedTermCounts:
+    """Packed term counts of many resumes flattened into parallel arrays"""
+
+    def __init__(self, term_count_blobs):
+        sizes = [len(blob) // 8 for blob in term_count_blobs]
+        pairs = np.frombuffer(b''.join(term_count_blobs), dtype=np.uint32).reshape(-1, 2)
+        self.term_ids = pairs[:, 0]
+        self.counts = pairs[:, 1]
+        # Entries of document i are ends[i - 1]:ends[i]
+        self.ends = np.cumsum(sizes, dtype=np.int64)
+        cumulative = np.concatenate([[0], np.cumsum(self.counts, dtype=np.int64)])
+        self.lengths = np.diff(cumulative[np.concatenate([[0], self.ends])]).astype(np.float64)
+
+    def __len__(self):
+        return len(self.ends)
+
+    def match(self, query_terms):
+        """
+        Entries whose term is a query term
+
+        Returns:
+            (entry indices, position of their term in query_terms)
+        """
+        if not len(query_terms) or not len(self.term_ids):
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty
+        # Direct lookup table: much faster than searching every entry
+        lookup = np.full(int(max(query_terms.max(), self.term_ids.max())) + 1, -1, dtype=np.int32)
+        lookup[query_terms] = np.arange(len(query_terms), dtype=np.int32)
+        positions = lookup[self.term_ids]
+        entries = np.flatnonzero(positions >= 0)
+        return entries, positions[entries]
+
+    def rows(self, entries):
+        """Document of each entry"""
+        return np.searchsorted(self.ends, entries, side='right')
+
+
+class Bm25Scorer(Scorer):
+    """
+    Okapi BM25 over the job description's terms
+
+    Term frequency saturates (BM25_K1) and is normalized by resume length
+    (BM25_B), so repeating keywords or padding a resume gains little.
+    Document frequencies and the average length are computed once per job
+    by score_many() and stored in JobBm25Model; scoring one resume is then a
+    lookup of the query terms in its term counts. Scores are scaled to 0-100
+    by the largest score any resume could reach.
+    """
+    label = 'BM25 relevance'
+
+    def fit(self, job, stacked, query_terms, matched):
+        """Store the job's BM25 statistics; matched is stacked.match(query_terms)"""
+        from .models import JobBm25Model
+
+        _, positions = matched
+        document_frequencies = np.bincount(positions, minlength=len(query_terms))
+        document_count = len(stacked)
+        model, _ = JobBm25Model.objects.update_or_create(
+            job=job,
+            defaults={
+                'description_hash': description_hash(job.description),
+                'query_terms': query_terms.astype(np.uint32).tobytes(),
+                'document_frequencies': document_frequencies.astype(np.uint32).tobytes(),
+                'document_count': document_count,
+                'average_length': float(stacked.lengths.mean()) if document_count else 0.0,
+            },
+        )
+        job.bm25_model = model
+        return model
+
+    def _scores(self, model, stacked, matched=None):
+        query_terms = np.frombuffer(bytes(model.query_terms), dtype=np.uint32)
+        document_frequencies = np.frombuffer(bytes(model.document_frequencies), dtype=np.uint32)
+        document_frequencies = document_frequencies.astype(np.float64)
+        # Lucene's non-negative BM25 IDF
+        idf = np.log(1 + (model.document_count - document_frequencies + 0.5) / (document_frequencies + 0.5))
+        k1, b = settings.BM25_K1, settings.BM25_B
+        maximum = (idf * (k1 + 1)).sum()
+        if not len(stacked) or not maximum:
+            return np.zeros(len(stacked))
+
+        entries, positions = matched if matched is not None else stacked.match(query_terms)
+        rows = stacked.rows(entries)
+        frequencies = stacked.counts[entries].astype(np.float64)
+        average_length = model.average_length or 1.0
+        norms = k1 * (1 - b + b * stacked.lengths[rows] / average_length)
+        contributions = idf[positions] * frequencies * (k1 + 1) / (frequencies + norms)
+        scores = np.bincount(rows, weights=contributions, minlength=len(stacked))
+        return np.round(scores / maximum * 100, 2)
+
+    def score_many(self, job, applications):
+        stacked = _StackedTermCounts([bytes(application.term_counts) for application in applications])
+        query_terms = np.unique(unpack_term_counts(encode_text(job.description))[0])
+        # One pass over every entry serves both the statistics and the scores
+        matched = stacked.match(query_terms)
+        return self._scores(self.fit(job, stacked, query_terms, matched), stacked, matched)
+
+    def _model(self, job):
+        from .models import JobBm25Model
+
+        try:
+            # Cached on the job instance after the first access
+            model = job.bm25_model
+        except JobBm25Model.DoesNotExist:
+            return None
+        if model.description_hash != description_hash(job.description):
+            return None
+        return model
+
+    def score(self, job, application):
+        model = self._model(job)
+        if model is None:
+            return None
+        return float(self._scores(model, _StackedTermCounts([bytes(application.term_counts)]))[0])
+
+    def needs_rerank(self, job):
+        model = self._model(job)
+        if model is None:
+            return True
+        return job.scored_count >= max(model.document_count, 1) * settings.MATCH_MODEL_REFIT_FACTOR
+
+
+@functools.lru_cache(maxsize=None)
+def _load_scorer(path):
+    return import_string(path)()
+
+
+def get_scorer(name):
+    """
+    Scorer registered under a name in settings.MATCH_SCORERS
+
+    Unknown names fall back to settings.MATCH_SCORER_DEFAULT.
+
+    Args:
+        name: Scorer name, e.g. a job's scoring_backend
+
+    Returns:
+        Scorer instance
+    """
+    path = settings.MATCH_SCORERS.get(name)
+    if path is None:
+        logger.warning(f"Unknown scorer {name!r}, using {settings.MATCH_SCORER_DEFAULT!r}")
+        path = settings.MATCH_SCORERS[settings.MATCH_SCORER_DEFAULT]
+    return _load_scorer(path)
+
+
+def scorer_choices():
+    """(name, label) pairs of the configured scorers, for forms"""
+    return [
+        (name, _load_scorer(path).label or name)
+        for name, path in settings.MATCH_SCORERS.items()
+    ]
@@ -0,0 +1,146 @@
+import logging
+import re
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import F, Q
+
+logger = logging.getLogger(__name__)
+
+# "quoted phrases" or bare terms
+QUERY_PATTERN = re.compile(r'"([^"]+)"|(\S+)')
+
+FTS_TABLE = 'applications_application_fts'
+
+# Application fields kept in the full-text index
+INDEXED_FIELDS = ('name', 'email', 'resume_text')
+
+
+def parse_query(query):
+    """Split a search string into phrases and single terms"""
+    parts = []
+    for phrase, term in QUERY_PATTERN.findall(query or ''):
+        part = (phrase or term).strip()
+        if part:
+            parts.append(part)
+    return parts
+
+
+def _fts5_query(parts):
+    # Every part becomes an FTS5 string, i.e. a phrase; parts are ANDed
+    return ' '.join('"' + part.replace('"', '""') + '"' for part in parts)
+
+
+def index_application(application):
+    """
+    Update the full-text index entry of an application
+
+    PostgreSQL stores a weighted tsvector (name, email > resume text) on the
+    row; SQLite keeps a row in an FTS5 virtual table keyed by the application
+    id. Both are built from the stored row. Called by a post_save signal
+    whenever one of INDEXED_FIELDS changes.
+
+    Args:
+        application: Saved Application instance
+    """
+    from .models import Application
+
+    if connection.vendor == 'postgresql':
+        Application.objects.filter(pk=application.pk).update(
+            search_vector=(
+                SearchVector('name', 'email', weight='A', config='english')
+                + SearchVector('resume_text', weight='B', config='english')
+            )
+        )
+    elif connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [application.pk])
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, name, email, resume_text) '
+                'SELECT id, name, email, resume_text FROM applications_application WHERE id = %s',
+                [application.pk],
+            )
+
+
+def remove_application(application_id):
+    """Drop an application from the SQLite full-text table"""
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [application_id])
+
+
+def search_applications(query, job_id=None, limit=50):
+    """
+    Full-text search over applicant names, emails and resume text
+
+    Supports "quoted phrases"; all terms and phrases must match. Results are
+    ordered by text relevance, best first, and carry a search_rank attribute.
+
+    Args:
+        query: Search string
+        job_id: Optional job to restrict the search to
+        limit: Maximum number of results
+
+    Returns:
+        List of Application instances (listing columns plus job title)
+    """
+    from .models import Application, ApplicationQuerySet
+
+    parts = parse_query(query)
+    if not parts:
+        return []
+
+    applications = Application.objects.select_related('job').only(
+        *ApplicationQuerySet.LISTING_FIELDS, 'job__title'
+    )
+    if job_id:
+        applications = applications.filter(job_id=job_id)
+
+    if connection.vendor == 'postgresql':
+        search_query = SearchQuery(query, search_type='websearch', config='english')
+        return list(
+            applications
+            .filter(search_vector=search_query)
+            .annotate(search_rank=SearchRank(F('search_vector'), search_query))
+            .order_by('-search_rank', '-match_score')[:limit]
+        )
+
+    if connection.vendor == 'sqlite':
+        sql = (
+            f'SELECT fts.rowid, bm25({FTS_TABLE}, 10.0, 10.0, 1.0) AS score '
+            f'FROM {FTS_TABLE} AS fts '
+        )
+        params = [_fts5_query(parts)]
+        if job_id:
+            sql += (
+                'JOIN applications_application AS application ON application.id = fts.rowid '
+                f'WHERE {FTS_TABLE} MATCH %s AND application.job_id = %s '
+            )
+            params.append(job_id)
+        else:
+            sql += f'WHERE {FTS_TABLE} MATCH %s '
+        sql += 'ORDER BY score LIMIT %s'
+        params.append(limit)
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            # bm25() is lower-is-better; flip it so higher ranks are better
+            ranks = {pk: -score for pk, score in cursor.fetchall()}
+        found = applications.in_bulk(list(ranks))
+        results = []
+        for pk, rank in ranks.items():
+            if pk in found:
+                found[pk].search_rank = rank
+                results.append(found[pk])
+        return results
+
+    # Other backends: unindexed substring match
+    logger.warning(f"No full-text index for {connection.vendor}, falling back to a scan")
+    condition = Q()
+    for part in parts:
+        condition &= (
+            Q(name__icontains=part) | Q(email__icontains=part) | Q(resume_text__icontains=part)
+        )
+    results = list(applications.filter(condition).order_by('-match_score')[:limit])
+    for application in results:
+        application.search_rank = 0.0
+    return results
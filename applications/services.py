@@ -1,71 +1,225 @@
 import pdfplumber
+import numpy as np
 from docx import Document
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
-from django.db import transaction
+from sklearn.preprocessing import normalize
+from scipy import sparse
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from collections import OrderedDict
+from datetime import timedelta
+import hashlib
 import os
 import logging
+from . import metrics
+from .metrics import APPLICATIONS_SCORED, RESUME_BYTES_PARSED, RESUMES_EXTRACTED, STAGE_SECONDS
 
 logger = logging.getLogger(__name__)
 
+# Same tokenization, lowercasing and stop-word filtering as the TF-IDF scorer
+analyze_text = TfidfVectorizer(stop_words='english', lowercase=True).build_analyzer()
 
-def extract_text_from_pdf(file_path):
-    """Extract text from a PDF file using pdfplumber"""
-    try:
-        with pdfplumber.open(file_path) as pdf:
-            text = ''
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + '\n'
-            return text.strip()
-    except Exception as e:
-        logger.error(f"Error extracting text from PDF {file_path}: {e}")
-        return ''
+# Longest term stored in the Term dictionary; longer tokens are noise
+MAX_TERM_LENGTH = 100
+
+
+def extract_text_from_pdf(file_path, start=0, stop=None):
+    """
+    Extract text from a PDF file using pdfplumber
+
+    Args:
+        file_path: Path to the PDF
+        start: First page to extract (0-based)
+        stop: Page to stop before (default: RESUME_EXTRACTION_MAX_PAGES)
+
+    Raises pdfplumber's errors for unreadable files, so callers can tell them
+    apart from a PDF without text.
+    """
+    max_pages = settings.RESUME_EXTRACTION_MAX_PAGES
+    if stop is None or (max_pages and stop > max_pages):
+        stop = max_pages or None
+    with pdfplumber.open(file_path) as pdf:
+        parts = []
+        for page in pdf.pages[start:stop]:
+            page_text = page.extract_text()
+            if page_text:
+                parts.append(page_text)
+            # Release parsed layout objects as we go
+            page.flush_cache()
+        return '\n'.join(parts).strip()
 
 
 def extract_text_from_docx(file_path):
-    """Extract text from a DOCX file using python-docx"""
-    try:
-        doc = Document(file_path)
-        text = '\n'.join([paragraph.text for paragraph in doc.paragraphs])
-        return text.strip()
-    except Exception as e:
-        logger.error(f"Error extracting text from DOCX {file_path}: {e}")
-        return ''
+    """Extract text from a DOCX file using python-docx; raises for unreadable files"""
+    doc = Document(file_path)
+    text = '\n'.join([paragraph.text for paragraph in doc.paragraphs])
+    return text.strip()
+
+
+def extract_text_from_file(file_path):
+    """Extract text from a PDF or DOCX file in the current process"""
+    file_extension = os.path.splitext(file_path)[1].lower()
+    if file_extension == '.pdf':
+        return extract_text_from_pdf(file_path)
+    elif file_extension == '.docx':
+        return extract_text_from_docx(file_path)
+    logger.warning(f"Unsupported file type: {file_extension}")
+    return ''
 
 
 def extract_resume_text(resume_file):
     """
     Extract text from resume based on file type
+    Runs on the extraction process pool with its timeout and memory limits
     
     Args:
         resume_file: Django FileField object
         
     Returns:
         Extracted text as string
+
+    Raises:
+        ExtractionError: The file timed out, crashed its worker or could not
+            be parsed; retrying later may succeed
     """
-    try:
-        file_path = resume_file.path
-        file_extension = os.path.splitext(file_path)[1].lower()
-        
-        logger.info(f"Extracting text from {file_extension} file: {file_path}")
-        
-        if file_extension == '.pdf':
-            return extract_text_from_pdf(file_path)
-        elif file_extension == '.docx':
-            return extract_text_from_docx(file_path)
+    from .extraction import ExtractionError, extract_many
+
+    file_path = resume_file.path
+    logger.info(f"Extracting text from {file_path}")
+    text = extract_many([file_path])[0]
+    if text is None:
+        raise ExtractionError(f"Could not extract text from {file_path}")
+    return text
+
+
+def hash_file(uploaded_file):
+    """SHA-256 hex digest of an uploaded file, read in chunks"""
+    digest = hashlib.sha256()
+    for chunk in uploaded_file.chunks():
+        digest.update(chunk)
+    uploaded_file.seek(0)
+    return digest.hexdigest()
+
+
+def attach_resume_blob(application, uploaded_file):
+    """
+    Point an unsaved application at the shared blob for its resume content
+
+    The upload is hashed on arrival. If the same bytes were uploaded before,
+    the existing stored file is reused and the new upload is never written;
+    otherwise it is stored once as a new ResumeBlob.
+
+    Args:
+        application: Unsaved Application instance
+        uploaded_file: UploadedFile from the application form
+
+    Returns:
+        Name of the file stored for a new blob, or None if an existing blob
+        was reused. Files are written before the caller's transaction
+        commits, so the caller deletes it if that transaction fails.
+    """
+    from .models import ResumeBlob
+
+    sha256 = getattr(uploaded_file, 'sha256', None) or hash_file(uploaded_file)
+    while True:
+        stored = None
+        blob = ResumeBlob.objects.filter(sha256=sha256).first()
+        if blob is None:
+            blob = ResumeBlob(sha256=sha256, size=uploaded_file.size)
+            blob.file.save(uploaded_file.name, uploaded_file, save=False)
+            try:
+                with transaction.atomic():
+                    blob.save(force_insert=True)
+            except IntegrityError:
+                # Stored concurrently by another request; keep theirs
+                blob.file.delete(save=False)
+                continue
+            stored = blob.file.name
+            logger.info(f"Stored new resume blob {sha256[:12]}")
         else:
-            logger.warning(f"Unsupported file type: {file_extension}")
-            return ''
-    except Exception as e:
-        logger.error(f"Error extracting resume text: {e}")
-        return ''
+            logger.info(f"Reusing resume blob {sha256[:12]}")
+
+        # Fails if release_resume_blob deleted the blob since it was read
+        if ResumeBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1):
+            break
+        logger.info(f"Resume blob {sha256[:12]} was released concurrently, storing it again")
+
+    application.resume_blob = blob
+    application.resume = blob.file.name
+    return stored
+
+
+def release_resume_blob(blob_id):
+    """
+    Drop one reference to a resume blob, deleting it and its file at zero
+
+    The row is locked while its count is checked, so a concurrent
+    attach_resume_blob either increments it first or finds it deleted.
+
+    Args:
+        blob_id: Primary key of the ResumeBlob
+    """
+    from .models import ResumeBlob
+
+    with transaction.atomic():
+        # SQLite has no row locks; its transactions already serialize writes
+        blobs = ResumeBlob.objects.filter(pk=blob_id)
+        if connection.features.has_select_for_update:
+            blobs = blobs.select_for_update()
+        blob = blobs.first()
+        if blob is None:
+            return
+        if blob.ref_count > 1:
+            ResumeBlob.objects.filter(pk=blob_id).update(ref_count=F('ref_count') - 1)
+            return
+        file_name = blob.file.name
+        storage = blob.file.storage
+        blob.delete()
+    # Only remove the file once the deletion is committed
+    transaction.on_commit(lambda: storage.delete(file_name))
+    logger.info(f"Deleted unreferenced resume blob {blob.sha256[:12]}")
+
+
+def extract_application_resume(application):
+    """
+    Extract text and term counts for an application, reusing its blob's cache
+
+    Re-applications with an already extracted file skip pdfplumber entirely.
+    Sets resume_text and term_counts on the application without saving it.
+    A blob is only marked extracted once extraction succeeded; failures
+    raise ExtractionError so the queue retries the task.
+
+    Args:
+        application: Application model instance
+    """
+    blob = application.resume_blob
+    if blob is not None and blob.extracted:
+        logger.info(f"Extraction cache hit for application {application.pk}")
+        application.resume_text = blob.text
+        application.term_counts = blob.term_counts
+        RESUMES_EXTRACTED.inc(source='cache')
+        return
+
+    application.resume_text = extract_resume_text(application.resume)
+    index_resume(application, save=False)
+    RESUMES_EXTRACTED.inc(source='parsed')
+    if metrics.enabled():
+        # Sizing a file without a blob stats storage, so only when recorded
+        RESUME_BYTES_PARSED.inc(blob.size if blob is not None else application.resume.size)
+    if blob is not None:
+        blob.text = application.resume_text
+        blob.term_counts = application.term_counts
+        blob.extracted = True
+        blob.save(update_fields=['text', 'term_counts', 'extracted'])
 
 
 def calculate_match_score(job_description, resume_text):
     """
     Calculate similarity score between job description and resume using TF-IDF
+    Standalone pairwise reference; ranking goes through applications.scoring
     
     Args:
         job_description: Job description text
@@ -103,52 +257,554 @@ def calculate_match_score(job_description, resume_text):
         return 0.0
 
 
+def description_hash(description):
+    """Stable hash of a job description, used to detect stale scoring models"""
+    return hashlib.sha256(description.encode('utf-8')).hexdigest()
+
+
+def count_terms(text):
+    """Analyze text once and return a {term: count} dict"""
+    counts = {}
+    for term in analyze_text(text or ''):
+        if len(term) <= MAX_TERM_LENGTH:
+            counts[term] = counts.get(term, 0) + 1
+    return counts
+
+
+def get_term_ids(terms, create=True):
+    """
+    Map terms to their ids in the global Term dictionary, creating missing ones
+
+    Args:
+        terms: Iterable of term strings
+        create: Add unknown terms to the dictionary; otherwise they are left out
+
+    Returns:
+        Dict of {term: term_id}
+    """
+    from .models import Term
+
+    terms = list(set(terms))
+    term_ids = {}
+    for start in range(0, len(terms), 500):
+        chunk = terms[start:start + 500]
+        term_ids.update(Term.objects.filter(text__in=chunk).values_list('text', 'pk'))
+    missing = [term for term in terms if term not in term_ids]
+    if missing and create:
+        Term.objects.bulk_create([Term(text=term) for term in missing], ignore_conflicts=True)
+        for start in range(0, len(missing), 500):
+            chunk = missing[start:start + 500]
+            term_ids.update(Term.objects.filter(text__in=chunk).values_list('text', 'pk'))
+    return term_ids
+
+
+def pack_term_counts(counts):
+    """Serialize {term_id: count} as sorted uint32 (term_id, count) pairs"""
+    pairs = np.array(sorted(counts.items()), dtype=np.uint32).reshape(-1, 2)
+    return pairs.tobytes()
+
+
+def unpack_term_counts(blob):
+    """Inverse of pack_term_counts, returns (term_ids, counts) arrays"""
+    pairs = np.frombuffer(bytes(blob or b''), dtype=np.uint32).reshape(-1, 2)
+    return pairs[:, 0], pairs[:, 1]
+
+
+def encode_text(text):
+    """Analyze text and return its packed term counts"""
+    counts = count_terms(text)
+    term_ids = get_term_ids(counts)
+    return pack_term_counts({term_ids[term]: count for term, count in counts.items()})
+
+
+def index_resume(application, save=True):
+    """
+    Store the tokenized term counts of an application's resume
+
+    Resumes never change after upload, so this runs once at extraction time
+    and every later rerank reuses the stored counts instead of the text.
+
+    Args:
+        application: Application model instance with resume_text populated
+        save: Persist term_counts immediately
+    """
+    application.term_counts = encode_text(application.resume_text)
+    if save:
+        application.save(update_fields=['term_counts'])
+
+
+def _index_missing_term_counts(applications):
+    """Backfill term counts for applications extracted before they were stored"""
+    from .models import Application
+
+    missing = [application for application in applications if not application.term_counts]
+    if not missing:
+        return
+    texts = dict(
+        Application.objects
+        .filter(pk__in=[application.pk for application in missing])
+        .values_list('pk', 'resume_text')
+    )
+    for application in missing:
+        application.resume_text = texts.get(application.pk, '')
+        index_resume(application, save=False)
+    Application.objects.bulk_update(missing, ['term_counts'])
+    logger.info(f"Backfilled term counts for {len(missing)} applications")
+
+
+def _pack_sparse_vector(vector):
+    """Serialize a 1xN sparse row as int32 indices followed by float32 values"""
+    return (
+        vector.indices.astype(np.int32).tobytes()
+        + vector.data.astype(np.float32).tobytes()
+    )
+
+
+def _unpack_sparse_vector(blob, size):
+    """Inverse of _pack_sparse_vector, returns a dense float64 vector"""
+    blob = bytes(blob)
+    half = len(blob) // 2
+    indices = np.frombuffer(blob[:half], dtype=np.int32)
+    values = np.frombuffer(blob[half:], dtype=np.float32)
+    dense = np.zeros(size, dtype=np.float64)
+    dense[indices] = values
+    return dense
+
+
+def count_matrix(term_count_blobs, vocabulary):
+    """
+    Build a sparse document-term count matrix from packed term counts
+
+    Args:
+        term_count_blobs: List of packed term counts, one per document
+        vocabulary: Sorted numpy array of term ids; column i is vocabulary[i]
+
+    Returns:
+        scipy CSR matrix of shape (documents, len(vocabulary))
+    """
+    rows, columns, data = [], [], []
+    for row, blob in enumerate(term_count_blobs):
+        term_ids, counts = unpack_term_counts(blob)
+        positions = np.searchsorted(vocabulary, term_ids)
+        positions = np.minimum(positions, max(len(vocabulary) - 1, 0))
+        known = vocabulary[positions] == term_ids if len(vocabulary) else np.zeros(0, bool)
+        rows.append(np.full(known.sum(), row, dtype=np.int32))
+        columns.append(positions[known])
+        data.append(counts[known])
+    if not rows:
+        return sparse.csr_matrix((0, len(vocabulary)), dtype=np.float64)
+    return sparse.csr_matrix(
+        (
+            np.concatenate(data).astype(np.float64),
+            (np.concatenate(rows), np.concatenate(columns)),
+        ),
+        shape=(len(term_count_blobs), len(vocabulary)),
+    )
+
+
+class FittedJobModel:
+    """
+    In-memory view of a JobScoringModel ready to score resumes
+
+    Resumes are scored from their stored term counts; the vocabulary and IDF
+    weights come from the persisted model, so no text is reparsed.
+    """
+
+    def __init__(self, scoring_model):
+        self.pk = scoring_model.pk
+        self.job_id = scoring_model.job_id
+        self.description_hash = scoring_model.description_hash
+        self.document_count = scoring_model.document_count
+        self.fitted_at = scoring_model.fitted_at
+        self.vocabulary = np.array(scoring_model.vocabulary, dtype=np.uint32)
+        if len(self.vocabulary):
+            self.idf = np.frombuffer(bytes(scoring_model.idf), dtype=np.float32)
+            self.job_vector = _unpack_sparse_vector(scoring_model.job_vector, len(self.vocabulary))
+        else:
+            self.idf = None
+            self.job_vector = None
+
+    def transform(self, term_count_blobs):
+        """L2-normalized TF-IDF matrix for packed term counts"""
+        matrix = count_matrix(term_count_blobs, self.vocabulary)
+        return normalize(matrix.multiply(self.idf).tocsr())
+
+    def score(self, term_counts):
+        """Match score (0-100) of a single resume against the job"""
+        return float(self.score_many([term_counts])[0])
+
+    def score_many(self, term_count_blobs):
+        """
+        Match scores (0-100) of many resumes in one sparse matrix-vector product
+
+        Args:
+            term_count_blobs: List of packed term counts
+
+        Returns:
+            numpy array of scores, aligned with term_count_blobs
+        """
+        if not term_count_blobs or self.job_vector is None:
+            return np.zeros(len(term_count_blobs))
+        # Rows are L2-normalized, so the dot product is the cosine similarity
+        similarities = self.transform(term_count_blobs) @ self.job_vector
+        return np.round(similarities * 100, 2)
+
+    def needs_refit(self, document_count):
+        """True once the corpus has grown enough for the IDF weights to drift"""
+        return document_count >= max(self.document_count, 1) * settings.MATCH_MODEL_REFIT_FACTOR
+
+
+# Small per-process cache so repeated scoring skips deserializing the model
+_loaded_models = OrderedDict()
+_LOADED_MODELS_MAX = 128
+
+
+def _load_fitted_model(scoring_model):
+    key = (scoring_model.pk, scoring_model.description_hash, scoring_model.fitted_at)
+    fitted = _loaded_models.get(key)
+    if fitted is None:
+        fitted = FittedJobModel(scoring_model)
+        _loaded_models[key] = fitted
+        if len(_loaded_models) > _LOADED_MODELS_MAX:
+            _loaded_models.popitem(last=False)
+    else:
+        _loaded_models.move_to_end(key)
+    return fitted
+
+
+def fit_job_model(job, term_count_blobs=None):
+    """
+    Fit and persist the TF-IDF model for a job
+
+    IDF weights are computed once over the job description plus the stored
+    term counts of its applicants, matching TfidfVectorizer's smoothed IDF
+    and max_features selection without retokenizing any resume.
+
+    Args:
+        job: Job model instance
+        term_count_blobs: Optional list of packed term counts, loaded from the DB if omitted
+
+    Returns:
+        FittedJobModel
+    """
+    from .models import Application, JobScoringModel
+
+    if term_count_blobs is None:
+        applications = list(
+            Application.objects
+            .filter(job=job)
+            .exclude(resume_text='')
+            .only('pk', 'term_counts')
+            .order_by()
+        )
+        _index_missing_term_counts(applications)
+        term_count_blobs = [application.term_counts for application in applications]
+    term_count_blobs = [blob for blob in term_count_blobs if blob]
+
+    description_counts = encode_text(job.description)
+    documents = [description_counts] + term_count_blobs
+
+    # Corpus-wide term and document frequencies
+    all_ids = np.concatenate([unpack_term_counts(blob)[0] for blob in documents])
+    all_counts = np.concatenate([unpack_term_counts(blob)[1] for blob in documents])
+    term_ids, inverse = np.unique(all_ids, return_inverse=True)
+    frequencies = np.bincount(inverse, weights=all_counts, minlength=len(term_ids))
+    document_frequencies = np.bincount(inverse, minlength=len(term_ids))
+
+    max_features = settings.MATCH_SCORE_MAX_FEATURES
+    if max_features and len(term_ids) > max_features:
+        keep = np.sort(np.argsort(-frequencies, kind='stable')[:max_features])
+        term_ids, document_frequencies = term_ids[keep], document_frequencies[keep]
+
+    vocabulary = term_ids.astype(np.uint32)
+    if len(vocabulary):
+        # Smoothed IDF, as TfidfVectorizer(smooth_idf=True)
+        idf = np.log((1 + len(documents)) / (1 + document_frequencies)) + 1
+        job_row = normalize(count_matrix([description_counts], vocabulary).multiply(idf).tocsr())
+        idf_blob = idf.astype(np.float32).tobytes()
+        job_vector = _pack_sparse_vector(job_row)
+    else:
+        # Empty vocabulary, e.g. a description made only of stop words
+        logger.warning(f"Could not fit scoring model for job {job.pk}: empty vocabulary")
+        idf_blob, job_vector = b'', b''
+
+    scoring_model, _ = JobScoringModel.objects.update_or_create(
+        job=job,
+        defaults={
+            'description_hash': description_hash(job.description),
+            'vocabulary': vocabulary.tolist(),
+            'idf': idf_blob,
+            'job_vector': job_vector,
+            'document_count': len(term_count_blobs),
+        },
+    )
+    logger.info(f"Fitted scoring model for job {job.pk} on {len(term_count_blobs)} resumes")
+    return _load_fitted_model(scoring_model)
+
+
+def get_job_model(job):
+    """
+    Return the persisted scoring model for a job, fitting it if missing or stale
+
+    Args:
+        job: Job model instance
+
+    Returns:
+        FittedJobModel
+    """
+    from .models import JobScoringModel
+
+    try:
+        scoring_model = JobScoringModel.objects.get(job=job)
+    except JobScoringModel.DoesNotExist:
+        return fit_job_model(job)
+
+    if scoring_model.description_hash != description_hash(job.description):
+        return fit_job_model(job)
+    return _load_fitted_model(scoring_model)
+
+
+def invalidate_job_model(job):
+    """Drop the persisted scoring model of a job, e.g. after a description edit"""
+    from .models import JobScoringModel
+
+    JobScoringModel.objects.filter(job=job).delete()
+    for key in [key for key, fitted in _loaded_models.items() if fitted.job_id == job.pk]:
+        del _loaded_models[key]
+    logger.info(f"Invalidated scoring model for job {job.pk}")
+
+
+def schedule_rerank(job, rescore=True):
+    """
+    Mark a job's ranking as dirty
+
+    Queues one task per job: further calls before it runs are coalesced
+    into it, and it runs RERANK_DEBOUNCE_SECONDS after the first call, so a
+    burst of applications costs a single rerank.
+
+    Args:
+        job: Job model instance
+        rescore: Rescore every application (rerank_job); otherwise only
+            refresh the materialized ranks (update_job_ranks)
+
+    Returns:
+        The pending QueuedTask
+    """
+    from .queue import enqueue
+
+    name = 'rerank_job' if rescore else 'update_job_ranks'
+    # Eager mode only runs tasks that are already due
+    delay = 0 if settings.TASK_QUEUE_EAGER else settings.RERANK_DEBOUNCE_SECONDS
+    return enqueue(
+        name,
+        job.pk,
+        run_after=timezone.now() + timedelta(seconds=delay),
+        dedupe_key=f'{name}:{job.pk}',
+    )
+
+
+def score_application(application):
+    """
+    Score a single application against its job without rescoring the others
+
+    Scoring goes through the job's scorer (see applications.scoring). With
+    the default TF-IDF scorer the resume's stored term counts are scored with
+    the job's persisted model, so the cost of a submission does not grow with
+    the number of applicants. The model's IDF weights drift slightly as new
+    resumes arrive; once the scored corpus has grown by MATCH_MODEL_REFIT_FACTOR
+    (2x by default) the application is still scored with the current model
+    and a coalesced rerank of the job is scheduled (see schedule_rerank).
+    Between refits, terms first seen since the last fit are left out, so a
+    new resume can score noticeably above its full-rerank score; the refit
+    schedule bounds how long that lasts and keeps total work linear in the
+    number of applicants.
+
+    Args:
+        application: Application model instance with resume_text populated
+
+    Returns:
+        Match score as float (0-100)
+    """
+    from .scoring import get_scorer
+
+    job = application.job
+    if application.resume_text and not application.term_counts:
+        index_resume(application)
+
+    scorer = get_scorer(job.scoring_backend)
+    score = scorer.score(job, application) if application.resume_text else 0.0
+    if score is not None:
+        application.match_score = score
+        application.save(update_fields=['match_score'])
+        APPLICATIONS_SCORED.inc(mode='incremental', scorer=job.scoring_backend)
+        logger.info(f"Scored application {application.pk} for job {job.pk}: {score}")
+
+    if score is None or (application.resume_text and scorer.needs_rerank(job)):
+        schedule_rerank(job)
+    elif application.resume_text:
+        # Positions of the other applicants move too
+        schedule_rerank(job, rescore=False)
+    return application.match_score
+
+
+def update_rows(model, fields, rows, batch_size=2000):
+    """
+    Write per-row values of a few columns, a batch of rows per statement
+
+    bulk_update() compiles a CASE WHEN branch per row and field in Python,
+    which dominates a rerank of thousands of applicants. This sends plain
+    parameterized UPDATEs instead: executemany() of one UPDATE on SQLite and
+    other backends, UPDATE ... FROM (VALUES ...) on PostgreSQL. Like
+    bulk_update() it sends no signals; run it inside a transaction to keep
+    the write atomic.
+
+    Args:
+        model: Model class
+        fields: Names of the fields to write
+        rows: Sequence of (pk, value, ...) tuples, values aligned with fields
+    """
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    pk_column = quote(model._meta.pk.column)
+    fields = [model._meta.get_field(name) for name in fields]
+    columns = [quote(field.column) for field in fields]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            types = [model._meta.pk.db_type(connection)] + [field.db_type(connection) for field in fields]
+            names = ['pk'] + [f'c{position}' for position in range(len(fields))]
+            assignments = ', '.join(
+                f'{column} = v.{name}::{db_type}'
+                for column, name, db_type in zip(columns, names[1:], types[1:])
+            )
+            row_sql = '(' + ', '.join(['%s'] * len(names)) + ')'
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+                cursor.execute(
+                    f'UPDATE {table} SET {assignments} '
+                    f'FROM (VALUES {", ".join([row_sql] * len(batch))}) AS v({", ".join(names)}) '
+                    f'WHERE {table}.{pk_column} = v.pk::{types[0]}',
+                    [value for row in batch for value in row],
+                )
+        else:
+            assignments = ', '.join(f'{column} = %s' for column in columns)
+            cursor.executemany(
+                f'UPDATE {table} SET {assignments} WHERE {pk_column} = %s',
+                [(*row[1:], row[0]) for row in rows],
+            )
+
+
+def rank_scores(scores):
+    """
+    Dense ranks and percentile ranks of match scores
+
+    Equal scores share a rank. The percentile is the share of applicants
+    scoring lower, counting ties as half (0-100).
+
+    Args:
+        scores: Sequence of match scores
+
+    Returns:
+        (ranks, percentiles) numpy arrays aligned with scores
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    if not len(scores):
+        return np.zeros(0, dtype=np.int64), np.zeros(0)
+    distinct, inverse, counts = np.unique(scores, return_inverse=True, return_counts=True)
+    ranks = len(distinct) - inverse
+    below = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    percentiles = (below[inverse] + 0.5 * counts[inverse]) / len(scores) * 100
+    return ranks, np.round(percentiles, 1)
+
+
+@transaction.atomic
+def update_ranks(job):
+    """
+    Rewrite the materialized ranks of a job from its stored match scores
+
+    Much cheaper than a rerank: nothing is rescored, only positions move
+    after incremental scores came in.
+
+    Args:
+        job: Job model instance
+    """
+    from .models import Application
+
+    applications = list(
+        Application.objects
+        .filter(job=job)
+        .exclude(resume_text='')
+        .only('pk', 'match_score')
+        .order_by()
+    )
+    ranks, percentiles = rank_scores([application.match_score for application in applications])
+    update_rows(Application, ['rank', 'percentile'], [
+        (application.pk, int(rank), float(percentile))
+        for application, rank, percentile in zip(applications, ranks, percentiles)
+    ])
+    logger.info(f"Updated ranks of {len(applications)} applications for job {job.pk}")
+
+
 @transaction.atomic
 def rerank_applications(job):
     """
-    Recompute match scores for all applications of a given job
-    Uses PostgreSQL row-level locking and bulk update for efficiency
+    Recompute match scores for all of a job's applications with its scorer
+    The scorer gets every application in one score_many() call (for TF-IDF:
+    a model refit and one sparse matrix-vector product); scores are written
+    back with one bulk update
     
     Args:
         job: Job model instance
+    
+    Returns:
+        Number of applications reranked
     """
     from .models import Application
+    from .scoring import get_scorer
     
+    scorer = get_scorer(job.scoring_backend)
     logger.info(f"Starting rerank for job {job.pk}")
     
     try:
-        # Get all applications for this job
-        # Use select_for_update for PostgreSQL row-level locking
-        # This prevents concurrent updates to the same applications
-        if USE_POSTGRES := os.getenv('USE_POSTGRES', 'False').lower() == 'true':
-            applications = list(
-                Application.objects
-                .select_for_update(skip_locked=True)
-                .filter(job=job)
-            )
-        else:
-            # Fallback for SQLite (doesn't support select_for_update)
-            applications = list(Application.objects.filter(job=job))
-        
-        if not applications:
-            logger.info(f"No applications to rerank for job {job.pk}")
-            return
+        # Only load the columns needed for scoring, never the resume text
+        queryset = (
+            Application.objects
+            .filter(job=job)
+            .exclude(resume_text='')
+            .only('pk', 'match_score', *scorer.fields)
+            .order_by()
+        )
+        if connection.features.has_select_for_update:
+            # Wait for, rather than skip, rows another rerank holds, so every
+            # row gets a fresh score (SQLite locks the whole database instead)
+            queryset = queryset.select_for_update()
+        with STAGE_SECONDS.time(operation='rerank', stage='load'):
+            applications = list(queryset)
+            if 'term_counts' in scorer.fields:
+                _index_missing_term_counts(applications)
         
-        # Calculate scores for all applications
-        updates = []
-        for application in applications:
-            if application.resume_text:
-                score = calculate_match_score(job.description, application.resume_text)
-                application.match_score = score
-                updates.append(application)
+        # Score every resume at once; scorers also refit their models here
+        with STAGE_SECONDS.time(operation='rerank', stage='score'):
+            scores = scorer.score_many(job, applications)
         
-        # Bulk update all scores at once (single database query)
-        if updates:
-            Application.objects.bulk_update(updates, ['match_score'], batch_size=100)
-            logger.info(f"Reranked {len(updates)} applications for job {job.pk}")
-        else:
+        if not applications:
             logger.info(f"No applications with resume text to rerank for job {job.pk}")
+            return 0
+        
+        with STAGE_SECONDS.time(operation='rerank', stage='write'):
+            ranks, percentiles = rank_scores(scores)
+            rows = []
+            for application, score, rank, percentile in zip(applications, scores, ranks, percentiles):
+                application.match_score = float(score)
+                application.rank = int(rank)
+                application.percentile = float(percentile)
+                rows.append((application.pk, application.match_score, application.rank, application.percentile))
+            
+            # One batched write, in this function's transaction
+            update_rows(Application, ['match_score', 'rank', 'percentile'], rows)
+        APPLICATIONS_SCORED.inc(len(applications), mode='rerank', scorer=job.scoring_backend)
+        logger.info(f"Reranked {len(applications)} applications for job {job.pk}")
+        return len(applications)
         
     except Exception as e:
         logger.error(f"Error reranking job {job.pk}: {e}")
-        raise
\ No newline at end of file
+        raise
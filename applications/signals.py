@@ -0,0 +1,143 @@
+from django.db.models import BooleanField, ExpressionWrapper, F, Q
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from jobs.models import Job
+from .cache import invalidate
+from .models import Application
+from .search import INDEXED_FIELDS, index_application, remove_application
+from .services import release_resume_blob
+
+
+def _decrement(field):
+    # Never below zero, even if a counter has drifted
+    return Greatest(F(field) - 1, 0)
+
+
+def _saved(field, update_fields):
+    return update_fields is None or field in update_fields
+
+
+def _remember_stored_state(instance):
+    stored = Application.objects.filter(pk=instance.pk).values_list(
+        'status', ExpressionWrapper(~Q(resume_text=''), output_field=BooleanField()),
+    ).first()
+    if stored is not None:
+        instance._loaded_status, instance._loaded_scored = stored[0], bool(stored[1])
+
+
+def _adjust_scored_count(instance, job_id, delta):
+    """Move Job.scored_count, and the cached job's copy so scorers see it at once"""
+    Job.objects.filter(pk=job_id).update(
+        scored_count=F('scored_count') + 1 if delta > 0 else _decrement('scored_count')
+    )
+    if Application.job.is_cached(instance) and instance.job is not None:
+        instance.job.scored_count = max(instance.job.scored_count + delta, 0)
+
+
+@receiver(pre_save, sender=Application)
+def remember_state_before_save(sender, instance, update_fields=None, **kwargs):
+    """
+    Read the stored status and resume text state of an instance loaded without them
+
+    Instances from .only()/.defer() lack _loaded_status or _loaded_scored,
+    so changes on them would otherwise not move the counters.
+    """
+    if instance._state.adding:
+        return
+    if any(
+        not hasattr(instance, loaded) and field in instance.__dict__ and _saved(field, update_fields)
+        for field, loaded in (('status', '_loaded_status'), ('resume_text', '_loaded_scored'))
+    ):
+        _remember_stored_state(instance)
+
+
+@receiver(pre_delete, sender=Application)
+def remember_state_before_delete(sender, instance, **kwargs):
+    """The row is gone by post_delete, so deferred fields can't be loaded then"""
+    if not (hasattr(instance, '_loaded_status') and hasattr(instance, '_loaded_scored')):
+        _remember_stored_state(instance)
+
+
+@receiver(post_save, sender=Application)
+def update_job_counters_on_save(sender, instance, created, update_fields=None, **kwargs):
+    """Keep Job.application_count, scored_count and the per-status counters in step"""
+    if created:
+        Job.objects.filter(pk=instance.job_id).update(**{
+            'application_count': F('application_count') + 1,
+            Application.status_count_field(instance.status): F(
+                Application.status_count_field(instance.status)
+            ) + 1,
+        })
+        if instance.resume_text:
+            _adjust_scored_count(instance, instance.job_id, 1)
+    else:
+        if _saved('status', update_fields):
+            previous = getattr(instance, '_loaded_status', None)
+            if previous is not None and previous != instance.status:
+                old_field = Application.status_count_field(previous)
+                new_field = Application.status_count_field(instance.status)
+                Job.objects.filter(pk=instance.job_id).update(**{
+                    old_field: _decrement(old_field),
+                    new_field: F(new_field) + 1,
+                })
+        if _saved('resume_text', update_fields) and 'resume_text' in instance.__dict__:
+            previous = getattr(instance, '_loaded_scored', None)
+            if previous is not None and previous != bool(instance.resume_text):
+                _adjust_scored_count(instance, instance.job_id, 1 if instance.resume_text else -1)
+    if 'status' in instance.__dict__ and _saved('status', update_fields):
+        instance._loaded_status = instance.status
+    if 'resume_text' in instance.__dict__ and _saved('resume_text', update_fields):
+        instance._loaded_scored = bool(instance.resume_text)
+
+
+@receiver(post_delete, sender=Application)
+def update_job_counters_on_delete(sender, instance, **kwargs):
+    status = getattr(instance, '_loaded_status', None) or instance.status
+    status_field = Application.status_count_field(status)
+    counters = {
+        'application_count': _decrement('application_count'),
+        status_field: _decrement(status_field),
+    }
+    if getattr(instance, '_loaded_scored', False):
+        counters['scored_count'] = _decrement('scored_count')
+    Job.objects.filter(pk=instance.job_id).update(**counters)
+
+
+@receiver(post_delete, sender=Application)
+def release_application_resume(sender, instance, **kwargs):
+    """Drop the deleted application's reference to its shared resume file"""
+    if instance.resume_blob_id:
+        release_resume_blob(instance.resume_blob_id)
+
+
+@receiver(post_save, sender=Application)
+def reindex_application_for_search(sender, instance, created, update_fields=None, **kwargs):
+    """Refresh the full-text index when a searchable field was written"""
+    # Registered before invalidate_application_caches_on_save, which
+    # resets the content snapshot
+    if created or instance.content_changed(update_fields, fields=INDEXED_FIELDS):
+        index_application(instance)
+
+
+@receiver(post_delete, sender=Application)
+def remove_application_from_search(sender, instance, **kwargs):
+    remove_application(instance.pk)
+
+
+@receiver(post_save, sender=Application)
+def invalidate_application_caches_on_save(sender, instance, created, update_fields=None, **kwargs):
+    """
+    New cache versions for views listing this application's content
+
+    Score, rank and status writes leave cached results valid: views load
+    those columns fresh.
+    """
+    if created or instance.content_changed(update_fields):
+        invalidate('applications')
+    instance.remember_content()
+
+
+@receiver(post_delete, sender=Application)
+def invalidate_application_caches_on_delete(sender, instance, **kwargs):
+    invalidate('applications')
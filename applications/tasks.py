@@ -2,13 +2,17 @@ import logging
 from django.db import transaction
 from django.utils import timezone
 from datetime import timedelta
+from .queue import task
 
 logger = logging.getLogger(__name__)
 
 
+@task
 def extract_and_rank_resume(application_id: int) -> str:
     """
-    Extract resume text and rerank applications synchronously.
+    Extract resume text and score the application.
+
+    Runs on a queue worker; enqueued by the apply view.
 
     Args:
         application_id: ID of the application to process
@@ -16,23 +20,29 @@ def extract_and_rank_resume(application_id: int) -> str:
     Returns:
         Status message
     """
+    from .metrics import STAGE_SECONDS
     from .models import Application
-    from .services import extract_resume_text, rerank_applications
+    from .services import extract_application_resume, score_application
 
     try:
         logger.info("Starting resume extraction for application %s", application_id)
 
-        application = Application.objects.select_related("job").get(pk=application_id)
+        application = Application.objects.select_related("job", "resume_blob").get(
+            pk=application_id
+        )
 
-        resume_text = extract_resume_text(application.resume)
+        with STAGE_SECONDS.time(operation="extract_and_rank_resume", stage="extract"):
+            extract_application_resume(application)
 
-        with transaction.atomic():
-            application.resume_text = resume_text
-            application.save(update_fields=["resume_text"])
+        with STAGE_SECONDS.time(operation="extract_and_rank_resume", stage="index"):
+            with transaction.atomic():
+                # Signals refresh the full-text index in the same transaction
+                application.save(update_fields=["resume_text", "term_counts"])
 
         logger.info("Resume text extracted for application %s", application_id)
 
-        rerank_applications(application.job)
+        with STAGE_SECONDS.time(operation="extract_and_rank_resume", stage="score"):
+            score_application(application)
 
         logger.info("Successfully processed application %s", application_id)
         return f"Application {application_id} processed successfully"
@@ -46,3 +56,81 @@ def extract_and_rank_resume(application_id: int) -> str:
             "Unexpected error while processing application %s", application_id
         )
         raise exc
+
+
+@task
+def rerank_job(job_id: int) -> str:
+    """
+    Rescore all applications of a job.
+
+    Enqueued by services.schedule_rerank, at most once per job per
+    RERANK_DEBOUNCE_SECONDS window.
+
+    Args:
+        job_id: ID of the job to rerank
+
+    Returns:
+        Status message
+    """
+    from jobs.models import Job
+    from .services import rerank_applications
+
+    job = Job.objects.filter(pk=job_id).first()
+    if job is None:
+        logger.info("Job %s no longer exists, nothing to rerank", job_id)
+        return f"Job {job_id} not found"
+
+    rerank_applications(job)
+    return f"Job {job_id} reranked"
+
+
+@task
+def update_job_ranks(job_id: int) -> str:
+    """
+    Refresh the materialized ranks of a job from its stored scores.
+
+    Args:
+        job_id: ID of the job
+
+    Returns:
+        Status message
+    """
+    from jobs.models import Job
+    from .services import update_ranks
+
+    job = Job.objects.filter(pk=job_id).first()
+    if job is None:
+        return f"Job {job_id} not found"
+
+    update_ranks(job)
+    return f"Job {job_id} ranks updated"
+
+
+@task
+def fit_embeddings() -> str:
+    """
+    Refit the embedding model, rebuild its ANN index and rerank semantic jobs.
+
+    Enqueued by embeddings.semantic_scores while no model exists; the
+    fit_embeddings management command does the same synchronously.
+
+    Returns:
+        Status message
+    """
+    from jobs.models import Job
+    from .embeddings import fit_embedding_model, get_ivf_index
+    from .scoring import SemanticScorer, get_scorer
+    from .services import schedule_rerank
+
+    model = fit_embedding_model()
+    if model is None:
+        return "Not enough extracted resumes to fit an embedding model"
+
+    get_ivf_index(model, rebuild=True)
+    jobs = [
+        job for job in Job.objects.all()
+        if isinstance(get_scorer(job.scoring_backend), SemanticScorer)
+    ]
+    for job in jobs:
+        schedule_rerank(job)
+    return f"Embedding model fitted, {len(jobs)} semantic jobs queued for rerank"
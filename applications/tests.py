@@ -1,3 +1,1346 @@
-from django.test import TestCase
+import hashlib
+import io
+import json
+import math
+import multiprocessing
+import os
+import random
+import shutil
+import signal
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+import numpy as np
+from docx import Document
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.models import Count
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from jobs.models import Job
+from .cache import _bump, cached, get_or_set, invalidate, job_scope, version
+from .middleware import QueryProfilerMiddleware, query_shape
+from .models import Application, JobScoringModel, QueuedTask, ResumeBlob
+from . import extraction, metrics, queue, services, views
+from .queue import claim_next, enqueue, run_pending, run_task
+from .embeddings import IvfIndex, fit_embedding_model, semantic_scores
+from .management.commands.benchmark import make_pdf
+from .recommendations import InvertedIndex, recommend_candidates
+from .scoring import Scorer, TfidfScorer, get_scorer, scorer_choices
+from .search import search_applications
+from .services import (
+    get_job_model, index_resume, pack_term_counts, rerank_applications, score_application,
+    unpack_term_counts,
+)
 
-# Create your tests here.
+
+RESUMES = [
+    'Senior Python developer with Django, PostgreSQL and REST API experience',
+    'Java Spring Boot engineer, some Python scripting',
+    'Head chef with ten years of kitchen management',
+    'Django and Python backend engineer, built REST APIs on PostgreSQL',
+    'Sales manager focused on enterprise accounts',
+    'Data engineer: Python, SQL, Airflow, PostgreSQL',
+]
+
+
+def create_applicants(job, texts=RESUMES, index=index_resume):
+    """
+    One application per resume text, named 'Applicant <position>', indexed on creation
+
+    Args:
+        job: Job, or a function of the position returning the job to apply to
+        texts: Resume texts
+        index: Indexing function called with each application
+
+    Returns:
+        List of applications, aligned with texts
+    """
+    applications = []
+    for position, text in enumerate(texts):
+        application = Application.objects.create(
+            job=job(position) if callable(job) else job,
+            name=f'Applicant {position}',
+            email=f'applicant{position}@example.com',
+            resume='resumes/resume.pdf',
+            resume_text=text,
+        )
+        index(application)
+        applications.append(application)
+    return applications
+
+
+class BatchRerankTests(TestCase):
+    def setUp(self):
+        self.job = Job.objects.create(
+            title='Backend Developer',
+            description='Python Django developer with PostgreSQL and REST API experience',
+        )
+        create_applicants(self.job)
+
+    def test_batch_scores_match_sklearn_on_the_same_corpus(self):
+        rerank_applications(self.job)
+
+        # Independent reference: scikit-learn fitted on the description and every resume
+        vectorizer = TfidfVectorizer(
+            stop_words='english', max_features=settings.MATCH_SCORE_MAX_FEATURES
+        )
+        matrix = vectorizer.fit_transform([self.job.description] + RESUMES)
+        expected = cosine_similarity(matrix[0:1], matrix[1:])[0] * 100
+
+        scores = Application.objects.filter(job=self.job).order_by('pk').values_list('match_score', flat=True)
+        for score, reference in zip(scores, expected):
+            # Scores are stored rounded to 2 decimals from float32 weights
+            self.assertAlmostEqual(score, reference, delta=0.01)
+
+    def test_rerank_writes_scores_in_one_batched_update(self):
+        with CaptureQueriesContext(connection) as context:
+            rerank_applications(self.job)
+
+        updates = [
+            query['sql'] for query in context.captured_queries
+            if 'UPDATE "applications_application"' in query['sql']
+        ]
+        self.assertEqual(len(updates), 1)
+        # Plain parameterized UPDATE per row, no per-row CASE WHEN to compile
+        self.assertNotIn('CASE', updates[0])
+
+        top = Application.objects.filter(job=self.job).first()
+        self.assertIn('Django', top.resume_text)
+
+
+class IncrementalScoringTests(TestCase):
+    def setUp(self):
+        self.job = Job.objects.create(
+            title='Backend Developer',
+            description='Python Django developer with PostgreSQL and REST API experience',
+        )
+        # Fitted on the first half of the corpus; the rest applies afterwards
+        self.first = create_applicants(self.job, RESUMES[:3])
+        rerank_applications(self.job)
+        self.later = create_applicants(self.job, RESUMES[3:])
+        patcher = mock.patch.object(services, 'schedule_rerank')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def score_incrementally(self):
+        return {
+            application.pk: score_application(application)
+            for application in Application.objects.select_related('job').filter(job=self.job)
+        }
+
+    def test_incremental_scores_against_a_full_rerank(self):
+        incremental = self.score_incrementally()
+        rerank_applications(self.job)
+        full = dict(Application.objects.filter(job=self.job).values_list('pk', 'match_score'))
+
+        # Terms first seen after the fit are left out, so new resumes can
+        # score higher than a rerank gives them; the order is kept
+        self.assertEqual(
+            sorted(full, key=lambda pk: (-incremental[pk], pk)),
+            sorted(full, key=lambda pk: (-full[pk], pk)),
+        )
+        self.assertLess(max(abs(incremental[pk] - full[pk]) for pk in full), 25)
+        for application in self.first:
+            self.assertAlmostEqual(incremental[application.pk], full[application.pk], delta=2)
+
+    def test_refit_check_reads_the_scored_counter(self):
+        application = Application.objects.select_related('job').get(pk=self.later[0].pk)
+        self.assertEqual(application.job.scored_count, len(RESUMES))
+
+        with CaptureQueriesContext(connection) as context:
+            score_application(application)
+        self.assertFalse([query for query in context.captured_queries if 'COUNT(' in query['sql']])
+        services.schedule_rerank.assert_called_once_with(self.job)
+
+    def test_model_is_reused_across_applies(self):
+        fitted = JobScoringModel.objects.get(job=self.job)
+        model = get_job_model(self.job)
+
+        with mock.patch.object(services, 'fit_job_model') as fit:
+            self.score_incrementally()
+        fit.assert_not_called()
+        self.assertIs(get_job_model(self.job), model)
+        self.assertEqual(JobScoringModel.objects.get(job=self.job).fitted_at, fitted.fitted_at)
+
+    def test_job_edit_invalidates_the_model(self):
+        self.client.force_login(User.objects.create_user('recruiter', password='password'))
+        url = reverse('jobs:job_edit', args=[self.job.pk])
+        model = get_job_model(self.job)
+
+        self.client.post(url, {
+            'title': 'Senior Backend Developer',
+            'description': self.job.description,
+            'scoring_backend': 'tfidf',
+        })
+        self.assertIs(get_job_model(self.job), model)
+
+        self.client.post(url, {
+            'title': 'Chef',
+            'description': 'Head chef for kitchen management',
+            'scoring_backend': 'tfidf',
+        })
+        self.job.refresh_from_db()
+        refitted = get_job_model(self.job)
+        self.assertIsNot(refitted, model)
+        self.assertEqual(refitted.document_count, len(RESUMES))
+        top = Application.objects.filter(job=self.job).first()
+        self.assertEqual(top.name, 'Applicant 2')
+        self.assertAlmostEqual(top.match_score, refitted.score(top.term_counts), places=2)
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.job = Job.objects.create(title='Backend Developer', description='Python')
+        self.other_job = Job.objects.create(title='Chef', description='Cooking')
+        create_applicants(lambda position: self.job if position % 2 == 0 else self.other_job)
+
+    def names(self, results):
+        return {application.name for application in results}
+
+    def test_all_terms_must_match(self):
+        results = search_applications('python postgresql')
+
+        self.assertEqual(self.names(results), {'Applicant 0', 'Applicant 3', 'Applicant 5'})
+        for application in results:
+            self.assertTrue(hasattr(application, 'search_rank'))
+
+    def test_phrase_query(self):
+        results = search_applications('"kitchen management"')
+
+        self.assertEqual(self.names(results), {'Applicant 2'})
+        self.assertEqual(search_applications('"management kitchen"'), [])
+
+    def test_job_filter(self):
+        results = search_applications('python', job_id=self.other_job.pk)
+
+        self.assertEqual(self.names(results), {'Applicant 1', 'Applicant 3', 'Applicant 5'})
+
+    def test_deleted_application_leaves_index(self):
+        Application.objects.get(name='Applicant 2').delete()
+
+        self.assertEqual(search_applications('chef'), [])
+
+    def test_edits_to_indexed_fields_are_reindexed(self):
+        application = Application.objects.get(name='Applicant 2')
+        application.name = 'Grace Hopper'
+        application.save()
+        application.email = 'grace@navy.example.com'
+        application.save(update_fields=['email'])
+        loaded = Application.objects.only('pk', 'resume_text').get(pk=application.pk)
+        loaded.resume_text = 'COBOL compiler pioneer'
+        loaded.save()
+
+        self.assertEqual(self.names(search_applications('hopper')), {'Grace Hopper'})
+        self.assertEqual(self.names(search_applications('grace@navy.example.com')), {'Grace Hopper'})
+        self.assertEqual(self.names(search_applications('cobol')), {'Grace Hopper'})
+        self.assertEqual(search_applications('chef'), [])
+
+
+class LengthScorer(Scorer):
+    """Test scorer: longer resumes score higher"""
+    label = 'Resume length'
+    calls = []
+
+    def score_many(self, job, applications):
+        self.calls.append(len(applications))
+        return np.array([len(unpack_term_counts(a.term_counts)[0]) for a in applications], dtype=float)
+
+
+@override_settings(MATCH_SCORERS={
+    'tfidf': 'applications.scoring.TfidfScorer',
+    'keywords': 'applications.scoring.KeywordScorer',
+    'length': 'applications.tests.LengthScorer',
+})
+class ScorerRegistryTests(TestCase):
+    def setUp(self):
+        self.job = Job.objects.create(
+            title='Backend Developer',
+            description='Python Django PostgreSQL',
+        )
+        create_applicants(self.job)
+
+    def scores(self):
+        return dict(Application.objects.filter(job=self.job).values_list('name', 'match_score'))
+
+    def test_rerank_scores_all_applications_in_one_batch(self):
+        LengthScorer.calls.clear()
+        self.job.scoring_backend = 'length'
+        rerank_applications(self.job)
+
+        self.assertEqual(LengthScorer.calls, [len(RESUMES)])
+        self.assertEqual(self.scores()['Applicant 0'], 8)
+
+    def test_keyword_scorer_measures_term_coverage(self):
+        self.job.scoring_backend = 'keywords'
+        rerank_applications(self.job)
+
+        scores = self.scores()
+        self.assertEqual(scores['Applicant 0'], 100.0)
+        self.assertAlmostEqual(scores['Applicant 5'], 66.67)
+        self.assertEqual(scores['Applicant 2'], 0.0)
+
+    def test_unknown_scorer_falls_back_to_default(self):
+        self.assertIsInstance(get_scorer('missing'), TfidfScorer)
+        self.assertIn(('length', 'Resume length'), scorer_choices())
+
+
+class Bm25ScorerTests(TestCase):
+    def setUp(self):
+        self.job = Job.objects.create(
+            title='Backend Developer',
+            description='Python Django PostgreSQL',
+            scoring_backend='bm25',
+        )
+        create_applicants(self.job, RESUMES + ['Python ' * 50 + 'cook'])
+
+    def test_scores_match_reference_bm25(self):
+        rerank_applications(self.job)
+
+        analyzer = TfidfVectorizer(stop_words='english').build_analyzer()
+        documents = [analyzer(text) for text in RESUMES + ['Python ' * 50 + 'cook']]
+        query = analyzer(self.job.description)
+        average_length = sum(map(len, documents)) / len(documents)
+        idf = {
+            term: math.log(1 + (len(documents) - df + 0.5) / (df + 0.5))
+            for term in query
+            for df in [sum(term in document for document in documents)]
+        }
+        maximum = sum(idf.values()) * 2.2
+        for index, document in enumerate(documents):
+            norm = 1.2 * (0.25 + 0.75 * len(document) / average_length)
+            expected = sum(
+                idf[term] * document.count(term) * 2.2 / (document.count(term) + norm)
+                for term in query
+            ) / maximum * 100
+            score = Application.objects.get(name=f'Applicant {index}').match_score
+            self.assertAlmostEqual(score, expected, places=1)
+
+    def test_keyword_stuffing_does_not_outrank_coverage(self):
+        rerank_applications(self.job)
+
+        ranked = [application.name for application in Application.objects.filter(job=self.job)]
+        self.assertLess(ranked.index('Applicant 0'), ranked.index('Applicant 6'))
+
+    def test_incremental_score_uses_stored_statistics(self):
+        rerank_applications(self.job)
+        application = Application.objects.select_related('job').get(name='Applicant 3')
+        expected = application.match_score
+
+        # The stored statistics and the score write; the refit check reads Job.scored_count
+        with mock.patch.object(services, 'schedule_rerank'), self.assertNumQueries(2):
+            self.assertEqual(services.score_application(application), expected)
+
+
+@override_settings(TASK_QUEUE_EAGER=False, RERANK_DEBOUNCE_SECONDS=30)
+class CoalescedRerankTests(TestCase):
+    def setUp(self):
+        self.job = Job.objects.create(
+            title='Backend Developer',
+            description='Python Django developer with PostgreSQL and REST API experience',
+        )
+        self.applications = create_applicants(self.job)
+
+    def test_burst_of_drifting_scores_queues_one_delayed_rerank(self):
+        services.fit_job_model(self.job, [])  # fitted on no resumes, so every new score drifts
+        before = timezone.now()
+        for application in self.applications:
+            services.score_application(application)
+
+        queued = QueuedTask.objects.get(name='rerank_job')
+        self.assertEqual(queued.args, [self.job.pk])
+        self.assertGreaterEqual(queued.run_after, before + timedelta(seconds=30))
+        # Not due yet
+        self.assertEqual(run_pending(), 0)
+
+    def test_rerank_scheduled_while_one_runs_is_queued_again(self):
+        first = services.schedule_rerank(self.job)
+        QueuedTask.objects.filter(pk=first.pk).update(status='RUNNING')
+
+        second = services.schedule_rerank(self.job)
+        self.assertNotEqual(first.pk, second.pk)
+        self.assertEqual(services.schedule_rerank(self.job).pk, second.pk)
+
+    def test_queued_rerank_rescores_every_application(self):
+        services.schedule_rerank(self.job)
+        QueuedTask.objects.update(run_after=timezone.now())
+
+        self.assertEqual(run_pending(), 1)
+        model = get_job_model(self.job)
+        for application in Application.objects.filter(job=self.job):
+            self.assertAlmostEqual(application.match_score, model.score(application.term_counts), places=2)
+
+
+class RankMaterializationTests(TestCase):
+    def setUp(self):
+        self.job = Job.objects.create(title='Backend Developer', description='Python Django')
+        for index, score in enumerate([90.0, 75.5, 75.5, 40.0, 10.0]):
+            Application.objects.create(
+                job=self.job,
+                name=f'Applicant {index}',
+                email=f'applicant{index}@example.com',
+                resume='resumes/resume.pdf',
+                resume_text='text',
+                match_score=score,
+            )
+
+    def test_rank_scores_are_dense_with_midpoint_percentiles(self):
+        ranks, percentiles = services.rank_scores([90.0, 75.5, 75.5, 40.0, 10.0])
+
+        self.assertEqual(ranks.tolist(), [1, 2, 2, 3, 4])
+        self.assertEqual(percentiles.tolist(), [90.0, 60.0, 60.0, 30.0, 10.0])
+
+    def test_rerank_writes_ranks_with_scores(self):
+        for application, text in zip(Application.objects.filter(job=self.job), RESUMES):
+            application.resume_text = text
+            index_resume(application, save=False)
+            application.save()
+        rerank_applications(self.job)
+
+        ranked = list(Application.objects.filter(job=self.job))
+        self.assertEqual([a.rank for a in ranked], sorted(a.rank for a in ranked))
+        self.assertEqual(ranked[0].rank, 1)
+        self.assertGreater(ranked[0].percentile, ranked[-1].percentile)
+
+    def test_update_ranks_and_top_n(self):
+        services.update_ranks(self.job)
+
+        top = Application.objects.filter(job=self.job).top(2)
+        self.assertEqual([a.name for a in top], ['Applicant 0', 'Applicant 2', 'Applicant 1'])
+
+        application = Application.objects.get(name='Applicant 3')
+        self.assertEqual((application.rank, application.percentile), (3, 30.0))
+
+
+class RerankAllCommandTests(TestCase):
+    def setUp(self):
+        self.jobs = [
+            Job.objects.create(title=f'Job {index}', description='Python Django developer')
+            for index in range(4)
+        ]
+        for job in self.jobs:
+            create_applicants(job, RESUMES[:3])
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.checkpoint = os.path.join(directory, 'rerank.checkpoint')
+
+    def rerank_all(self, **options):
+        out = io.StringIO()
+        call_command('rerank_all', checkpoint=self.checkpoint, stdout=out, **options)
+        return out.getvalue()
+
+    def test_shard_reranks_its_jobs_and_reports_throughput(self):
+        output = self.rerank_all(shard='1/2')
+
+        reranked = Application.objects.filter(rank__isnull=False).values_list('job_id', flat=True)
+        self.assertEqual(set(reranked), {job.pk for job in self.jobs if job.pk % 2 == 1})
+        self.assertIn('2 jobs and 6 applications', output)
+        self.assertIn('jobs/s', output)
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_rerun_resumes_from_checkpoint(self):
+        with open(self.checkpoint, 'w') as checkpoint:
+            checkpoint.write(f'{self.jobs[0].pk}\n{self.jobs[1].pk}\n')
+
+        with mock.patch(
+            'applications.management.commands.rerank_all.rerank_applications',
+            side_effect=[3, RuntimeError('database is locked')],
+        ) as rerank:
+            with self.assertRaises(CommandError):
+                self.rerank_all()
+        self.assertEqual([call.args[0].pk for call in rerank.call_args_list], [job.pk for job in self.jobs[2:]])
+        with open(self.checkpoint) as checkpoint:
+            self.assertEqual(checkpoint.read().split(), [str(job.pk) for job in self.jobs[:3]])
+
+        output = self.rerank_all()
+        self.assertIn('Resuming from', output)
+        self.assertIn('1 jobs and 3 applications', output)
+
+    def test_invalid_shard(self):
+        with self.assertRaises(CommandError):
+            self.rerank_all(shard='2/2')
+
+
+class BenchmarkCommandTests(TestCase):
+    def test_benchmark_writes_results_and_compares(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        output = os.path.join(directory, 'results.json')
+        options = {'sizes': '20', 'pages': '1', 'runs': 1, 'samples': 2, 'stdout': io.StringIO()}
+
+        call_command('benchmark', output=output, **options)
+        with open(output) as results:
+            stages = json.load(results)['stages']
+        self.assertEqual(
+            set(stages),
+            {
+                'extract_pdf/pages=1', 'extract_docx/pages=1', 'calculate_match_score',
+                'rerank/applicants=20', 'bm25/applicants=20',
+            },
+        )
+        self.assertEqual(stages['rerank/applicants=20']['items_per_run'], 20)
+        self.assertEqual(stages['bm25/applicants=20']['items_per_run'], 20)
+        self.assertGreater(stages['extract_pdf/pages=1']['peak_memory_mb'], 0)
+        # Synthetic applications are rolled back
+        self.assertFalse(Application.objects.exists())
+
+        out = io.StringIO()
+        options['stdout'] = out
+        call_command('benchmark', output=os.path.join(directory, 'next.json'), compare=output, **options)
+        self.assertIn('rerank/applicants=20: p50', out.getvalue())
+
+
+class RecommendationTests(TestCase):
+    def setUp(self):
+        self.index_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.index_dir)
+        index_path = os.path.join(self.index_dir, 'index.npz')
+        patcher = override_settings(RECOMMENDATION_INDEX_PATH=index_path)
+        patcher.enable()
+        self.addCleanup(patcher.disable)
+        # Start every test without a process-wide index
+        reset = mock.patch('applications.recommendations._index', None)
+        reset.start()
+        self.addCleanup(reset.stop)
+
+        self.other_job = Job.objects.create(title='Various', description='Anything')
+        create_applicants(self.other_job)
+
+    def create_application(self, job, name, text):
+        application = Application.objects.create(
+            job=job,
+            name=name,
+            email=f'{name.lower().replace(" ", "")}@example.com',
+            resume='resumes/resume.pdf',
+            resume_text=text,
+        )
+        index_resume(application)
+        return application
+
+    def test_scores_match_tfidf_cosine(self):
+        job = Job.objects.create(title='Backend', description='Python Django REST API on PostgreSQL')
+        candidates = recommend_candidates(job, limit=3)
+
+        vectorizer = TfidfVectorizer(stop_words='english', lowercase=True)
+        matrix = vectorizer.fit_transform(RESUMES)
+        expected = cosine_similarity(vectorizer.transform([job.description]), matrix)[0] * 100
+        best = sorted(range(len(RESUMES)), key=lambda i: -expected[i])[:3]
+
+        self.assertEqual([c.name for c in candidates], [f'Applicant {i}' for i in best])
+        for candidate, position in zip(candidates, best):
+            self.assertAlmostEqual(candidate.recommendation_score, expected[position], places=1)
+
+    def test_wand_matches_exhaustive_top_k(self):
+        rng = random.Random(7)
+        documents = [
+            (pk, pack_term_counts({term: rng.randint(1, 5) for term in rng.sample(range(1, 200), 30)}))
+            for pk in range(1, 400)
+        ]
+        index = InvertedIndex()
+        index.build(documents)
+        query = index.query_weights({term: rng.randint(1, 3) for term in rng.sample(range(1, 200), 15)})
+
+        exhaustive = {}
+        for term_id, weight in query.items():
+            ids, weights = index.postings[term_id]
+            for pk, document_weight in zip(ids, weights):
+                exhaustive[pk] = exhaustive.get(pk, 0.0) + weight * document_weight
+        expected = sorted(exhaustive.items(), key=lambda item: -item[1])[:11]
+
+        found = index.top_k(query, 10, exclude={expected[0][0]})
+        self.assertEqual([pk for _, pk in found], [pk for pk, _ in expected[1:11]])
+
+    def test_new_applications_are_picked_up_and_persisted(self):
+        job = Job.objects.create(title='Cook', description='Experienced head chef for a busy kitchen')
+        recommend_candidates(job)
+        extra = self.create_application(self.other_job, 'Late Chef', 'Sous chef running a kitchen team')
+
+        names = [c.name for c in recommend_candidates(job)]
+        self.assertIn('Late Chef', names)
+
+        # The snapshot written at build time is not rewritten on every change
+        path = os.path.join(self.index_dir, 'index.npz')
+        self.assertNotIn(extra.pk, InvertedIndex.load(path).documents)
+        with override_settings(RECOMMENDATION_INDEX_SAVE_SECONDS=0):
+            recommend_candidates(job)
+        self.assertIn(extra.pk, InvertedIndex.load(path).documents)
+
+    def test_own_and_deleted_applications_are_excluded(self):
+        job = Job.objects.create(title='Cook', description='Head chef kitchen management')
+        own = self.create_application(job, 'Own Chef', 'Head chef, kitchen management')
+        recommend_candidates(job)
+        Application.objects.get(name='Applicant 2').delete()
+
+        names = [c.name for c in recommend_candidates(job)]
+        self.assertNotIn(own.name, names)
+        self.assertNotIn('Applicant 2', names)
+
+    def test_deletions_are_persisted_as_tombstones(self):
+        job = Job.objects.create(title='Cook', description='Head chef kitchen management')
+        recommend_candidates(job)
+        deleted = Application.objects.get(name='Applicant 2')
+        deleted_pk = deleted.pk
+        deleted.delete()
+
+        with override_settings(RECOMMENDATION_INDEX_SAVE_SECONDS=0):
+            # The first query finds the deletion, the next one saves it
+            recommend_candidates(job)
+            recommend_candidates(job)
+        loaded = InvertedIndex.load(os.path.join(self.index_dir, 'index.npz'))
+        self.assertEqual(loaded.tombstones, {deleted_pk})
+        self.assertNotIn(deleted_pk, [pk for _, pk in loaded.top_k(
+            loaded.query_weights({term_id: 1 for term_id in loaded.postings}), 10
+        )])
+
+
+class SemanticScoringTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        patcher = override_settings(
+            EMBEDDING_MODEL_PATH=os.path.join(directory, 'model.npz'),
+            EMBEDDING_INDEX_PATH=os.path.join(directory, 'index.npz'),
+            EMBEDDING_DIMENSIONS=4,
+        )
+        patcher.enable()
+        self.addCleanup(patcher.disable)
+        for name in ('_model', '_model_mtime', '_ivf_index'):
+            reset = mock.patch(f'applications.embeddings.{name}', None)
+            reset.start()
+            self.addCleanup(reset.stop)
+
+        self.job = Job.objects.create(
+            title='Backend Developer',
+            description='Python Django developer with PostgreSQL and REST API experience',
+            scoring_backend='semantic',
+        )
+        self.other_job = Job.objects.create(title='Various', description='Anything')
+        create_applicants(lambda position: self.job if position < 3 else self.other_job)
+        self.model = fit_embedding_model()
+
+    def test_semantic_rerank_stores_embeddings_and_ranks_by_them(self):
+        rerank_applications(self.job)
+
+        ranked = list(Application.objects.filter(job=self.job))
+        self.assertEqual(ranked[0].name, 'Applicant 0')
+        self.assertGreater(ranked[0].match_score, ranked[-1].match_score)
+        for application in ranked:
+            self.assertEqual(len(application.embedding), 4 * 4)
+            self.assertTrue(0 <= application.match_score <= 100)
+        self.assertFalse(JobScoringModel.objects.filter(job=self.job).exists())
+
+    def test_scoring_never_fits_a_model_but_queues_one(self):
+        os.remove(settings.EMBEDDING_MODEL_PATH)
+        applications = list(Application.objects.filter(job=self.job))
+
+        self.assertIsNone(semantic_scores(self.job, applications))
+        self.assertFalse(os.path.exists(settings.EMBEDDING_MODEL_PATH))
+        self.assertEqual(
+            QueuedTask.objects.filter(name='fit_embeddings', status='PENDING').count(), 1
+        )
+        # TF-IDF until the queued fit has run
+        rerank_applications(self.job)
+        self.assertTrue(JobScoringModel.objects.filter(job=self.job).exists())
+
+        run_pending()
+        self.assertTrue(os.path.exists(settings.EMBEDDING_MODEL_PATH))
+        self.assertEqual(
+            QueuedTask.objects.filter(name='fit_embeddings', status='DONE').count(), 1
+        )
+
+    def test_incremental_fallback_keeps_the_tfidf_model(self):
+        os.remove(settings.EMBEDDING_MODEL_PATH)
+        rerank_applications(self.job)
+        fitted = JobScoringModel.objects.get(job=self.job)
+        application = create_applicants(self.job, ['Python Django REST API developer'])[0]
+
+        score = score_application(Application.objects.select_related('job').get(pk=application.pk))
+
+        self.assertGreater(score, 0)
+        scoring_model = JobScoringModel.objects.get(job=self.job)
+        self.assertEqual(scoring_model.document_count, 3)
+        self.assertEqual(scoring_model.fitted_at, fitted.fitted_at)
+
+    def test_refit_keeps_embeddings_and_replaces_them_by_version(self):
+        rerank_applications(self.job)
+        refitted = fit_embedding_model()
+        stored = Application.objects.exclude(embedding=b'')
+
+        # Same size, older model: kept until rescored, then recomputed
+        self.assertEqual(set(stored.values_list('embedding_version', flat=True)), {self.model.version})
+        rerank_applications(self.job)
+        self.assertEqual(
+            set(stored.filter(job=self.job).values_list('embedding_version', flat=True)),
+            {refitted.version},
+        )
+
+    def test_semantic_recommendations_use_ann_index(self):
+        candidates = recommend_candidates(self.job, limit=2)
+
+        names = [candidate.name for candidate in candidates]
+        self.assertEqual(len(names), 2)
+        self.assertNotIn('Applicant 4', names)
+        self.assertTrue(set(names) <= {'Applicant 3', 'Applicant 4', 'Applicant 5'})
+        self.assertTrue(os.path.exists(settings.EMBEDDING_INDEX_PATH))
+
+    def test_ivf_search_matches_exact_search_and_accepts_inserts(self):
+        rng = np.random.default_rng(3)
+        vectors = rng.normal(size=(400, 8)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        index = IvfIndex.build(np.arange(1, 401), vectors, version=1)
+        index.add(401, vectors[0])
+        query = vectors[0]
+
+        with override_settings(EMBEDDING_IVF_PROBES=len(index.ids)):
+            found = index.search(query, 3)
+        exact = np.argsort(-(vectors @ query))[:2] + 1
+        self.assertEqual({pk for _, pk in found[:2]}, {1, 401})
+        self.assertEqual(found[2][1], exact[1])
+
+
+class ApplicationDetailTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('recruiter', password='password'))
+        job = Job.objects.create(title='Backend Developer', description='Python')
+        self.application = Application.objects.create(
+            job=job, name='Ada', email='ada@example.com', resume='resumes/resume.pdf',
+        )
+
+    def test_rank_shows_percentile_as_an_ordinal(self):
+        url = reverse('applications:application_detail', args=[self.application.pk])
+        for percentile, expected in [(1, '1st'), (2.4, '2nd'), (12, '12th'), (21, '21st'), (100, '100th')]:
+            Application.objects.filter(pk=self.application.pk).update(rank=1, percentile=percentile)
+            self.assertContains(self.client.get(url), f'#1 &middot; {expected} percentile')
+
+    def test_unranked_application(self):
+        response = self.client.get(reverse('applications:application_detail', args=[self.application.pk]))
+
+        self.assertContains(response, 'Not ranked yet')
+
+
+class ExplainQueriesTests(TestCase):
+    def test_hot_path_queries_use_indexes_on_the_test_database(self):
+        job = Job.objects.create(title='Backend Developer', description='Python')
+        Application.objects.create(
+            job=job, name='Ada', email='ada@example.com', resume='resumes/resume.pdf',
+        )
+        output = io.StringIO()
+
+        call_command('explain_queries', stdout=output)
+
+        self.assertIn('All hot-path queries use indexes', output.getvalue())
+
+    def test_partial_indexes_exist(self):
+        with connection.cursor() as cursor:
+            application = connection.introspection.get_constraints(cursor, 'applications_application')
+            queued = connection.introspection.get_constraints(cursor, 'applications_queuedtask')
+
+        self.assertIn('application_job_rank_cover_idx', application)
+        self.assertIn('application_job_new_idx', application)
+        self.assertIn('queuedtask_pending_idx', queued)
+
+
+class QueueTests(TestCase):
+    def setUp(self):
+        self.job = Job.objects.create(title='Backend Developer', description='Python')
+        self.queued = enqueue('update_job_ranks', self.job.pk, max_attempts=2)
+
+    def abandon(self, attempts):
+        """Leave the task RUNNING as a dead worker would, its lock long expired"""
+        expired = timezone.now() - timedelta(seconds=settings.TASK_QUEUE_LOCK_TIMEOUT + 1)
+        QueuedTask.objects.filter(pk=self.queued.pk).update(
+            status='RUNNING', attempts=attempts, locked_at=expired,
+        )
+
+    def test_claim_counts_an_attempt(self):
+        queued = claim_next()
+
+        self.assertEqual((queued.pk, queued.status, queued.attempts), (self.queued.pk, 'RUNNING', 1))
+        self.assertTrue(run_task(queued))
+        self.assertEqual(QueuedTask.objects.get().attempts, 1)
+
+    def test_reclaiming_a_stale_task_counts_an_attempt(self):
+        self.abandon(attempts=1)
+
+        queued = claim_next()
+        self.assertEqual((queued.pk, queued.attempts), (self.queued.pk, 2))
+        # Claimed again, so a second worker cannot take it as well
+        self.assertIsNone(claim_next())
+
+    def test_stale_task_without_attempts_left_fails(self):
+        self.abandon(attempts=2)
+
+        self.assertIsNone(claim_next())
+        queued = QueuedTask.objects.get()
+        self.assertEqual((queued.status, queued.attempts), ('FAILED', 2))
+        self.assertIn('heartbeats', queued.last_error)
+
+    def test_heartbeat_keeps_a_long_task_locked(self):
+        queued = claim_next()
+        started = queued.locked_at
+        timeout = timedelta(seconds=settings.TASK_QUEUE_LOCK_TIMEOUT)
+
+        with mock.patch.object(queue.timezone, 'now', return_value=started + timeout / 2):
+            self.assertTrue(queue.Heartbeat(queued).beat())
+        with mock.patch.object(queue.timezone, 'now', return_value=started + timeout * 1.2):
+            self.assertIsNone(claim_next())
+        with mock.patch.object(queue.timezone, 'now', return_value=started + timeout * 2):
+            self.assertEqual(claim_next().attempts, 2)
+
+    def test_heartbeat_stops_once_another_worker_has_the_task(self):
+        queued = claim_next()
+        QueuedTask.objects.filter(pk=queued.pk).update(locked_at=queued.locked_at + timedelta(seconds=1))
+
+        self.assertFalse(queue.Heartbeat(queued).beat())
+
+    @override_settings(TASK_QUEUE_HEARTBEAT_INTERVAL=3600)
+    def test_run_task_stops_its_heartbeat(self):
+        heartbeats = []
+        enter = queue.Heartbeat.__enter__
+
+        def record(heartbeat):
+            heartbeats.append(heartbeat)
+            return enter(heartbeat)
+
+        with mock.patch.object(queue.Heartbeat, '__enter__', autospec=True, side_effect=record):
+            run_task(claim_next())
+
+        self.assertFalse(heartbeats[0].thread.is_alive())
+        self.assertEqual(QueuedTask.objects.get().status, 'DONE')
+
+
+def make_docx(text):
+    document = Document()
+    document.add_paragraph(text)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def slow_count_pages(file_path):
+    time.sleep(30)
+
+
+def misbehaving_docx(file_path):
+    """Stand-in for python-docx, run in pool workers: hangs, crashes or allocates by file name"""
+    name = os.path.basename(file_path)
+    if name.startswith('slow'):
+        time.sleep(30)
+    if name.startswith('crash'):
+        # Like the kernel's OOM killer
+        os.kill(os.getpid(), signal.SIGKILL)
+    if name.startswith('huge'):
+        return len(bytearray(512 * 1024 * 1024))
+    return f'text of {name}'
+
+
+@override_settings(
+    RESUME_EXTRACTION_WORKERS=2,
+    RESUME_EXTRACTION_TIMEOUT=1,
+    RESUME_EXTRACTION_MEMORY_LIMIT_MB=64,
+)
+class ExtractionPoolTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        # Workers fork from this process, so they see the patched functions
+        extraction._reset_pool()
+        self.addCleanup(extraction._reset_pool)
+        patcher = mock.patch.object(extraction, 'extract_text_from_docx', misbehaving_docx)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write(self, name, content=b''):
+        path = os.path.join(self.directory, name)
+        with open(path, 'wb') as file:
+            file.write(content)
+        return path
+
+    def test_hung_file_times_out_without_stalling_the_rest(self):
+        paths = [self.write('slow.docx'), self.write('ok.docx')]
+
+        self.assertEqual(extraction.extract_many(paths), [None, 'text of ok.docx'])
+
+    def test_crashed_worker_is_retried_once_then_skipped(self):
+        paths = [self.write('first.docx'), self.write('crash.docx'), self.write('last.docx')]
+
+        with mock.patch.object(extraction.logger, 'error') as error:
+            texts = extraction.extract_many(paths)
+
+        self.assertEqual(texts, ['text of first.docx', None, 'text of last.docx'])
+        error.assert_called_once()
+        self.assertIn('crashed its worker', error.call_args[0][0])
+
+    def test_memory_limit_fails_the_file(self):
+        paths = [self.write('huge.docx'), self.write('ok.docx')]
+
+        self.assertEqual(extraction.extract_many(paths), [None, 'text of ok.docx'])
+
+    @override_settings(RESUME_EXTRACTION_MAX_PAGES=2, RESUME_PDF_PAGES_PER_TASK=1)
+    def test_pages_past_the_cap_are_not_extracted(self):
+        pages = [[f'Page {number} skills'] for number in range(1, 6)]
+        path = self.write('resume.pdf', make_pdf(pages))
+
+        text = extraction.extract_many([path])[0]
+        self.assertIn('Page 1', text)
+        self.assertIn('Page 2', text)
+        self.assertNotIn('Page 3', text)
+
+    def test_pages_are_counted_in_the_pool_under_the_timeout(self):
+        paths = [self.write('resume.pdf', make_pdf([['Python']])), self.write('ok.docx')]
+
+        with mock.patch.object(extraction, '_count_pages', slow_count_pages):
+            self.assertEqual(extraction.extract_many(paths), [None, 'text of ok.docx'])
+
+    def test_timeout_only_recycles_the_callers_pool(self):
+        pool = extraction._get_pool()
+        thread = threading.Thread(
+            target=extraction.extract_many, args=([self.write('slow.docx')],)
+        )
+        thread.start()
+        thread.join()
+
+        self.assertIs(extraction._get_pool(), pool)
+        self.assertEqual(extraction.extract_many([self.write('ok.docx')]), ['text of ok.docx'])
+
+
+class QueuedApplyTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.job = Job.objects.create(
+            title='Backend Developer',
+            description='Python Django developer with PostgreSQL and REST API experience',
+        )
+
+    def post_application(self, email='ada@example.com', content=None, name='resume.docx'):
+        resume = SimpleUploadedFile(
+            name,
+            content or make_docx(RESUMES[0]),
+            content_type='application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+        )
+        with override_settings(MEDIA_ROOT=self.media_root):
+            return self.client.post(
+                reverse('applications:apply', args=[self.job.pk]),
+                {'name': 'Ada', 'email': email, 'resume': resume},
+            )
+
+    def names_found(self, query):
+        return {application.name for application in search_applications(query)}
+
+    def test_backfilled_resumes_are_searchable(self):
+        os.makedirs(os.path.join(self.media_root, 'resumes'))
+        with open(os.path.join(self.media_root, 'resumes', 'ada.docx'), 'wb') as resume:
+            resume.write(make_docx('Kubernetes expert'))
+        Application.objects.create(
+            job=self.job, name='Ada', email='ada@example.com', resume='resumes/ada.docx',
+        )
+        before = version('applications')
+
+        with override_settings(MEDIA_ROOT=self.media_root), self.captureOnCommitCallbacks(execute=True):
+            call_command('extract_resumes', stdout=io.StringIO())
+
+        self.assertEqual(self.names_found('kubernetes'), {'Ada'})
+        self.assertGreater(version('applications'), before)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.scored_count, 1)
+
+    def test_apply_enqueues_extraction_and_returns(self):
+        response = self.post_application()
+
+        self.assertRedirects(response, reverse('applications:apply_success'))
+        application = Application.objects.get()
+        self.assertEqual(application.resume_text, '')
+        self.assertTrue(
+            QueuedTask.objects.filter(
+                name='extract_and_rank_resume', args=[application.pk], status='PENDING'
+            ).exists()
+        )
+
+    def test_worker_extracts_and_scores_queued_application(self):
+        self.post_application()
+
+        with override_settings(MEDIA_ROOT=self.media_root):
+            self.assertEqual(run_pending(), 1)
+
+        application = Application.objects.get()
+        self.assertIn('Django', application.resume_text)
+        self.assertGreater(application.match_score, 0)
+        self.assertEqual(QueuedTask.objects.get(name='extract_and_rank_resume').status, 'DONE')
+        # Ranks are refreshed by a debounced follow-up task
+        self.assertTrue(
+            QueuedTask.objects.filter(name='update_job_ranks', status='PENDING').exists()
+        )
+
+    def test_duplicate_resume_shares_blob_and_extraction(self):
+        content = make_docx(RESUMES[0])
+        self.post_application('first@example.com', content)
+        self.post_application('second@example.com', content)
+
+        blob = ResumeBlob.objects.get()
+        self.assertEqual(blob.ref_count, 2)
+        first, second = Application.objects.order_by('pk')
+        self.assertEqual(first.resume.name, second.resume.name)
+        self.assertEqual(len(os.listdir(os.path.join(self.media_root, 'resumes'))), 1)
+
+        with override_settings(MEDIA_ROOT=self.media_root):
+            with mock.patch.object(
+                services, 'extract_resume_text', wraps=services.extract_resume_text
+            ) as extract:
+                run_pending()
+        self.assertEqual(extract.call_count, 1)
+        self.assertEqual(
+            set(Application.objects.values_list('resume_text', flat=True)),
+            {ResumeBlob.objects.get().text},
+        )
+
+    def test_blob_file_deleted_with_last_reference(self):
+        content = make_docx(RESUMES[0])
+        self.post_application('first@example.com', content)
+        self.post_application('second@example.com', content)
+        resumes_dir = os.path.join(self.media_root, 'resumes')
+
+        with override_settings(MEDIA_ROOT=self.media_root):
+            with self.captureOnCommitCallbacks(execute=True):
+                Application.objects.order_by('pk').first().delete()
+            self.assertEqual(ResumeBlob.objects.get().ref_count, 1)
+            self.assertEqual(len(os.listdir(resumes_dir)), 1)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                Application.objects.get().delete()
+        self.assertFalse(ResumeBlob.objects.exists())
+        self.assertEqual(os.listdir(resumes_dir), [])
+
+    def test_failed_extraction_is_retried_and_not_cached(self):
+        self.post_application(content=b'PK\x03\x04 not really a docx')
+
+        with override_settings(MEDIA_ROOT=self.media_root):
+            run_pending()
+
+        blob = ResumeBlob.objects.get()
+        self.assertFalse(blob.extracted)
+        self.assertEqual(blob.text, '')
+        queued = QueuedTask.objects.get(name='extract_and_rank_resume')
+        self.assertEqual((queued.status, queued.attempts), ('PENDING', 1))
+        self.assertIn('ExtractionError', queued.last_error)
+
+        # The next attempt parses the file instead of reading an empty cache
+        QueuedTask.objects.filter(pk=queued.pk).update(run_after=timezone.now())
+        with override_settings(MEDIA_ROOT=self.media_root):
+            with mock.patch.object(services, 'extract_resume_text', return_value=RESUMES[0]) as extract:
+                run_pending()
+        self.assertEqual(extract.call_count, 1)
+        self.assertTrue(ResumeBlob.objects.get().extracted)
+        self.assertEqual(QueuedTask.objects.get(pk=queued.pk).status, 'DONE')
+
+    def test_blob_released_while_attaching_is_stored_again(self):
+        content = make_docx(RESUMES[0])
+        self.post_application('first@example.com', content)
+        application = Application.objects.get()
+        info = services.logger.info
+
+        def release_first(message):
+            # Interleave: the only reference goes between lookup and increment
+            if message.startswith('Reusing resume blob'):
+                with self.captureOnCommitCallbacks(execute=True):
+                    application.delete()
+            info(message)
+
+        with override_settings(MEDIA_ROOT=self.media_root):
+            with mock.patch.object(services.logger, 'info', side_effect=release_first):
+                self.post_application('second@example.com', content)
+
+        blob = ResumeBlob.objects.get()
+        self.assertEqual(blob.ref_count, 1)
+        self.assertEqual(Application.objects.get().resume_blob, blob)
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, blob.file.name)))
+
+    def test_new_blob_file_deleted_when_apply_fails(self):
+        with mock.patch.object(views, 'enqueue', side_effect=RuntimeError('queue down')):
+            response = self.post_application()
+
+        self.assertContains(response, 'An error occurred while submitting your application')
+        self.assertFalse(ResumeBlob.objects.exists())
+        self.assertFalse(Application.objects.exists())
+        self.assertEqual(os.listdir(os.path.join(self.media_root, 'resumes')), [])
+
+    def test_upload_is_hashed_while_streaming(self):
+        content = make_docx(RESUMES[0])
+        self.post_application(content=content)
+
+        self.assertEqual(ResumeBlob.objects.get().sha256, hashlib.sha256(content).hexdigest())
+
+    def test_upload_with_wrong_magic_bytes_is_rejected(self):
+        response = self.post_application(content=b'MZ not really a pdf', name='resume.pdf')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFormError(
+            response.context['form'], 'resume', 'Only PDF and DOCX files are allowed.'
+        )
+        self.assertFalse(Application.objects.exists())
+
+    @override_settings(RESUME_MAX_UPLOAD_SIZE=1024 * 1024)
+    def test_oversized_upload_is_rejected_while_streaming(self):
+        content = make_docx(RESUMES[0]) + b'0' * (1024 * 1024)
+        response = self.post_application(content=content)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFormError(response.context['form'], 'resume', 'File size must be under 1MB.')
+        self.assertFalse(Application.objects.exists())
+
+    @override_settings(RESUME_MAX_UPLOAD_SIZE=1024 * 1024)
+    def test_request_body_over_limit_is_not_read(self):
+        content = make_docx(RESUMES[0]) + b'0' * (2 * 1024 * 1024)
+        response = self.post_application(content=content)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFormError(response.context['form'], 'resume', 'File size must be under 1MB.')
+        self.assertFalse(Application.objects.exists())
+
+    @override_settings(METRICS_ENABLED=True, METRICS_DIR='')
+    def test_apply_and_worker_record_stage_metrics(self):
+        for metric in metrics.REGISTRY:
+            metric.clear()
+        content = make_docx(RESUMES[0])
+        self.post_application(content=content)
+        with override_settings(MEDIA_ROOT=self.media_root):
+            run_pending()
+
+        for stage in ('total', 'upload', 'validate', 'store_resume', 'db_write'):
+            self.assertEqual(metrics.STAGE_SECONDS.count(operation='apply', stage=stage), 1)
+        for stage in ('extract', 'index', 'score'):
+            self.assertEqual(
+                metrics.STAGE_SECONDS.count(operation='extract_and_rank_resume', stage=stage), 1
+            )
+        self.assertEqual(metrics.APPLICATIONS_SUBMITTED.value(), 1)
+        self.assertEqual(metrics.RESUMES_EXTRACTED.value(source='parsed'), 1)
+        self.assertEqual(metrics.RESUME_BYTES_PARSED.value(), len(content))
+        self.assertEqual(metrics.APPLICATIONS_SCORED.value(mode='incremental', scorer='tfidf'), 1)
+
+
+def record_in_child_process():
+    metrics.APPLICATIONS_SUBMITTED.inc(2)
+    metrics.STAGE_SECONDS.observe(0.2, operation='apply', stage='total')
+    metrics.flush()
+
+
+@override_settings(METRICS_DIR='', METRICS_TOKEN='secret', METRICS_ALLOWED_IPS=[])
+class MetricsTests(TestCase):
+    def setUp(self):
+        for metric in metrics.REGISTRY:
+            metric.clear()
+        self.job = Job.objects.create(title='Backend Developer', description='Python Django')
+        application = Application.objects.create(
+            job=self.job,
+            name='Ada',
+            email='ada@example.com',
+            resume='resumes/resume.pdf',
+            resume_text=RESUMES[0],
+        )
+        index_resume(application)
+
+    def scrape(self, **headers):
+        return self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret', **headers)
+
+    def test_disabled_records_nothing_and_hides_endpoint(self):
+        rerank_applications(self.job)
+
+        self.assertEqual(metrics.STAGE_SECONDS.count(operation='rerank', stage='score'), 0)
+        self.assertEqual(self.scrape().status_code, 404)
+
+    @override_settings(METRICS_ENABLED=True)
+    def test_endpoint_exposes_rerank_stages_and_counters(self):
+        rerank_applications(self.job)
+
+        response = self.scrape()
+        self.assertEqual(response['Content-Type'], metrics.CONTENT_TYPE)
+        body = response.content.decode()
+        self.assertIn('# TYPE ats_stage_duration_seconds histogram', body)
+        self.assertIn(
+            'ats_stage_duration_seconds_bucket{operation="rerank",stage="score",le="+Inf"} 1', body
+        )
+        self.assertIn('ats_stage_duration_seconds_count{operation="rerank",stage="write"} 1', body)
+        self.assertIn('ats_applications_scored_total{mode="rerank",scorer="tfidf"} 1', body)
+
+    @override_settings(METRICS_ENABLED=True)
+    def test_endpoint_needs_staff_token_or_allowed_address(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        self.assertEqual(self.scrape().status_code, 200)
+
+        with override_settings(METRICS_ALLOWED_IPS=['127.0.0.1']):
+            self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+        self.client.force_login(User.objects.create_user('recruiter', password='password'))
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.client.force_login(User.objects.create_user('admin', password='password', is_staff=True))
+        self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+    @override_settings(METRICS_ENABLED=True)
+    def test_scrape_sums_every_process_in_metrics_dir(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        metrics.APPLICATIONS_SUBMITTED.inc()
+        metrics.STAGE_SECONDS.observe(0.1, operation='apply', stage='total')
+
+        with override_settings(METRICS_DIR=directory):
+            child = multiprocessing.get_context('fork').Process(target=record_in_child_process)
+            child.start()
+            child.join()
+            body = self.scrape().content.decode()
+
+        self.assertEqual(len(os.listdir(directory)), 2)
+        # The child started from zero rather than re-reporting what it inherited
+        self.assertIn('ats_applications_submitted_total 3', body)
+        self.assertIn('ats_stage_duration_seconds_count{operation="apply",stage="total"} 2', body)
+        self.assertIn(
+            'ats_stage_duration_seconds_bucket{operation="apply",stage="total",le="0.1"} 1', body
+        )
+
+
+@override_settings(QUERY_PROFILER_SAMPLE_RATE=1.0, QUERY_PROFILER_HEADER=True)
+class QueryProfilerTests(TestCase):
+    def setUp(self):
+        self.jobs = [Job.objects.create(title=f'Job {index}', description='Python') for index in range(6)]
+
+    def profile(self, view):
+        request = RequestFactory().get('/jobs/')
+        return QueryProfilerMiddleware(view)(request)
+
+    def test_query_shape_erases_literals_and_in_list_lengths(self):
+        self.assertEqual(
+            query_shape("SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = 'x' LIMIT 21"),
+            query_shape('SELECT * FROM t WHERE id IN (%s) AND name = \'y\' LIMIT 5'),
+        )
+
+    def test_repeated_query_is_flagged_as_n_plus_one(self):
+        def view(request):
+            for job in Job.objects.all():
+                Application.objects.filter(job=job).count()
+            return HttpResponse()
+
+        with self.assertLogs('applications.middleware', 'WARNING') as logs:
+            response = self.profile(view)
+
+        self.assertTrue(response['X-Query-Profile'].startswith('queries=7;'))
+        self.assertTrue(response['X-Query-Profile'].endswith('n_plus_one=1'))
+        self.assertIn('6x SELECT COUNT(*)', logs.output[0])
+
+    def test_batched_view_is_not_flagged(self):
+        def view(request):
+            list(Job.objects.annotate(total=Count('application')))
+            return HttpResponse()
+
+        self.assertIn('queries=1;', self.profile(view)['X-Query-Profile'])
+
+    @override_settings(QUERY_PROFILER_SAMPLE_RATE=0.0)
+    def test_unsampled_requests_are_not_profiled(self):
+        response = self.profile(lambda request: HttpResponse())
+
+        self.assertNotIn('X-Query-Profile', response)
+
+
+class VersionedCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for metric in metrics.REGISTRY:
+            metric.clear()
+        self.job = Job.objects.create(title='Backend Developer', description='Python Django')
+
+    @override_settings(METRICS_ENABLED=True, METRICS_DIR='')
+    def test_get_or_set_counts_hits_and_misses_until_invalidated(self):
+        compute = mock.Mock(side_effect=[1, 2])
+
+        self.assertEqual(get_or_set('answer', (1,), compute, scopes=('jobs',)), 1)
+        self.assertEqual(get_or_set('answer', (1,), compute, scopes=('jobs',)), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidate('jobs')
+        self.assertEqual(get_or_set('answer', (1,), compute, scopes=('jobs',)), 2)
+
+        self.assertEqual(metrics.CACHE_REQUESTS.value(name='answer', result='hit'), 1)
+        self.assertEqual(metrics.CACHE_REQUESTS.value(name='answer', result='miss'), 2)
+
+    def test_versions_only_move_after_commit_and_always_forward(self):
+        before = version(job_scope(self.job.pk))
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.job.save()
+            self.assertEqual(version(job_scope(self.job.pk)), before)
+        for callback in callbacks:
+            callback()
+
+        self.assertGreater(version(job_scope(self.job.pk)), before)
+
+    def test_cached_decorator_keys_by_arguments(self):
+        calls = []
+
+        @cached('double', key=lambda value: (value,), scopes=lambda value: [job_scope(value)])
+        def double(value):
+            calls.append(value)
+            return value * 2
+
+        self.assertEqual([double(1), double(2), double(1)], [2, 4, 2])
+        self.assertEqual(calls, [1, 2])
+
+    def test_versions_are_kept_without_timeout_and_never_reused(self):
+        before = version('jobs')
+        seen = {before}
+        for _ in range(5):
+            _bump(['jobs'])
+            seen.add(version('jobs'))
+
+        self.assertEqual(len(seen), 6)
+        # locmem records no expiry for keys stored with timeout=None
+        self.assertIsNone(cache._expire_info[cache.make_key('version:jobs')])
+
+    def test_score_writes_keep_application_caches(self):
+        application = Application.objects.create(
+            job=self.job, name='Ada', email='ada@example.com',
+            resume='resumes/resume.pdf', resume_text=RESUMES[0],
+        )
+        index_resume(application)
+        before = version('applications')
+        with self.captureOnCommitCallbacks(execute=True):
+            rerank_applications(self.job)
+            score_application(Application.objects.get(pk=application.pk))
+            application = Application.objects.defer('resume_text').get(pk=application.pk)
+            application.status = 'REVIEW'
+            application.save()
+        self.assertEqual(version('applications'), before)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            application.email = 'ada@example.org'
+            application.save(update_fields=['email'])
+        self.assertGreater(version('applications'), before)
+
+    def test_search_view_with_file_backend(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.client.force_login(User.objects.create_user('recruiter', password='password'))
+        backend = {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': directory}
+        url = reverse('applications:search')
+
+        with override_settings(CACHES={'default': backend}):
+            with self.captureOnCommitCallbacks(execute=True):
+                application = Application.objects.create(
+                    job=self.job, name='Ada', email='ada@example.com',
+                    resume='resumes/resume.pdf', resume_text=RESUMES[0],
+                )
+            self.assertContains(self.client.get(url, {'q': 'django'}), 'Ada')
+            self.assertTrue(os.listdir(directory))
+
+            with self.captureOnCommitCallbacks(execute=True):
+                application.name = 'Grace'
+                application.save()
+            self.assertContains(self.client.get(url, {'q': 'django'}), 'Grace')
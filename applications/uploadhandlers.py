@@ -0,0 +1,83 @@
+import hashlib
+from django.conf import settings
+from django.core.files.uploadhandler import SkipFile, StopUpload, TemporaryFileUploadHandler
+
+# Leading bytes of the accepted resume formats (DOCX is a ZIP container)
+MAGIC_BYTES = {
+    b'%PDF-': 'pdf',
+    b'PK\x03\x04': 'docx',
+}
+MAGIC_LENGTH = max(len(magic) for magic in MAGIC_BYTES)
+
+# Allowance for the non-file form fields in the request body
+FORM_FIELDS_ALLOWANCE = 64 * 1024
+
+
+def sniff_file_type(head):
+    """Return 'pdf' or 'docx' from the leading bytes of a file, or None"""
+    for magic, file_type in MAGIC_BYTES.items():
+        if head.startswith(magic):
+            return file_type
+    return None
+
+
+class ResumeUploadHandler(TemporaryFileUploadHandler):
+    """
+    Streams resume uploads to a temporary file instead of memory
+
+    The content hash is computed and the file type sniffed from its magic
+    bytes while chunks arrive. Oversized or non PDF/DOCX uploads are rejected
+    as soon as that is known; the reason is left on request.resume_upload_error
+    for the form to report.
+    """
+    chunk_size = 64 * 1024
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        self.too_large = content_length > settings.RESUME_MAX_UPLOAD_SIZE + FORM_FIELDS_ALLOWANCE
+
+    def _reject(self, message):
+        self.request.resume_upload_error = message
+        raise SkipFile(message)
+
+    def new_file(self, *args, **kwargs):
+        if getattr(self, 'too_large', False):
+            self.request.resume_upload_error = self._size_message()
+            # Stop reading the body altogether
+            raise StopUpload(connection_reset=True)
+        super().new_file(*args, **kwargs)
+        self.sha256 = hashlib.sha256()
+        self.head = b''
+        self.detected_type = None
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.RESUME_MAX_UPLOAD_SIZE:
+            self._reject(self._size_message())
+
+        if self.detected_type is None:
+            self.head += raw_data[:MAGIC_LENGTH]
+            if len(self.head) >= MAGIC_LENGTH:
+                self.detected_type = sniff_file_type(self.head)
+                if self.detected_type is None:
+                    self._reject('Only PDF and DOCX files are allowed.')
+
+        self.sha256.update(raw_data)
+        super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        if self.detected_type is None:
+            self.detected_type = sniff_file_type(self.head)
+        if self.detected_type is None:
+            # Too short to sniff while streaming; drop it like any invalid file
+            self.request.resume_upload_error = 'Only PDF and DOCX files are allowed.'
+            self.upload_interrupted()
+            return None
+        file = super().file_complete(file_size)
+        file.sha256 = self.sha256.hexdigest()
+        file.detected_type = self.detected_type
+        return file
+
+    def _size_message(self):
+        limit_mb = settings.RESUME_MAX_UPLOAD_SIZE // (1024 * 1024)
+        return f'File size must be under {limit_mb}MB.'
@@ -7,4 +7,5 @@ urlpatterns = [
     path('apply/<int:job_pk>/', views.apply, name='apply'),
     path('success/', views.apply_success, name='apply_success'),
     path('<int:pk>/', views.application_detail, name='application_detail'),
+    path('search/', views.search, name='search'),
 ]
\ No newline at end of file
@@ -1,48 +1,103 @@
+from django.http import Http404, HttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db import transaction
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.core.files.storage import default_storage
+from jobs.cache import job_board_version
 from jobs.models import Job
-from .models import Application
+from .models import Application, ApplicationQuerySet
+from .cache import cached
 from .forms import ApplicationForm, ApplicationUpdateForm
-from .services import extract_resume_text, rerank_applications
+from . import metrics
+from .metrics import APPLICATIONS_SUBMITTED, STAGE_SECONDS
+from .queue import enqueue
+from .search import search_applications
+from .services import attach_resume_blob
+from .uploadhandlers import ResumeUploadHandler
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Maximum candidates shown by the search view
+SEARCH_RESULTS_LIMIT = 100
 
-@transaction.atomic
+
+# Only which applications match, and how well, is cached; search() loads
+# their rows fresh so scores, statuses and job titles are current
+@cached(
+    'candidate_search',
+    key=lambda query, job_id: (query, job_id),
+    scopes=('applications',),
+)
+def search_matches(query, job_id):
+    return [
+        (application.pk, application.search_rank)
+        for application in search_applications(query, job_id=job_id, limit=SEARCH_RESULTS_LIMIT)
+    ]
+
+
+@csrf_exempt
 def apply(request, job_pk):
     """
     Public application form for a job
-    Processes resume synchronously with optimized bulk updates
+    Streams the resume to disk, hashing and sniffing it on the way.
+    No conditional GETs: the form's CSRF token must stay fresh, so only the
+    job description fragment is cached
     """
+    # Upload handlers must be set before CsrfViewMiddleware reads request.POST,
+    # so CSRF is checked by _apply instead
+    request.upload_handlers = [ResumeUploadHandler(request)]
+    with STAGE_SECONDS.time(operation='apply', stage='total'):
+        if request.method == 'POST':
+            # Reading the body streams the upload through the handlers
+            with STAGE_SECONDS.time(operation='apply', stage='upload'):
+                request.FILES
+        return _apply(request, job_pk)
+
+
+@csrf_protect
+def _apply(request, job_pk):
+    """Saves the application and queues resume extraction and scoring"""
     job = get_object_or_404(Job, pk=job_pk)
     
     if request.method == 'POST':
-        form = ApplicationForm(request.POST, request.FILES)
-        if form.is_valid():
+        form = ApplicationForm(
+            request.POST,
+            request.FILES,
+            upload_error=getattr(request, 'resume_upload_error', None),
+        )
+        with STAGE_SECONDS.time(operation='apply', stage='validate'):
+            valid = form.is_valid()
+        if valid:
+            stored = None
             try:
-                # Save application
-                application = form.save(commit=False)
-                application.job = job
-                application.save()
+                with transaction.atomic():
+                    # Save application
+                    application = form.save(commit=False)
+                    application.job = job
+                    # Store the file once per unique content
+                    with STAGE_SECONDS.time(operation='apply', stage='store_resume'):
+                        stored = attach_resume_blob(application, form.cleaned_data['resume'])
+                    with STAGE_SECONDS.time(operation='apply', stage='db_write'):
+                        application.save()
+                        # Extract resume text and score it on a queue worker
+                        enqueue('extract_and_rank_resume', application.pk)
+                APPLICATIONS_SUBMITTED.inc()
                 
                 logger.info(f"Application {application.pk} submitted for job {job.pk} by {application.email}")
                 
-                # Extract resume text synchronously
-                resume_text = extract_resume_text(application.resume)
-                application.resume_text = resume_text
-                application.save(update_fields=['resume_text'])
-                
-                # Rerank all applications for this job (bulk update)
-                rerank_applications(job)
-                
                 messages.success(request, 'Application submitted successfully!')
                 return redirect('applications:apply_success')
                 
             except Exception as e:
                 logger.error(f"Error submitting application: {e}")
+                if stored:
+                    # The blob row was rolled back; don't leave its file behind
+                    default_storage.delete(stored)
                 messages.error(
                     request,
                     'An error occurred while submitting your application. Please try again.'
@@ -54,7 +109,9 @@ def apply(request, job_pk):
     
     return render(request, 'applications/apply.html', {
         'form': form,
-        'job': job
+        'job': job,
+        'board_version': job_board_version(),
+        'cache_timeout': settings.CACHE_TIMEOUT,
     })
 
 
@@ -89,4 +146,47 @@ def application_detail(request, pk):
     return render(request, 'applications/application_detail.html', {
         'application': application,
         'form': form
-    })
\ No newline at end of file
+    })
+
+
+@login_required
+def search(request):
+    """
+    Full-text candidate search across jobs
+    Supports "quoted phrases" and an optional job filter
+    """
+    query = request.GET.get('q', '').strip()
+    job_id = request.GET.get('job', '')
+    job_id = int(job_id) if job_id.isdigit() else None
+    
+    results = []
+    if query:
+        matches = search_matches(query, job_id)
+        found = Application.objects.select_related('job').only(
+            *ApplicationQuerySet.LISTING_FIELDS, 'job__title'
+        ).in_bulk([pk for pk, _ in matches])
+        for pk, search_rank in matches:
+            if pk in found:
+                found[pk].search_rank = search_rank
+                results.append(found[pk])
+    
+    return render(request, 'applications/search.html', {
+        'query': query,
+        'job_id': job_id,
+        'jobs': Job.objects.only('pk', 'title'),
+        'results': results,
+    })
+
+
+def prometheus_metrics(request):
+    """
+    Prometheus scrape endpoint; 404 unless METRICS_ENABLED
+    Open to staff, METRICS_TOKEN bearers and METRICS_ALLOWED_IPS only
+    """
+    if not metrics.enabled():
+        raise Http404
+    if not (request.user.is_staff or metrics.authorized(
+        request.META.get('REMOTE_ADDR', ''), request.META.get('HTTP_AUTHORIZATION', '')
+    )):
+        raise PermissionDenied
+    return HttpResponse(metrics.render(), content_type=metrics.CONTENT_TYPE)
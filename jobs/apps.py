@@ -3,4 +3,8 @@ from django.apps import AppConfig
 
 class JobsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'jobs'
\ No newline at end of file
+    name = 'jobs'
+
+    def ready(self):
+        # Invalidate cached public job pages on job changes
+        from . import signals  # noqa: F401
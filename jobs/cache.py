@@ -0,0 +1,20 @@
+from django.contrib import messages
+from applications.cache import version
+
+
+def job_board_version():
+    """Version of the public job pages; changes with every job create, edit or delete"""
+    return version('jobs')
+
+
+def _cacheable(request):
+    # Flash messages are shown once; a 304 would swallow them
+    return request.method in ('GET', 'HEAD') and not len(messages.get_messages(request))
+
+
+def job_board_etag(request, *args, **kwargs):
+    """ETag of a public job page: its version and who is viewing it (the nav bar differs)"""
+    if not _cacheable(request):
+        return None
+    return f'{job_board_version()}-{request.user.pk or 0}'
+
@@ -1,11 +1,13 @@
 from django import forms
+from django.conf import settings
+from applications.scoring import scorer_choices
 from .models import Job
 
 
 class JobForm(forms.ModelForm):
     class Meta:
         model = Job
-        fields = ['title', 'description']
+        fields = ['title', 'description', 'scoring_backend']
         widgets = {
             'title': forms.TextInput(attrs={
                 'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500',
@@ -16,4 +18,15 @@ class JobForm(forms.ModelForm):
                 'rows': 10,
                 'placeholder': 'Enter detailed job description including responsibilities, requirements, and qualifications...'
             }),
-        }
\ No newline at end of file
+        }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Scorers are configured in settings.MATCH_SCORERS
+        self.fields['scoring_backend'] = forms.ChoiceField(
+            choices=scorer_choices(),
+            initial=settings.MATCH_SCORER_DEFAULT,
+            widget=forms.Select(attrs={
+                'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500',
+            }),
+        )
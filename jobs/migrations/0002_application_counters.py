@@ -0,0 +1,72 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:01
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+STATUSES = ["NEW", "REVIEW", "INTERVIEW", "REJECTED", "HIRED"]
+
+
+def backfill_application_counters(apps, schema_editor):
+    Job = apps.get_model("jobs", "Job")
+    counts = Job.objects.annotate(
+        total=Count("application"),
+        **{
+            f"{status.lower()}_total": Count(
+                "application", filter=Q(application__status=status)
+            )
+            for status in STATUSES
+        },
+    )
+    for job in counts:
+        job.application_count = job.total
+        for status in STATUSES:
+            setattr(
+                job, f"{status.lower()}_count", getattr(job, f"{status.lower()}_total")
+            )
+    Job.objects.bulk_update(
+        counts,
+        ["application_count"] + [f"{status.lower()}_count" for status in STATUSES],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jobs", "0001_initial"),
+        ("applications", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="application_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="hired_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="interview_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="new_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="rejected_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="review_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_application_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jobs", "0002_application_counters"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="scoring_backend",
+            field=models.CharField(
+                choices=[
+                    ("tfidf", "Keyword match (TF-IDF)"),
+                    ("semantic", "Semantic match (LSA embeddings)"),
+                ],
+                default="tfidf",
+                max_length=20,
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jobs", "0003_job_scoring_backend"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="job",
+            name="scoring_backend",
+            field=models.CharField(default="tfidf", max_length=50),
+        ),
+    ]
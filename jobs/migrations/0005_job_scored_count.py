@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:30
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_scored_count(apps, schema_editor):
+    Job = apps.get_model("jobs", "Job")
+    counts = Job.objects.annotate(
+        scored=Count("application", filter=~Q(application__resume_text=""))
+    )
+    for job in counts:
+        job.scored_count = job.scored
+    Job.objects.bulk_update(counts, ["scored_count"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jobs", "0004_alter_job_scoring_backend"),
+        ("applications", "0014_search_email"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="scored_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_scored_count, migrations.RunPython.noop),
+    ]
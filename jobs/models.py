@@ -4,7 +4,18 @@ from django.db import models
 class Job(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField()
+    # Name of the scorer ranking this job's applicants, see settings.MATCH_SCORERS
+    scoring_backend = models.CharField(max_length=50, default='tfidf')
     created_at = models.DateTimeField(auto_now_add=True)
+    # Denormalized application counters, maintained by applications.signals
+    application_count = models.PositiveIntegerField(default=0, editable=False)
+    new_count = models.PositiveIntegerField(default=0, editable=False)
+    review_count = models.PositiveIntegerField(default=0, editable=False)
+    interview_count = models.PositiveIntegerField(default=0, editable=False)
+    rejected_count = models.PositiveIntegerField(default=0, editable=False)
+    hired_count = models.PositiveIntegerField(default=0, editable=False)
+    # Applications with resume text, i.e. scored ones; drives model refits
+    scored_count = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         ordering = ['-created_at']
@@ -13,4 +24,14 @@ class Job(models.Model):
         return self.title
 
     def get_application_count(self):
-        return self.application_set.count()
\ No newline at end of file
+        return self.application_count
+
+    def get_status_counts(self):
+        """Application counts per status, from the denormalized counters"""
+        return {
+            'NEW': self.new_count,
+            'REVIEW': self.review_count,
+            'INTERVIEW': self.interview_count,
+            'REJECTED': self.rejected_count,
+            'HIRED': self.hired_count,
+        }
\ No newline at end of file
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from applications.cache import invalidate, job_scope
+from .models import Job
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def invalidate_job_caches(sender, instance, **kwargs):
+    """New cache versions for the public job pages and the job's own views"""
+    invalidate('jobs', job_scope(instance.pk))
@@ -1,3 +1,275 @@
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from applications.models import Application
+from . import views
+from .models import Job
 
-# Create your tests here.
+
+def create_application(job, index=0, status='NEW', resume_text=''):
+    return Application.objects.create(
+        job=job,
+        name=f'Applicant {index}',
+        email=f'applicant{index}@example.com',
+        resume='resumes/resume.pdf',
+        resume_text=resume_text,
+        notes=resume_text,
+        status=status,
+    )
+
+
+def bytes_transferred(queries):
+    """Replay captured SELECTs and measure the size of the rows they return"""
+    total = 0
+    with connection.cursor() as cursor:
+        for query in queries:
+            if not query['sql'].startswith('SELECT'):
+                continue
+            cursor.execute(query['sql'])
+            for row in cursor.fetchall():
+                total += sum(len(str(value)) for value in row)
+    return total
+
+
+class ApplicationCounterTests(TestCase):
+    def setUp(self):
+        self.job = Job.objects.create(title='Backend Developer', description='Python and Django')
+
+    def test_counters_follow_create_status_change_and_delete(self):
+        first = create_application(self.job, 0)
+        create_application(self.job, 1)
+
+        application = Application.objects.get(pk=first.pk)
+        application.status = 'INTERVIEW'
+        application.save()
+
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.application_count, 2)
+        self.assertEqual(self.job.new_count, 1)
+        self.assertEqual(self.job.interview_count, 1)
+
+        application.delete()
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.application_count, 1)
+        self.assertEqual(self.job.interview_count, 0)
+        self.assertEqual(self.job.get_status_counts()['NEW'], 1)
+
+    def test_status_change_on_instance_loaded_without_status(self):
+        first = create_application(self.job, 0)
+
+        application = Application.objects.only('pk', 'job').get(pk=first.pk)
+        application.status = 'REVIEW'
+        application.save()
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.new_count, self.job.review_count), (0, 1))
+
+        Application.objects.defer('status').get(pk=first.pk).delete()
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.application_count, self.job.review_count), (0, 0))
+
+    def test_scored_count_follows_resume_text(self):
+        create_application(self.job, 0, resume_text='Python developer')
+        pending = create_application(self.job, 1)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.scored_count, 1)
+
+        application = Application.objects.only('pk', 'job').get(pk=pending.pk)
+        application.resume_text = 'Django developer'
+        application.save(update_fields=['resume_text'])
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.scored_count, 2)
+
+        Application.objects.defer('resume_text').get(pk=pending.pk).delete()
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.scored_count, 1)
+
+    def test_counters_never_go_negative(self):
+        create_application(self.job, 0)
+        Job.objects.filter(pk=self.job.pk).update(application_count=0, new_count=0)
+
+        Application.objects.get(job=self.job).delete()
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.application_count, self.job.new_count), (0, 0))
+
+
+class JobDashboardTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user('recruiter', password='password')
+        self.client.force_login(user)
+
+    def dashboard_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('jobs:job_list'))
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_dashboard_query_count_does_not_grow_with_jobs(self):
+        job = Job.objects.create(title='Job 0', description='Python')
+        create_application(job)
+        baseline = self.dashboard_queries()
+
+        for index in range(1, 6):
+            job = Job.objects.create(title=f'Job {index}', description='Python')
+            for applicant in range(3):
+                create_application(job, applicant)
+
+        self.assertEqual(self.dashboard_queries(), baseline)
+
+
+class LeanListViewTests(TestCase):
+    """Lists must not load resume text, notes or full descriptions"""
+
+    LARGE_TEXT = 'experienced python django engineer ' * 3000  # ~100KB
+
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user('recruiter', password='password')
+        self.client.force_login(user)
+        self.job = Job.objects.create(title='Backend Developer', description=self.LARGE_TEXT)
+        for index in range(5):
+            create_application(self.job, index, resume_text=self.LARGE_TEXT)
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return context.captured_queries
+
+    def test_job_detail_loads_only_table_columns(self):
+        queries = self.get(reverse('jobs:job_detail', args=[self.job.pk]))
+
+        # session, user, profile (base template), job, applications
+        self.assertEqual(len(queries), 5)
+        application_queries = [
+            query['sql'] for query in queries if 'FROM "applications_application"' in query['sql']
+        ]
+        self.assertEqual(len(application_queries), 1)
+        for column in ('resume_text', 'notes', 'term_counts'):
+            self.assertNotIn(f'"{column}"', application_queries[0])
+        # Only the job description itself is large
+        self.assertLess(bytes_transferred(queries), len(self.LARGE_TEXT) + 10_000)
+
+    def test_dashboard_does_not_load_descriptions(self):
+        queries = self.get(reverse('jobs:job_list'))
+
+        # session, user, profile (base template), jobs
+        self.assertEqual(len(queries), 4)
+        self.assertLess(bytes_transferred(queries), 10_000)
+
+    def test_public_job_list_loads_description_preview_only(self):
+        self.client.logout()
+        queries = self.get(reverse('jobs:public_job_list'))
+
+        self.assertEqual(len(queries), 1)
+        self.assertLess(bytes_transferred(queries), 10_000)
+
+
+class JobBoardCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.job = Job.objects.create(title='Backend Developer', description='Python and Django')
+        self.url = reverse('jobs:public_job_list')
+
+    def test_list_is_served_from_cache_until_a_job_changes(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            self.assertContains(self.client.get(self.url), 'Backend Developer')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Job.objects.create(title='Data Engineer', description='Python and SQL')
+        self.assertContains(self.client.get(self.url), 'Data Engineer')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.job.delete()
+        self.assertNotContains(self.client.get(self.url), 'Backend Developer')
+
+    def test_conditional_get(self):
+        response = self.client.get(self.url)
+        etag = response['ETag']
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.job.title = 'Senior Backend Developer'
+            self.job.save()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_signed_in_visitor_gets_own_etag(self):
+        anonymous = self.client.get(self.url)
+        self.client.force_login(User.objects.create_user('recruiter', password='password'))
+        response = self.client.get(self.url)
+
+        self.assertNotEqual(response['ETag'], anonymous['ETag'])
+        self.assertContains(response, 'recruiter')
+
+    def test_apply_page_is_never_answered_with_304(self):
+        url = reverse('applications:apply', args=[self.job.pk])
+        response = self.client.get(url)
+
+        self.assertContains(response, 'Python and Django')
+        self.assertNotIn('ETag', response)
+        # The form's CSRF token must be the current one
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='*').status_code, 200)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user('recruiter', password='password')
+        self.client.force_login(user)
+        self.job = Job.objects.create(title='Backend Developer', description='Python')
+        for index in range(7):
+            application = create_application(
+                self.job, index, status='REVIEW' if index % 2 else 'NEW'
+            )
+            # Duplicate scores exercise the created_at/id tie-breakers
+            Application.objects.filter(pk=application.pk).update(match_score=index // 2)
+        patcher = mock.patch.object(views, 'APPLICATIONS_PAGE_SIZE', 3)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def walk(self, params=None):
+        seen, params = [], dict(params or {})
+        while True:
+            response = self.client.get(reverse('jobs:job_detail', args=[self.job.pk]), params)
+            page = response.context['page']
+            seen.extend(application.pk for application in page)
+            if not page.has_next:
+                return seen
+            params['after'] = page.next_cursor
+
+    def test_pages_cover_the_ranking_in_order(self):
+        seen = self.walk()
+
+        expected = list(
+            Application.objects.filter(job=self.job)
+            .order_by('-match_score', '-created_at', '-pk')
+            .values_list('pk', flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_previous_cursor_returns_the_prior_page(self):
+        first = self.client.get(reverse('jobs:job_detail', args=[self.job.pk]))
+        first_page = [application.pk for application in first.context['page']]
+        second = self.client.get(
+            reverse('jobs:job_detail', args=[self.job.pk]),
+            {'after': first.context['page'].next_cursor},
+        )
+        back = self.client.get(
+            reverse('jobs:job_detail', args=[self.job.pk]),
+            {'before': second.context['page'].previous_cursor},
+        )
+
+        self.assertEqual([application.pk for application in back.context['page']], first_page)
+
+    def test_status_filter(self):
+        seen = self.walk({'status': 'REVIEW'})
+
+        self.assertEqual(len(seen), 3)
+        self.assertEqual(
+            set(Application.objects.filter(pk__in=seen).values_list('status', flat=True)),
+            {'REVIEW'},
+        )
@@ -8,6 +8,7 @@ urlpatterns = [
     path('dashboard/', views.job_list, name='job_list'),
     path('create/', views.job_create, name='job_create'),
     path('<int:pk>/', views.job_detail, name='job_detail'),
+    path('<int:pk>/recommendations/', views.job_recommendations, name='job_recommendations'),
     path('<int:pk>/edit/', views.job_edit, name='job_edit'),
     path('<int:pk>/delete/', views.job_delete, name='job_delete'),
 ]
\ No newline at end of file
@@ -1,24 +1,53 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.template.loader import render_to_string
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db import transaction
+from django.db.models.functions import Substr
+from django.views.decorators.http import condition
+from applications.cache import get_or_set, job_scope
+from applications.metrics import STAGE_SECONDS
+from applications.models import Application
+from applications.pagination import keyset_paginate
+from .cache import job_board_etag
 from .models import Job
 from .forms import JobForm
 
+# Characters of the description loaded for the public job teaser
+DESCRIPTION_PREVIEW_LENGTH = 400
 
+# Ranked applications shown per page on the job detail view
+APPLICATIONS_PAGE_SIZE = 50
+
+
+@condition(etag_func=job_board_etag)
 def public_job_list(request):
-    """Public view of all jobs - no authentication required"""
-    jobs = Job.objects.all()
-    return render(request, 'jobs/public_job_list.html', {'jobs': jobs})
+    """
+    Public view of all jobs - no authentication required
+    Only a prefix of each description is loaded for the teaser. The job
+    cards are a cached fragment per job board version, so the query only runs
+    after a job changed; unchanged pages revalidate with a 304
+    """
+    def render_cards():
+        jobs = (
+            Job.objects
+            .only('pk', 'title', 'created_at')
+            .annotate(description_preview=Substr('description', 1, DESCRIPTION_PREVIEW_LENGTH))
+        )
+        return render_to_string('jobs/public_job_cards.html', {'jobs': jobs})
+
+    return render(request, 'jobs/public_job_list.html', {
+        'job_cards': get_or_set('public_job_cards', (), render_cards, scopes=('jobs',)),
+    })
 
 
 @login_required
 def job_list(request):
     """
     Recruiter view of all jobs
-    Optimized with prefetch_related for application counts
+    Application counts come from denormalized counters on Job (one query)
     """
-    jobs = Job.objects.prefetch_related('application_set').all()
+    jobs = Job.objects.defer('description')
     return render(request, 'jobs/job_list.html', {'jobs': jobs})
 
 
@@ -41,15 +70,60 @@ def job_create(request):
 @login_required
 def job_detail(request, pk):
     """
-    View job details and applications
-    Optimized with select_related for better query performance
+    View job details and ranked applications
+    Applications use a lean projection and keyset pagination; resume text
+    and notes are only loaded on the application detail page
     """
     job = get_object_or_404(Job, pk=pk)
-    applications = job.application_set.select_related('job').order_by('-match_score', '-created_at')
+    applications = job.application_set.listing()
+    
+    # Optional status filter
+    status = request.GET.get('status', '')
+    status_choices = dict(Application.STATUS_CHOICES)
+    if status in status_choices:
+        applications = applications.filter(status=status)
+        total = job.get_status_counts()[status]
+    else:
+        status = ''
+        total = job.application_count
+    
+    # Keyset pagination over the ranking, cheap at any depth
+    page = keyset_paginate(
+        applications,
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+        page_size=APPLICATIONS_PAGE_SIZE,
+    )
     
     return render(request, 'jobs/job_detail.html', {
         'job': job,
-        'applications': applications
+        'applications': page,
+        'page': page,
+        'total': total,
+        'status': status,
+        'status_filters': [
+            (value, label, job.get_status_counts()[value])
+            for value, label in Application.STATUS_CHOICES
+        ],
+    })
+
+
+@login_required
+def job_recommendations(request, pk):
+    """
+    Applicants to other jobs who fit this job's description
+    Served from the inverted recommendation index, not by scoring every resume
+    """
+    from applications.recommendations import recommend_candidates
+    job = get_object_or_404(Job, pk=pk)
+    # Candidates come from every other job's applicants
+    candidates = get_or_set(
+        'job_recommendations', (job.pk,), lambda: recommend_candidates(job),
+        scopes=('applications', 'jobs', job_scope(job.pk)),
+    )
+    return render(request, 'jobs/job_recommendations.html', {
+        'job': job,
+        'candidates': candidates,
     })
 
 
@@ -62,12 +136,15 @@ def job_edit(request, pk):
     if request.method == 'POST':
         form = JobForm(request.POST, instance=job)
         if form.is_valid():
-            form.save()
+            with STAGE_SECONDS.time(operation='job_edit', stage='save'):
+                form.save()
             
-            # Rerank applications if job description changed
-            if 'description' in form.changed_data:
-                from applications.services import rerank_applications
-                rerank_applications(job)
+            # Rerank applications if job description or scoring backend changed
+            if {'description', 'scoring_backend'} & set(form.changed_data):
+                from applications.services import invalidate_job_model, rerank_applications
+                with STAGE_SECONDS.time(operation='job_edit', stage='rerank'):
+                    invalidate_job_model(job)
+                    rerank_applications(job)
                 messages.success(
                     request, 
                     f'Job "{job.title}" updated and applications re-ranked!'